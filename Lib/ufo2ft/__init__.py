@@ -1,9 +1,5 @@
-from ufo2ft._compilers.interpolatableOTFCompiler import InterpolatableOTFCompiler
-from ufo2ft._compilers.interpolatableTTFCompiler import InterpolatableTTFCompiler
-from ufo2ft._compilers.otfCompiler import OTFCompiler
-from ufo2ft._compilers.ttfCompiler import TTFCompiler
-from ufo2ft._compilers.variableCFF2sCompiler import VariableCFF2sCompiler
-from ufo2ft._compilers.variableTTFsCompiler import VariableTTFsCompiler
+import importlib
+
 from ufo2ft.constants import CFFOptimization  # noqa: F401 (fontmake uses it)
 
 __all__ = [
@@ -23,10 +19,32 @@ try:
 except ImportError:
     __version__ = "0.0.0+unknown"
 
+# The compilers (and fontTools.varLib, feaLib, etc. which they depend on) are
+# only imported when first used, to keep 'import ufo2ft' fast.
+_COMPILERS = {
+    "InterpolatableOTFCompiler": "interpolatableOTFCompiler",
+    "InterpolatableTTFCompiler": "interpolatableTTFCompiler",
+    "OTFCompiler": "otfCompiler",
+    "TTFCompiler": "ttfCompiler",
+    "VariableCFF2sCompiler": "variableCFF2sCompiler",
+    "VariableTTFsCompiler": "variableTTFsCompiler",
+}
+
+
+def __getattr__(name):
+    # the compiler classes used to be imported here
+    if name in _COMPILERS:
+        module = importlib.import_module(f"ufo2ft._compilers.{_COMPILERS[name]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def compileTTF(ufo, **kwargs):
     """Create FontTools TrueType font from a UFO.
 
+    *ufo* can be a font object or the path to a UFO on disk; in the latter case
+    the glyphs are read lazily (see *lazyGlyphs* in compileOTF).
+
     *removeOverlaps* performs a union operation on all the glyphs' contours.
 
     *flattenComponents* un-nests glyphs so that they have at most one level of
@@ -51,13 +69,24 @@ def compileTTF(ufo, **kwargs):
     *allQuadratic* (bool) specifies whether to convert all curves to quadratic - True
     by default, builds traditional glyf v0 table. If False, quadratic curves or cubic
     curves are generated depending on which has fewer points; a glyf v1 is generated.
+
+    *cache* (ufo2ft.diskCache.DiskCache, or the path of a directory) stores the
+    compiled glyphs, their contours without overlaps and their conversion to
+    quadratic curves on disk, to reuse those which didn't change in the next
+    builds, e.g. in continuous integration. The cache can be shared by concurrent
+    builds.
     """
+    from ufo2ft._compilers.ttfCompiler import TTFCompiler
+
     return TTFCompiler(**kwargs).compile(ufo)
 
 
 def compileOTF(ufo, **kwargs):
     """Create FontTools CFF font from a UFO.
 
+    *ufo* can be a font object or the path to a UFO on disk; in the latter case
+    the glyphs are read lazily (see *lazyGlyphs*).
+
     *removeOverlaps* performs a union operation on all the glyphs' contours.
 
     *optimizeCFF* (int) defines whether the CFF charstrings should be
@@ -95,6 +124,21 @@ def compileOTF(ufo, **kwargs):
     **inplace** (bool) specifies whether the filters should modify the input
       UFO's glyphs, a copy should be made first.
 
+    *compactGlyphs* (bool) makes the filters and outline compiler work on
+      compact, array-backed copies of the UFO's glyphs, to reduce the memory
+      used by large fonts. Ignored if ``inplace`` is True.
+
+    *lazyGlyphs* (bool) makes the filters and outline compiler read the glyphs
+      from the UFO on disk only when they are needed, and release the outlines
+      of the glyphs which were compiled. The UFO must have been saved to disk.
+      This is the default when a UFO path is passed instead of a font object.
+      Ignored if ``inplace`` is True.
+
+    *buildReport* (ufo2ft.buildReport.BuildReport) collects the wall and CPU time,
+      memory usage and number of glyphs of each stage of the build (filters,
+      tables, feature writers, etc.), which can then be saved as JSON or in the
+      Chrome trace event format.
+
     *layerName* specifies which layer should be compiled. When compiling something
     other than the default layer, feature compilation is skipped.
 
@@ -113,7 +157,13 @@ def compileOTF(ufo, **kwargs):
       By default "cffsubr" is used for both CFF 1 and CFF 2.
       NOTE: cffsubr is required for subroutinizing CFF2 tables, as compreffor
       currently doesn't support it.
+
+    *cache* (ufo2ft.diskCache.DiskCache, or the path of a directory) stores the
+      glyphs' contours without overlaps on disk, to reuse those which didn't
+      change in the next builds.
     """
+    from ufo2ft._compilers.otfCompiler import OTFCompiler
+
     return OTFCompiler(**kwargs).compile(ufo)
 
 
@@ -138,7 +188,12 @@ def compileInterpolatableTTFs(ufos, **kwargs):
     all UFO's "public.skipExportGlyphs" lib keys will be used. If they don't
     exist, all glyphs are exported. UFO groups and kerning will be pruned of
     skipped glyphs.
+
+    *jobs* (int) is the number of processes converting the glyphs to quadratic
+    curves, and propagating the anchors of the masters, in parallel (default: 1).
     """
+    from ufo2ft._compilers.interpolatableTTFCompiler import InterpolatableTTFCompiler
+
     return InterpolatableTTFCompiler(**kwargs).compile(ufos)
 
 
@@ -161,6 +216,11 @@ def compileVariableTTFs(designSpaceDoc, **kwargs):
       by default, builds traditional glyf v0 table. If False, quadratic curves or cubic
       curves are generated depending on which has fewer points; a glyf v1 is generated.
 
+    *memoryLimit* (int) is the amount of resident memory, in bytes, beyond which
+      the compiled masters are saved to temporary files as soon as they are built,
+      and only loaded back when they are merged into the variable fonts. Use 0 to
+      always do so. By default (None), all the masters are kept in memory.
+
     The rest of the arguments works the same as in the other compile functions.
 
     Returns a dictionary that maps each variable font filename to a new variable
@@ -169,6 +229,8 @@ def compileVariableTTFs(designSpaceDoc, **kwargs):
 
     .. versionadded:: 2.28.0
     """
+    from ufo2ft._compilers.variableTTFsCompiler import VariableTTFsCompiler
+
     return VariableTTFsCompiler(**kwargs).compile_variable(designSpaceDoc)
 
 
@@ -197,6 +259,8 @@ def compileInterpolatableTTFsFromDS(designSpaceDoc, **kwargs):
     object will contain only a minimum set of tables ("head", "hmtx", "glyf", "loca",
     "maxp", "post" and "vmtx"), and no OpenType layout tables.
     """
+    from ufo2ft._compilers.interpolatableTTFCompiler import InterpolatableTTFCompiler
+
     return InterpolatableTTFCompiler(**kwargs).compile_designspace(designSpaceDoc)
 
 
@@ -227,6 +291,8 @@ def compileInterpolatableOTFsFromDS(designSpaceDoc, **kwargs):
     object will contain only a minimum set of tables ("head", "hmtx", "CFF ", "maxp",
     "vmtx" and "VORG"), and no OpenType layout tables.
     """
+    from ufo2ft._compilers.interpolatableOTFCompiler import InterpolatableOTFCompiler
+
     return InterpolatableOTFCompiler(**kwargs).compile_designspace(designSpaceDoc)
 
 
@@ -244,6 +310,8 @@ def compileVariableTTF(designSpaceDoc, **kwargs):
 
     Returns a new variable TTFont object.
     """
+    from ufo2ft._compilers.variableTTFsCompiler import VariableTTFsCompiler
+
     fonts = VariableTTFsCompiler(**kwargs).compile_variable(designSpaceDoc)
     if len(fonts) != 1:
         raise ValueError(
@@ -255,6 +323,8 @@ def compileVariableTTF(designSpaceDoc, **kwargs):
 
 
 def compileVariableCFF2(designSpaceDoc, **kwargs):
+    from ufo2ft._compilers.variableCFF2sCompiler import VariableCFF2sCompiler
+
     fonts = VariableCFF2sCompiler(**kwargs).compile_variable(designSpaceDoc)
     if len(fonts) != 1:
         raise ValueError(
@@ -284,6 +354,11 @@ def compileVariableCFF2s(designSpaceDoc, **kwargs):
       by default, builds traditional glyf v0 table. If False, quadratic curves or cubic
       curves are generated depending on which has fewer points; a glyf v1 is generated.
 
+    *memoryLimit* (int) is the amount of resident memory, in bytes, beyond which
+      the compiled masters are saved to temporary files as soon as they are built,
+      and only loaded back when they are merged into the variable fonts. Use 0 to
+      always do so. By default (None), all the masters are kept in memory.
+
     The rest of the arguments works the same as in the other compile functions.
 
     Returns a dictionary that maps each variable font filename to a new variable
@@ -292,4 +367,6 @@ def compileVariableCFF2s(designSpaceDoc, **kwargs):
 
     .. versionadded:: 2.28.0
     """
+    from ufo2ft._compilers.variableCFF2sCompiler import VariableCFF2sCompiler
+
     return VariableCFF2sCompiler(**kwargs).compile_variable(designSpaceDoc)
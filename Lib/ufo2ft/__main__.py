@@ -0,0 +1,363 @@
+"""Compile UFOs and designspaces to binary fonts.
+
+    python -m ufo2ft [-f FORMAT ...] [-o OUTPUT_DIR] [-j JOBS] INPUT [INPUT ...]
+
+Each input (a .ufo or a .designspace) is compiled to each of the requested
+formats; by default UFOs are compiled to TTF and designspaces to a variable TTF.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from fontTools.designspaceLib import DesignSpaceDocument
+
+import ufo2ft
+from ufo2ft.buildReport import BuildReport
+from ufo2ft.diskCache import DEFAULT_MAX_SIZE, DiskCache
+from ufo2ft.util import openFont
+
+logger = logging.getLogger("ufo2ft")
+
+# format name -> (compile function name, input kind, output extension)
+FORMATS = {
+    "ttf": ("compileTTF", "ufo", ".ttf"),
+    "otf": ("compileOTF", "ufo", ".otf"),
+    "variable-ttf": ("compileVariableTTF", "designspace", ".ttf"),
+    "variable-cff2": ("compileVariableCFF2", "designspace", ".otf"),
+    "variable-ttfs": ("compileVariableTTFs", "designspace", ".ttf"),
+    "variable-cff2s": ("compileVariableCFF2s", "designspace", ".otf"),
+    "interpolatable-ttf": ("compileInterpolatableTTFsFromDS", "designspace", ".ttf"),
+    "interpolatable-otf": ("compileInterpolatableOTFsFromDS", "designspace", ".otf"),
+}
+DEFAULT_FORMATS = {"ufo": ["ttf"], "designspace": ["variable-ttf"]}
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parseSize(value):
+    """Parse a size in bytes, with an optional K, M or G suffix."""
+    match = re.fullmatch(r"\s*(\d+)\s*([KMG]?)B?\s*", value, re.IGNORECASE)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+    return int(match.group(1)) * _SIZE_UNITS[match.group(2).upper()]
+
+
+def _inputKind(path):
+    return "designspace" if path.endswith(".designspace") else "ufo"
+
+
+def _isVariable(formatName):
+    return formatName.startswith("variable")
+
+
+def _compileOptions(args, formatName):
+    options = {}
+    if args.remove_overlaps:
+        options["removeOverlaps"] = True
+        if args.overlaps_backend:
+            options["overlapsBackend"] = args.overlaps_backend
+    if args.no_production_names:
+        options["useProductionNames"] = False
+    if args.memory_limit is not None and _isVariable(formatName):
+        # only variable font builds can spill their masters to disk
+        options["memoryLimit"] = args.memory_limit
+    return options
+
+
+def _outputPaths(inputPath, formatName, result, outputDir):
+    # return (path, TTFont) tuples for the fonts returned by a compile function
+    _, _, ext = FORMATS[formatName]
+    stem = os.path.splitext(os.path.basename(inputPath.rstrip(os.sep)))[0]
+    if isinstance(result, DesignSpaceDocument):
+        for source in result.sources:
+            name = os.path.splitext(os.path.basename(source.path or source.name))[0]
+            if source.layerName is not None:
+                name += f"-{source.layerName}"
+            yield os.path.join(outputDir, name + ext), source.font
+    elif isinstance(result, dict):
+        for vfName, font in result.items():
+            yield os.path.join(outputDir, vfName + ext), font
+    else:
+        yield os.path.join(outputDir, stem + ext), result
+
+
+def _filesToHash(inputPath):
+    if _inputKind(inputPath) == "ufo":
+        roots = [inputPath]
+        paths = []
+    else:
+        doc = DesignSpaceDocument.fromfile(inputPath)
+        roots = sorted({source.path for source in doc.sources})
+        paths = [inputPath]
+    for root in roots:
+        for dirPath, dirNames, fileNames in os.walk(root):
+            dirNames.sort()
+            paths.extend(os.path.join(dirPath, f) for f in sorted(fileNames))
+    return paths
+
+
+def buildFingerprint(inputPath, formatName, options):
+    """Return a hash of the input's files (including the sources of a
+    designspace), the output format, the compile options and ufo2ft version."""
+    h = hashlib.sha256()
+    h.update(
+        json.dumps([ufo2ft.__version__, formatName, options], sort_keys=True).encode(
+            "utf-8"
+        )
+    )
+    for path in _filesToHash(inputPath):
+        h.update(os.path.relpath(path, os.path.dirname(inputPath)).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+# the DiskCache namespace of the fonts built from each input
+_BUILDS_NAMESPACE = "builds"
+
+
+def _restoreFromCache(cache, fingerprint, outputDir):
+    # the value is a JSON list of [fileName, size] on the first line, followed
+    # by the contents of the files
+    value = cache.get(_BUILDS_NAMESPACE, bytes.fromhex(fingerprint))
+    if value is None:
+        return None
+    header, _, data = value.partition(b"\n")
+    outputs = []
+    offset = 0
+    for fileName, size in json.loads(header):
+        outputPath = os.path.join(outputDir, fileName)
+        with open(outputPath, "wb") as f:
+            f.write(data[offset : offset + size])
+        offset += size
+        outputs.append(outputPath)
+    return outputs
+
+
+def _saveToCache(cache, fingerprint, outputs):
+    header = []
+    contents = []
+    for outputPath in outputs:
+        with open(outputPath, "rb") as f:
+            content = f.read()
+        header.append([os.path.basename(outputPath), len(content)])
+        contents.append(content)
+    value = json.dumps(header).encode("utf-8") + b"\n" + b"".join(contents)
+    cache.put(_BUILDS_NAMESPACE, bytes.fromhex(fingerprint), value)
+
+
+def build(inputPath, formatName, args, buildReport=None):
+    """Compile one input to one format, and return the paths of the fonts
+    written to the output directory."""
+    compileFuncName, kind, _ = FORMATS[formatName]
+    if _inputKind(inputPath) != kind:
+        raise ValueError(f"format {formatName!r} requires a {kind} input")
+    outputDir = args.output_dir or os.path.dirname(os.path.abspath(inputPath))
+    os.makedirs(outputDir, exist_ok=True)
+    options = _compileOptions(args, formatName)
+
+    cache = fingerprint = None
+    if args.cache_dir:
+        cache = DiskCache(args.cache_dir, maxSize=args.cache_size)
+        fingerprint = buildFingerprint(inputPath, formatName, options)
+        outputs = _restoreFromCache(cache, fingerprint, outputDir)
+        if outputs is not None:
+            logger.info("Using cached build of %s (%s)", inputPath, formatName)
+            return outputs
+
+    if kind == "ufo":
+        # compiling from the path allows reading the glyphs lazily
+        source = inputPath
+    else:
+        source = DesignSpaceDocument.fromfile(inputPath)
+        source.loadSourceFonts(openFont)
+    # the options which don't change the output aren't part of the fingerprint
+    if buildReport is not None:
+        options["buildReport"] = buildReport
+    if cache is not None:
+        options["cache"] = cache
+    if args.glyph_jobs > 1 and kind == "designspace":
+        options["jobs"] = args.glyph_jobs
+    result = getattr(ufo2ft, compileFuncName)(source, **options)
+
+    outputs = []
+    for outputPath, font in _outputPaths(inputPath, formatName, result, outputDir):
+        logger.info("Saving %s", outputPath)
+        font.save(outputPath)
+        outputs.append(outputPath)
+
+    if cache is not None:
+        _saveToCache(cache, fingerprint, outputs)
+    return outputs
+
+
+def _buildInWorker(inputPath, formatName, args):
+    # the build report is pickled back to the main process
+    report = BuildReport(profileGlyphs=True) if args.profile else None
+    outputs = build(inputPath, formatName, args, buildReport=report)
+    return outputs, report
+
+
+def _writeProfile(args, builds):
+    # builds is a list of (input, format, BuildReport) tuples
+    if args.profile_format == "chrome":
+        events = []
+        for _, _, report in builds:
+            events.extend(report.asChromeTrace()["traceEvents"])
+        data = {"traceEvents": events, "displayTimeUnit": "ms"}
+    else:
+        data = {
+            "builds": [
+                {"input": inputPath, "format": formatName, **report.asDict()}
+                for inputPath, formatName, report in builds
+            ]
+        }
+    with open(args.profile, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+    for inputPath, formatName, report in builds:
+        logger.info("Slowest glyphs of %s (%s):", inputPath, formatName)
+        for seconds, stage, glyphName in report.slowestGlyphs(10):
+            logger.info("  %8.3fs  %s  %s", seconds, stage, glyphName)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ufo2ft", description="Compile UFOs and designspaces."
+    )
+    parser.add_argument(
+        "inputs", metavar="INPUT", nargs="+", help=".ufo or .designspace path"
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="formats",
+        action="append",
+        choices=list(FORMATS),
+        help="output format (can be repeated); by default 'ttf' for UFOs "
+        "and 'variable-ttf' for designspaces",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="directory where to save the fonts (default: next to the inputs)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of builds to run in parallel processes (default: 1)",
+    )
+    parser.add_argument(
+        "--glyph-jobs",
+        type=int,
+        default=1,
+        help="number of processes propagating the anchors of the masters, and "
+        "converting the glyphs of TrueType builds to quadratic curves, in each "
+        "designspace build (default: 1)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="directory where to cache the built fonts, which are reused as long "
+        "as the inputs and options don't change, and the compiled glyphs, their "
+        "contours without overlaps and their conversion to quadratic curves, "
+        "which are reused by the next builds of any input as long as they don't "
+        "change",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=parseSize,
+        default=DEFAULT_MAX_SIZE,
+        metavar="SIZE",
+        help="maximum size of the --cache-dir cache, beyond which the least "
+        "recently used entries are evicted (default: 1G)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="write a report of the time spent in each build stage and on each "
+        "glyph, and of the change in resident memory during each stage",
+    )
+    parser.add_argument(
+        "--profile-format",
+        choices=["json", "chrome"],
+        default="json",
+        help="format of the --profile report (default: json)",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=parseSize,
+        metavar="SIZE",
+        help="for variable fonts, save the compiled masters to temporary files "
+        "once the memory used exceeds SIZE (e.g. 2G); this lowers the memory "
+        "used while compiling the masters, not while merging them",
+    )
+    parser.add_argument("--remove-overlaps", action="store_true")
+    parser.add_argument("--overlaps-backend", choices=["booleanOperations", "pathops"])
+    parser.add_argument(
+        "--no-production-names",
+        action="store_true",
+        help="keep the source glyph names",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(args)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(levelname)s: %(message)s",
+    )
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.glyph_jobs < 1:
+        parser.error("--glyph-jobs must be at least 1")
+
+    builds = []
+    for inputPath in args.inputs:
+        kind = _inputKind(inputPath)
+        for formatName in args.formats or DEFAULT_FORMATS[kind]:
+            if FORMATS[formatName][1] != kind:
+                parser.error(
+                    f"format {formatName!r} requires a {FORMATS[formatName][1]} "
+                    f"input: {inputPath}"
+                )
+            builds.append((inputPath, formatName))
+    if args.memory_limit is not None:
+        ignored = sorted(
+            {formatName for _, formatName in builds if not _isVariable(formatName)}
+        )
+        if ignored:
+            logger.warning(
+                "--memory-limit only applies to variable fonts, "
+                "ignoring it for the %s builds",
+                ", ".join(ignored),
+            )
+
+    reports = []
+    if args.jobs == 1 or len(builds) == 1:
+        for inputPath, formatName in builds:
+            _, report = _buildInWorker(inputPath, formatName, args)
+            reports.append((inputPath, formatName, report))
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = [
+                executor.submit(_buildInWorker, inputPath, formatName, args)
+                for inputPath, formatName in builds
+            ]
+            for (inputPath, formatName), future in zip(builds, futures):
+                _, report = future.result()
+                reports.append((inputPath, formatName, report))
+
+    if args.profile:
+        _writeProfile(args, reports)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,16 @@
 import logging
+import os
+import pickle
 from collections import defaultdict
+from contextlib import ExitStack
 from dataclasses import dataclass, field
-from typing import Callable, Optional, Type
+from tempfile import TemporaryDirectory
+from typing import TYPE_CHECKING, Callable, Optional, Type
 
-from fontTools import varLib
-from fontTools.designspaceLib.split import splitInterpolable, splitVariableFonts
 from fontTools.misc.loggingTools import Timer
-from fontTools.otlLib.optimize.gpos import COMPRESSION_LEVEL as GPOS_COMPRESSION_LEVEL
+from fontTools.ttLib.tables._g_l_y_f import Glyph, GlyphCoordinates
 
+from ufo2ft.buildReport import BuildReport, reportSpan
 from ufo2ft.constants import MTI_FEATURES_PREFIX, OPENTYPE_CATEGORIES_KEY
 from ufo2ft.errors import InvalidDesignSpaceData
 from ufo2ft.featureCompiler import (
@@ -16,18 +19,26 @@ from ufo2ft.featureCompiler import (
     VariableFeatureCompiler,
     _featuresCompatible,
 )
-from ufo2ft.instantiator import Instantiator
 from ufo2ft.postProcessor import PostProcessor
 from ufo2ft.util import (
+    _currentMemoryUsage,
     _LazyFontName,
     _notdefGlyphFallback,
     colrClipBoxQuantization,
     ensure_all_sources_have_names,
     getDefaultMasterFont,
     location_to_string,
+    openFont,
     prune_unknown_kwargs,
 )
 
+if TYPE_CHECKING:
+    from ufo2ft.diskCache import DiskCache
+    from ufo2ft.instantiator import Instantiator
+
+# fontTools.varLib, designspaceLib.split and the instantiator are only needed
+# for designspaces; they are imported on first use, as they are slow to import.
+
 
 @dataclass
 class BaseCompiler:
@@ -40,6 +51,8 @@ class BaseCompiler:
     removeOverlaps: bool = False
     overlapsBackend: Optional[str] = None
     inplace: bool = False
+    compactGlyphs: bool = False
+    lazyGlyphs: bool = False
     layerName: Optional[str] = None
     skipExportGlyphs: Optional[bool] = None
     debugFeatureFile: Optional[str] = None
@@ -51,24 +64,58 @@ class BaseCompiler:
     skipFeatureCompilation: bool = False
     preliminaryOpenTypeCategories: Optional[dict] = None
     ftConfig: dict = field(default_factory=dict)
+    buildReport: Optional[BuildReport] = None
+    cache: Optional["DiskCache"] = None
 
     def __post_init__(self):
         self.logger = logging.getLogger("ufo2ft")
         self.timer = Timer(logging.getLogger("ufo2ft.timer"), level=logging.DEBUG)
+        if isinstance(self.cache, (str, os.PathLike)):
+            from ufo2ft.diskCache import DiskCache
+
+            self.cache = DiskCache(self.cache)
+
+    def _span(self, name, **kwargs):
+        # record a span in our build report, or else in the current one if we
+        # are being run by another compiler
+        if self.buildReport is not None:
+            return self.buildReport.span(name, "compiler", **kwargs)
+        return reportSpan(name, "compiler", **kwargs)
 
     def compile(self, ufo):
-        with self.timer("preprocess UFO"):
-            glyphSet = self.preprocess(ufo)
-        with self.timer("compile a basic TTF"):
-            self.logger.info("Building OpenType tables")
-            font = self.compileOutlines(ufo, glyphSet)
-        if self.layerName is None and not self.skipFeatureCompilation:
-            self.compileFeatures(ufo, font, glyphSet=glyphSet)
-        with self.timer("postprocess TTF"):
-            font = self.postprocess(font, ufo, glyphSet)
+        lazyGlyphs = False
+        if isinstance(ufo, (str, os.PathLike)):
+            # we are the only user of the font, we can read its glyphs lazily
+            # (for this call only: the next one may be passed a font object)
+            ufo = openFont(ufo)
+            lazyGlyphs = not self.inplace
+        with self._span("compile"):
+            with self.timer("preprocess UFO"), self._span("preprocess") as span:
+                glyphSet = self.preprocess(ufo, lazyGlyphs=lazyGlyphs)
+                if span is not None:
+                    span.glyphs = len(glyphSet)
+            with (
+                self.timer("compile a basic TTF"),
+                self._span("compileOutlines", glyphs=len(glyphSet)),
+            ):
+                self.logger.info("Building OpenType tables")
+                font = self.compileOutlines(ufo, glyphSet)
+            if self.layerName is None and not self.skipFeatureCompilation:
+                with self._span("compileFeatures"):
+                    self.compileFeatures(ufo, font, glyphSet=glyphSet)
+            with self.timer("postprocess TTF"), self._span("postprocess"):
+                font = self.postprocess(font, ufo, glyphSet)
         return font
 
-    def preprocess(self, ufo_or_ufos):
+    def preprocess(self, ufo_or_ufos, lazyGlyphs=False, glyphNames=None):
+        """Return the preprocessed glyph set(s) of `ufo_or_ufos`.
+
+        If `lazyGlyphs` is True, the glyphs are read lazily even if the
+        `lazyGlyphs` option of the compiler is False.
+
+        If `glyphNames` is given, only those glyphs and their components are
+        preprocessed (see `glyphNames` in ufo2ft.preProcessor.BasePreProcessor).
+        """
         self.logger.info("Pre-processing glyphs")
         if self.skipExportGlyphs is None:
             if isinstance(ufo_or_ufos, (list, tuple)):
@@ -90,13 +137,22 @@ class BaseCompiler:
         # Preprocessors expect this parameter under a different name.
         if hasattr(self, "cubicConversionError"):
             preprocessor_args["conversionError"] = self.cubicConversionError
+        if lazyGlyphs and "lazyGlyphs" in preprocessor_args:
+            preprocessor_args["lazyGlyphs"] = True
+        if glyphNames is not None:
+            preprocessor_args["glyphNames"] = glyphNames
         preProcessor = self.preProcessorClass(ufo_or_ufos, **preprocessor_args)
         return preProcessor.process()
 
+    def makeOutlineCompiler(self, ufo, glyphSet, **kwargs):
+        """Return the outline compiler for `ufo`, with the options of this
+        compiler updated with `kwargs` (e.g. a ``previousState``)."""
+        options = prune_unknown_kwargs(self.__dict__, self.outlineCompilerClass)
+        options.update(kwargs)
+        return self.outlineCompilerClass(ufo, glyphSet=glyphSet, **options)
+
     def compileOutlines(self, ufo, glyphSet):
-        kwargs = prune_unknown_kwargs(self.__dict__, self.outlineCompilerClass)
-        outlineCompiler = self.outlineCompilerClass(ufo, glyphSet=glyphSet, **kwargs)
-        return outlineCompiler.compile()
+        return self.makeOutlineCompiler(ufo, glyphSet).compile()
 
     def postprocess(self, ttf, ufo, glyphSet, info=None):
         if self.postProcessorClass is not None:
@@ -177,15 +233,28 @@ class BaseInterpolatableCompiler(BaseCompiler):
     For sources that have the 'layerName' attribute defined, the corresponding TTFont
     object will contain only a minimum set of tables ("head", "hmtx", "glyf", "loca",
     "maxp", "post" and "vmtx"), and no OpenType layout tables.
+
+    When building variable fonts, `memoryLimit` (int, in bytes) enables a low-memory
+    streaming mode: once the resident memory of the process exceeds the limit, each
+    compiled master is saved to a temporary binary font file as soon as it is
+    built, and reopened lazily when the masters are merged: its tables are only
+    decompiled when varLib reads them, and its glyf glyphs when they are used.
+    A value of 0 spills all the masters. By default (None), all the masters are
+    kept in memory. This only reduces the memory used while the masters are
+    being compiled: merging them still reads all of them, so the peak memory of
+    the merge doesn't go down, and may even go up a little as the tables are
+    decompiled again. Where the current resident memory can't be measured, all
+    the masters are spilled.
     """
 
     extraSubstitutions: Optional[dict] = None
     variableFontNames: Optional[list] = None
+    memoryLimit: Optional[int] = None
 
     # DS-level public.openTypeCategories, read in _pre_compile_designspace
     openTypeCategories: Optional[dict] = field(init=False, default=None)
     # used to generate glyph instances on-the-fly (e.g. decomposing sparse composites)
-    instantiator: Optional[Instantiator] = field(init=False, default=None)
+    instantiator: Optional["Instantiator"] = field(init=False, default=None)
     # We may need to compile things differently based on whether the source is default
     # or not: e.g. handling of composite glyphs pointing to missing components.
     compilingVFDefaultSource: bool = field(init=False, default=True)
@@ -194,7 +263,10 @@ class BaseInterpolatableCompiler(BaseCompiler):
         if self.layerNames is None:
             self.layerNames = [None] * len(ufos)
         assert len(ufos) == len(self.layerNames)
-        self.glyphSets = self.preprocess(ufos)
+        with self._span("preprocess") as span:
+            self.glyphSets = self.preprocess(ufos)
+            if span is not None:
+                span.glyphs = sum(len(glyphSet) for glyphSet in self.glyphSets)
 
         default_idx = (
             self.instantiator.default_source_idx if self.instantiator else None
@@ -213,16 +285,19 @@ class BaseInterpolatableCompiler(BaseCompiler):
         else:
             self.logger.info("Building OpenType tables for %s", fontName)
 
-        ttf = self.compileOutlines(ufo, glyphSet, layerName)
+        with self._span("compileOutlines", glyphs=len(glyphSet)):
+            ttf = self.compileOutlines(ufo, glyphSet, layerName)
 
         # Only the default layer is likely to have all glyphs used in feature
         # code.
         if layerName is None and not self.skipFeatureCompilation:
             if self.debugFeatureFile:
                 self.debugFeatureFile.write("\n### %s ###\n" % fontName)
-            self.compileFeatures(ufo, ttf, glyphSet=glyphSet)
+            with self._span("compileFeatures"):
+                self.compileFeatures(ufo, ttf, glyphSet=glyphSet)
 
-        ttf = self.postprocess(ttf, ufo, glyphSet)
+        with self._span("postprocess"):
+            ttf = self.postprocess(ttf, ufo, glyphSet)
 
         if layerName is not None and "post" in ttf:
             # for sparse masters (i.e. containing only a subset of the glyphs), we
@@ -268,6 +343,8 @@ class BaseInterpolatableCompiler(BaseCompiler):
             for left, right in rule.subs:
                 self.extraSubstitutions[left].add(right)
 
+        from ufo2ft.instantiator import Instantiator
+
         # used to interpolate glyphs on-the-fly in filters (e.g. DecomposeComponents)
         self.instantiator = Instantiator.from_designspace(
             designSpaceDoc, round_geometry=False, do_info=False, do_kerning=False
@@ -284,7 +361,12 @@ class BaseInterpolatableCompiler(BaseCompiler):
             source.font = font
         return result
 
-    def _compileNeededSources(self, designSpaceDoc):
+    def _compileNeededSources(self, designSpaceDoc, spillDir=None):
+        from fontTools.designspaceLib.split import splitInterpolable, splitVariableFonts
+        from fontTools.otlLib.optimize.gpos import (
+            COMPRESSION_LEVEL as GPOS_COMPRESSION_LEVEL,
+        )
+
         # We'll need to map <source> elements to TTFonts, to do so make sure that
         # each <source> has a name.
         ensure_all_sources_have_names(designSpaceDoc)
@@ -295,6 +377,7 @@ class BaseInterpolatableCompiler(BaseCompiler):
         ]
         vfNameToBaseUfo = {}
         sourcesToCompile = set()
+        defaultSourceNames = set()
         for subDoc in interpolableSubDocs:
             for vfName, vfDoc in splitVariableFonts(subDoc):
                 if (
@@ -322,6 +405,7 @@ class BaseInterpolatableCompiler(BaseCompiler):
                     default_source.font,
                     vfDoc.lib.get("public.fontInfo"),
                 )
+                defaultSourceNames.add(default_source.name)
                 for source in vfDoc.sources:
                     sourcesToCompile.add(source.name)
 
@@ -365,7 +449,15 @@ class BaseInterpolatableCompiler(BaseCompiler):
                 if not subDoc.sources:
                     continue
 
-                ttfDesignSpace = self.compile_designspace(subDoc)
+                ufos = self._pre_compile_designspace(subDoc)
+                ttfs = self.compile(ufos)
+                if spillDir is not None:
+                    # the default masters are deep-copied by varLib to make the VFs,
+                    # there's no point spilling them to disk
+                    ttfs = self._spillMasters(
+                        subDoc.sources, ttfs, spillDir, keep=defaultSourceNames
+                    )
+                ttfDesignSpace = self._post_compile_designspace(subDoc, ttfs)
 
                 if gpos_compact_value is not None:
                     # the VF will inherit the config from the base TTF master
@@ -379,7 +471,11 @@ class BaseInterpolatableCompiler(BaseCompiler):
                             ttfSource.name
                         ].font
                     sourcesByName[ttfSource.name].font = ttfSource.font
-                    originalGlyphsets[ttfSource.name] = glyphSet
+                    # only the default glyphSets are needed to build variable features
+                    if spillDir is None or ttfSource.name in defaultSourceNames:
+                        originalGlyphsets[ttfSource.name] = glyphSet
+                if spillDir is not None:
+                    self.glyphSets = None
         finally:
             # can restore self to its original state
             if gpos_compact_value is not None:
@@ -399,12 +495,20 @@ class BaseInterpolatableCompiler(BaseCompiler):
         if not self.inplace:
             designSpaceDoc = designSpaceDoc.deepcopyExceptFonts()
 
+        with ExitStack() as stack:
+            stack.enter_context(self._span("compile_variable"))
+            spillDir = None
+            if self.memoryLimit is not None:
+                spillDir = stack.enter_context(TemporaryDirectory(prefix="ufo2ft-"))
+            return self._compile_variable(designSpaceDoc, spillDir, stack)
+
+    def _compile_variable(self, designSpaceDoc, spillDir, stack):
         (
             vfNameToBaseUfo,
             buildVariableFeatures,
             originalSources,
             originalGlyphsets,
-        ) = self._compileNeededSources(designSpaceDoc)
+        ) = self._compileNeededSources(designSpaceDoc, spillDir)
 
         if not vfNameToBaseUfo:
             return {}
@@ -423,21 +527,45 @@ class BaseInterpolatableCompiler(BaseCompiler):
             # which we'll do later, so we don't need to produce them here.
             excludeVariationTables = set(excludeVariationTables) | {"GSUB"}
 
-        with self.timer("merge fonts to variable"):
+        if spillDir is not None:
+            for source in designSpaceDoc.sources:
+                if isinstance(source.font, _SpilledMaster):
+                    source.font = source.font.load()
+                    stack.callback(source.font.close)
+
+        with self.timer("merge fonts to variable"), self._span("merge"):
             vfNameToTTFont = self._merge(designSpaceDoc, excludeVariationTables)
 
         if buildVariableFeatures:
-            self.compile_all_variable_features(
-                designSpaceDoc, vfNameToTTFont, originalSources, originalGlyphsets
-            )
+            with self._span("compileFeatures"):
+                self.compile_all_variable_features(
+                    designSpaceDoc, vfNameToTTFont, originalSources, originalGlyphsets
+                )
         for vfName, varfont in list(vfNameToTTFont.items()):
             ufo, info = vfNameToBaseUfo[vfName]
-            vfNameToTTFont[vfName] = self.postprocess(
-                varfont, ufo, glyphSet=None, info=info
-            )
+            with self._span("postprocess", font=vfName):
+                vfNameToTTFont[vfName] = self.postprocess(
+                    varfont, ufo, glyphSet=None, info=info
+                )
 
         return vfNameToTTFont
 
+    def _memoryLimitExceeded(self):
+        usage = _currentMemoryUsage()
+        # if we can't tell how much memory we are using, err on the safe side
+        return usage is None or usage > self.memoryLimit
+
+    def _spillMasters(self, sources, ttfs, spillDir, keep=()):
+        # Save the compiled master TTFonts to disk as soon as they are built, and
+        # yield placeholders that are loaded back just before merging.
+        for source, ttf in zip(sources, ttfs):
+            if source.name in keep or not self._memoryLimitExceeded():
+                yield ttf
+                continue
+            path = os.path.join(spillDir, f"master{len(os.listdir(spillDir))}")
+            self.logger.debug("Saving compiled master %s to %s", source.name, path)
+            yield _SpilledMaster.save(ttf, path)
+
     def compile_all_variable_features(
         self,
         designSpaceDoc,
@@ -446,6 +574,8 @@ class BaseInterpolatableCompiler(BaseCompiler):
         originalGlyphsets,
         debugFeatureFile=False,
     ):
+        from fontTools.designspaceLib.split import splitInterpolable, splitVariableFonts
+
         interpolableSubDocs = [
             subDoc for _location, subDoc in splitInterpolable(designSpaceDoc)
         ]
@@ -463,6 +593,8 @@ class BaseInterpolatableCompiler(BaseCompiler):
                 self.compile_variable_features(ufoDoc, ttFont, defaultGlyphset)
 
     def compile_variable_features(self, designSpaceDoc, ttFont, glyphSet):
+        from fontTools import varLib
+
         default_ufo = designSpaceDoc.findDefault().font
 
         featureCompiler = VariableFeatureCompiler(
@@ -481,3 +613,129 @@ class BaseInterpolatableCompiler(BaseCompiler):
 
         # Add back feature variations, as the code above would overwrite them.
         varLib.addGSUBFeatureVariations(ttFont, designSpaceDoc)
+
+
+class _SpilledMaster:
+    """Placeholder for a compiled master TTFont that was saved to a file.
+
+    The master is saved in the binary format, and reopened lazily: its tables
+    are only decompiled when accessed, and its glyf glyphs when used. What the
+    binary format doesn't keep as is gets saved next to it, and is restored
+    when loading the master:
+
+    - the glyph order, as the masters may have no glyph names in 'post';
+    - the unrounded coordinates, component offsets and component transforms
+      of the glyf glyphs, which varLib compares with those of the other
+      masters;
+    - the TrueType programs, which varLib compares with those of the default
+      master, which are assembled from the UFO and not disassembled;
+    - the CFF Private dict values equal to the defaults, which the binary
+      table omits but varLib expects to find in all the masters.
+    """
+
+    def __init__(self, path, cfg=None):
+        self.path = path
+        self.cfg = cfg
+
+    @classmethod
+    def save(cls, ttf, path):
+        extra = {"glyphOrder": ttf.getGlyphOrder(), "tables": {}}
+        for tag in ("fpgm", "prep"):
+            if tag in ttf:
+                extra["tables"][tag] = ttf[tag]
+        if "glyf" in ttf:
+            extra["glyphs"] = _glyfValuesToRestore(ttf["glyf"])
+        for tag in ("CFF ", "CFF2"):
+            if tag in ttf:
+                extra["privates"] = [
+                    dict(private.rawDict) for private in _cffPrivateDicts(ttf[tag])
+                ]
+        with open(path + ".extra", "wb") as f:
+            pickle.dump(extra, f, protocol=pickle.HIGHEST_PROTOCOL)
+        ttf.recalcTimestamp = False
+        ttf.save(path)
+        return cls(path, cfg=ttf.cfg)
+
+    def load(self):
+        from fontTools.ttLib import TTFont
+
+        with open(self.path + ".extra", "rb") as f:
+            extra = pickle.load(f)
+        font = TTFont(self.path, lazy=True, cfg=self.cfg)
+        font.setGlyphOrder(extra["glyphOrder"])
+        font.tables.update(extra["tables"])
+        if "glyf" in font:
+            glyphs = font["glyf"].glyphs
+            for name, values in extra["glyphs"].items():
+                glyphs[name] = _SpilledGlyph(glyphs[name].data, values)
+        for tag in ("CFF ", "CFF2"):
+            if tag in font:
+                privates = _cffPrivateDicts(font[tag])
+                for private, rawDict in zip(privates, extra["privates"]):
+                    for key, value in rawDict.items():
+                        private.rawDict.setdefault(key, value)
+        return font
+
+
+def _glyfValuesToRestore(glyf):
+    # the values of the glyphs which don't survive the binary format as they
+    # are, keyed by glyph name
+    result = {}
+    for name, glyph in glyf.glyphs.items():
+        if hasattr(glyph, "data"):
+            continue  # not decompiled, so read from a binary table
+        values = {}
+        program = getattr(glyph, "program", None)
+        if program:
+            values["program"] = program
+        if glyph.isComposite():
+            offsets = [(c.x, c.y) for c in glyph.components if hasattr(c, "x")]
+            if any(not float(v).is_integer() for xy in offsets for v in xy):
+                values["offsets"] = offsets
+            # the binary format rounds the transforms to F2Dot14, and reads
+            # them back as lists rather than tuples
+            transforms = [getattr(c, "transform", None) for c in glyph.components]
+            if any(transform is not None for transform in transforms):
+                values["transforms"] = transforms
+        elif glyph.numberOfContours > 0:
+            if any(not float(v).is_integer() for v in glyph.coordinates.array):
+                values["coordinates"] = glyph.coordinates
+        if values:
+            result[name] = values
+    return result
+
+
+def _cffPrivateDicts(table):
+    topDict = table.cff.topDictIndex[0]
+    if hasattr(topDict, "FDArray"):
+        return [fd.Private for fd in topDict.FDArray]
+    return [topDict.Private]
+
+
+class _SpilledGlyph(Glyph):
+    """A glyf Glyph read from a spilled master, whose program, unrounded
+    coordinates, component offsets or transforms are restored when it's
+    decompiled."""
+
+    def __init__(self, data, values):
+        super().__init__(data)
+        self.values = values
+
+    def expand(self, glyfTable):
+        if not hasattr(self, "data"):
+            return
+        super().expand(glyfTable)
+        values = self.values
+        del self.values
+        if "program" in values:
+            self.program = values["program"]
+        if "coordinates" in values:
+            self.coordinates = GlyphCoordinates(values["coordinates"])
+        if "offsets" in values:
+            components = (c for c in self.components if hasattr(c, "x"))
+            for component, (x, y) in zip(components, values["offsets"]):
+                component.x, component.y = x, y
+        if "transforms" in values:
+            for component, transform in zip(self.components, values["transforms"]):
+                if transform is not None:
+                    component.transform = transform
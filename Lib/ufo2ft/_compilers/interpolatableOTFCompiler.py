@@ -1,8 +1,6 @@
 from dataclasses import dataclass
 from typing import Optional, Type
 
-from fontTools import varLib
-
 from ufo2ft.constants import SPARSE_OTF_MASTER_TABLES, CFFOptimization
 from ufo2ft.outlineCompiler import OutlineOTFCompiler
 from ufo2ft.preProcessor import OTFInterpolatablePreProcessor
@@ -20,6 +18,7 @@ class InterpolatableOTFCompiler(BaseInterpolatableCompiler):
     colrLayerReuse: bool = False
     colrAutoClipBoxes: bool = False
     skipFeatureCompilation: bool = False
+    jobs: int = 1
 
     def compileOutlines(self, ufo, glyphSet, layerName=None):
         kwargs = prune_unknown_kwargs(self.__dict__, self.outlineCompilerClass)
@@ -29,6 +28,8 @@ class InterpolatableOTFCompiler(BaseInterpolatableCompiler):
         return outlineCompiler.compile()
 
     def _merge(self, designSpaceDoc, excludeVariationTables):
+        from fontTools import varLib
+
         return varLib.build_many(
             designSpaceDoc,
             exclude=excludeVariationTables,
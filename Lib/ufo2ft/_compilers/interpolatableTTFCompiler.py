@@ -1,8 +1,6 @@
 from dataclasses import dataclass
 from typing import Optional, Type
 
-from fontTools import varLib
-
 from ufo2ft.constants import SPARSE_TTF_MASTER_TABLES
 from ufo2ft.outlineCompiler import OutlineTTFCompiler
 from ufo2ft.preProcessor import TTFInterpolatablePreProcessor
@@ -25,6 +23,7 @@ class InterpolatableTTFCompiler(BaseInterpolatableCompiler):
     autoUseMyMetrics: bool = False
     allQuadratic: bool = True
     skipFeatureCompilation: bool = False
+    jobs: int = 1
 
     def compileOutlines(self, ufo, glyphSet, layerName=None):
         kwargs = prune_unknown_kwargs(self.__dict__, self.outlineCompilerClass)
@@ -41,6 +40,8 @@ class InterpolatableTTFCompiler(BaseInterpolatableCompiler):
         return outlineCompiler.compile()
 
     def _merge(self, designSpaceDoc, excludeVariationTables):
+        from fontTools import varLib
+
         return varLib.build_many(
             designSpaceDoc,
             exclude=excludeVariationTables,
@@ -3,7 +3,6 @@ from typing import Optional, Type
 
 from ufo2ft.outlineCompiler import OutlineTTFCompiler
 from ufo2ft.preProcessor import TTFPreProcessor
-from ufo2ft.util import prune_unknown_kwargs
 
 from .baseCompiler import BaseCompiler
 
@@ -21,8 +20,6 @@ class TTFCompiler(BaseCompiler):
     dropImpliedOnCurves: bool = False
     allQuadratic: bool = True
 
-    def compileOutlines(self, ufo, glyphSet):
-        kwargs = prune_unknown_kwargs(self.__dict__, self.outlineCompilerClass)
-        kwargs["glyphDataFormat"] = 0 if self.allQuadratic else 1
-        outlineCompiler = self.outlineCompilerClass(ufo, glyphSet=glyphSet, **kwargs)
-        return outlineCompiler.compile()
+    def makeOutlineCompiler(self, ufo, glyphSet, **kwargs):
+        kwargs.setdefault("glyphDataFormat", 0 if self.allQuadratic else 1)
+        return super().makeOutlineCompiler(ufo, glyphSet, **kwargs)
@@ -0,0 +1,355 @@
+"""Structured report of the time spent in each stage of a build.
+
+A BuildReport is passed to the compilers with the ``buildReport`` option. While
+a compiler runs, the stages of the pipeline (preprocessing, each filter, each
+table, each feature writer, feaLib, merge and postprocessing) record nested
+spans in it, with their wall and CPU time, the change in memory usage and,
+where it makes sense, the number of glyphs processed.
+
+The report can be exported as JSON, or in the Chrome trace event format that
+can be loaded in chrome://tracing or https://ui.perfetto.dev.
+
+With ``profileGlyphs=True``, the filters and the outline compilers also record
+the time spent on each glyph, to find the few glyphs that slow down a build
+(see BuildReport.slowestGlyphs).
+
+With ``traceMemory=True``, the Python memory allocations are traced with the
+tracemalloc module: each span records its peak and retained allocations, and
+the stages of the compilers also record the source lines which retained the
+most memory. Tracing slows down the build considerably.
+
+>>> from ufo2ft import compileTTF
+>>> from ufo2ft.buildReport import BuildReport
+>>> report = BuildReport()
+>>> ttf = compileTTF(ufo, buildReport=report)  # doctest: +SKIP
+>>> report.save("report.json")  # doctest: +SKIP
+>>> report.save("trace.json", format="chrome")  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from ufo2ft.util import _currentMemoryUsage
+
+__all__ = ["BuildReport", "Span", "currentReport", "reportSpan"]
+
+_currentReport: ContextVar[BuildReport | None] = ContextVar(
+    "ufo2ft.buildReport", default=None
+)
+
+
+@dataclass
+class Span:
+    """A timed stage of the build, possibly containing nested stages.
+
+    ``start`` is the wall time in seconds since the report was created;
+    ``memoryDelta`` is the change in resident memory in bytes, or None if it
+    can't be measured on this platform; ``glyphs`` is the number of glyphs
+    processed, if relevant. ``glyphTimes`` maps glyph names to the seconds
+    spent on them, when the report profiles glyphs and the stage supports it;
+    it is None otherwise.
+
+    When tracing memory, ``memoryPeak`` is the maximum amount of memory in
+    bytes allocated by Python during the span, on top of what was allocated
+    when it started, and ``memoryRetained`` what was still allocated when
+    the span ended (negative if memory was freed). ``allocationSites`` lists
+    the source lines which retained the most memory, for the compiler stages.
+    """
+
+    name: str
+    category: str
+    start: float
+    wallTime: float = 0.0
+    cpuTime: float = 0.0
+    memoryDelta: int | None = None
+    glyphs: int | None = None
+    args: dict[str, Any] = field(default_factory=dict)
+    threadId: int = 0
+    children: list[Span] = field(default_factory=list)
+    glyphTimes: dict[str, float] | None = None
+    memoryPeak: int | None = None
+    memoryRetained: int | None = None
+    allocationSites: list[dict[str, Any]] | None = None
+    # absolute traced memory at the start of the span, and peak so far
+    _tracedStart: int = field(default=0, repr=False)
+    _tracedPeak: int = field(default=0, repr=False)
+    _snapshot: Any = field(default=None, repr=False)
+
+    def asDict(self) -> dict[str, Any]:
+        result = {
+            "name": self.name,
+            "category": self.category,
+            "start": self.start,
+            "wallTime": self.wallTime,
+            "cpuTime": self.cpuTime,
+            "memoryDelta": self.memoryDelta,
+        }
+        if self.glyphs is not None:
+            result["glyphs"] = self.glyphs
+        if self.args:
+            result["args"] = self.args
+        if self.memoryPeak is not None:
+            result["memoryPeak"] = self.memoryPeak
+            result["memoryRetained"] = self.memoryRetained
+        if self.allocationSites is not None:
+            result["allocationSites"] = self.allocationSites
+        if self.glyphTimes:
+            result["glyphTimes"] = self.glyphTimes
+        if self.children:
+            result["children"] = [child.asDict() for child in self.children]
+        return result
+
+    def walk(self):
+        """Iterate over this span and all its descendants, depth-first."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class BuildReport:
+    """Collects the spans recorded while compiling fonts.
+
+    If ``profileGlyphs`` is True, the stages which process glyphs one by one
+    also record the time spent on each glyph.
+
+    If ``traceMemory`` is True, the memory allocations of each span are traced,
+    and the ``allocationSites`` source lines which retained the most memory
+    are recorded for the spans in ``allocationCategories``.
+    """
+
+    def __init__(
+        self,
+        profileGlyphs=False,
+        traceMemory=False,
+        allocationSites=10,
+        allocationCategories=("compiler",),
+    ):
+        self.profileGlyphs = profileGlyphs
+        self.traceMemory = traceMemory
+        self.allocationSites = allocationSites
+        self.allocationCategories = frozenset(allocationCategories)
+        self._startedTracing = False
+        self.spans: list[Span] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        # the stack of currently open spans, for each thread
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # reports can be sent back from worker processes, but not while open
+        state = self.__dict__.copy()
+        del state["_lock"], state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    @contextmanager
+    def span(self, name, category="ufo2ft", glyphs=None, **args):
+        """Record a span around the body of the with statement.
+
+        The span is yielded, so that e.g. its ``glyphs`` count can be set
+        once known. While the span is open, the report is the current one,
+        used by the module-level reportSpan function.
+        """
+        stack = self._stack()
+        span = Span(
+            name,
+            category,
+            start=time.perf_counter() - self._origin,
+            glyphs=glyphs,
+            args=args,
+            threadId=threading.get_ident(),
+            glyphTimes={} if self.profileGlyphs else None,
+        )
+        if stack:
+            stack[-1].children.append(span)
+        else:
+            with self._lock:
+                self.spans.append(span)
+        parent = stack[-1] if stack else None
+        stack.append(span)
+        token = _currentReport.set(self)
+        if self.traceMemory:
+            self._startTracing(span, parent)
+        memoryBefore = _currentMemoryUsage()
+        cpuStart = time.process_time()
+        wallStart = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.wallTime = time.perf_counter() - wallStart
+            span.cpuTime = time.process_time() - cpuStart
+            memoryAfter = _currentMemoryUsage()
+            if memoryBefore is not None and memoryAfter is not None:
+                span.memoryDelta = memoryAfter - memoryBefore
+            if self.traceMemory:
+                self._stopTracing(span, parent)
+            _currentReport.reset(token)
+            stack.pop()
+            if not stack and self._startedTracing:
+                tracemalloc.stop()
+                self._startedTracing = False
+
+    def _startTracing(self, span, parent):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._startedTracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        # tracemalloc has a single peak: save the parent's before resetting it
+        if parent is not None:
+            parent._tracedPeak = max(parent._tracedPeak, peak)
+        tracemalloc.reset_peak()
+        span._tracedStart = span._tracedPeak = current
+        if span.category in self.allocationCategories and self.allocationSites:
+            span._snapshot = _takeSnapshot()
+
+    def _stopTracing(self, span, parent):
+        if not tracemalloc.is_tracing():
+            # someone else stopped it
+            return
+        if span._snapshot is not None:
+            diff = _takeSnapshot().compare_to(span._snapshot, "lineno")
+            span._snapshot = None
+            span.allocationSites = [
+                {
+                    "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size": stat.size_diff,
+                    "count": stat.count_diff,
+                }
+                for stat in diff[: self.allocationSites]
+                if stat.size_diff > 0
+            ]
+        current, peak = tracemalloc.get_traced_memory()
+        span._tracedPeak = max(span._tracedPeak, peak)
+        span.memoryPeak = span._tracedPeak - span._tracedStart
+        span.memoryRetained = current - span._tracedStart
+        if parent is not None:
+            parent._tracedPeak = max(parent._tracedPeak, span._tracedPeak)
+
+    def walk(self):
+        """Iterate over all the recorded spans, depth-first."""
+        for span in self.spans:
+            yield from span.walk()
+
+    def totals(self) -> dict[str, float]:
+        """Return the total wall time of the spans, grouped by name."""
+        result = {}
+        for span in self.walk():
+            result[span.name] = result.get(span.name, 0.0) + span.wallTime
+        return result
+
+    def slowestGlyphs(self, n=10) -> list[tuple[float, str, str]]:
+        """Return the n glyphs which took the longest to process in a stage,
+        as (seconds, stage name, glyph name) tuples, slowest first.
+
+        The times of a glyph in stages with the same name (e.g. a filter run
+        on several masters) are added up.
+        """
+        times = {}
+        for span in self.walk():
+            if not span.glyphTimes:
+                continue
+            for glyphName, seconds in span.glyphTimes.items():
+                key = (span.name, glyphName)
+                times[key] = times.get(key, 0.0) + seconds
+        return heapq.nlargest(
+            n, ((seconds, stage, glyph) for (stage, glyph), seconds in times.items())
+        )
+
+    def asDict(self) -> dict[str, Any]:
+        result = {"spans": [span.asDict() for span in self.spans]}
+        if self.profileGlyphs:
+            result["slowestGlyphs"] = [
+                {"glyph": glyphName, "stage": stage, "time": seconds}
+                for seconds, stage, glyphName in self.slowestGlyphs()
+            ]
+        return result
+
+    def asChromeTrace(self) -> dict[str, Any]:
+        """Return the spans as Chrome trace 'complete' events."""
+        pid = os.getpid()
+        events = []
+        for span in self.walk():
+            args = dict(span.args)
+            args["cpuTime"] = span.cpuTime
+            if span.memoryDelta is not None:
+                args["memoryDelta"] = span.memoryDelta
+            if span.glyphs is not None:
+                args["glyphs"] = span.glyphs
+            if span.memoryPeak is not None:
+                args["memoryPeak"] = span.memoryPeak
+                args["memoryRetained"] = span.memoryRetained
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    # timestamps and durations are in microseconds
+                    "ts": span.start * 1e6,
+                    "dur": span.wallTime * 1e6,
+                    "pid": pid,
+                    "tid": span.threadId,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, path, format="json"):
+        """Write the report to a file, either as plain JSON ("json") or in
+        the Chrome trace event format ("chrome")."""
+        if format == "json":
+            data = self.asDict()
+        elif format == "chrome":
+            data = self.asChromeTrace()
+        else:
+            raise ValueError(f"Unknown build report format: {format!r}")
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, indent=2)
+
+
+def _takeSnapshot():
+    return tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        )
+    )
+
+
+def currentReport() -> BuildReport | None:
+    """Return the BuildReport of the build in progress, if any."""
+    return _currentReport.get()
+
+
+def reportSpan(name, category="ufo2ft", glyphs=None, **args):
+    """Record a span in the current BuildReport, if any.
+
+    Return a context manager yielding the Span, or None if no report is
+    being collected.
+    """
+    report = _currentReport.get()
+    if report is None:
+        return nullcontext()
+    return report.span(name, category, glyphs=glyphs, **args)
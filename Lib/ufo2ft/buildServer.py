@@ -0,0 +1,737 @@
+"""A build server keeping the fonts it compiles open between builds.
+
+    python -m ufo2ft.buildServer [--socket PATH] [--poll-interval SECONDS]
+
+Designers rebuild the same fonts many times an hour. The build server keeps
+the sources it compiled in memory, together with the intermediate results of
+the last build of each. When asked to build a font again, it only re-reads
+the source files which changed since (according to their modification time
+and size), and only redoes the stages of the build which depend on them:
+e.g. after editing the kerning, groups or features of a UFO, the OpenType
+layout features are compiled on top of the previously compiled outlines;
+after editing some glyphs, only those (and the composite glyphs using them)
+are preprocessed and compiled again, unless the UFO has custom filters or
+color layers, which may read any glyph; if nothing changed, the previous
+binaries are returned as they are. The variable fonts built from
+designspaces are always built again from their sources.
+
+Requests are JSON objects, one per line, read from the standard input or from
+the connections to a Unix socket; the response to each is written on the same
+channel, as a JSON object on one line:
+
+    {"id": 1, "method": "build", "params": {"input": "Font.ufo", "format": "otf"}}
+    {"id": 1, "result": {"outputs": ["Font.otf"], "rebuilt": "full", ...}}
+
+The methods are:
+
+- ``build``: compile ``input`` (a .ufo or .designspace path) to ``format``
+  (one of the formats of ``python -m ufo2ft``, by default ttf for UFOs and
+  variable-ttf for designspaces) in ``outputDir`` (by default next to the
+  input), passing the ``options`` to the compile function. The result lists
+  the ``outputs``, the source files which ``changed`` since the last build and
+  what was ``rebuilt``: "full", "glyphs", "features", or null if nothing
+  changed. Only the builds of UFOs to ttf or otf are incremental: those of
+  designspaces are always full builds, their sources only being kept open.
+  With ``"watch": true``, the server then polls the sources and rebuilds the
+  font when they change, sending a ``rebuilt`` notification (a message with
+  a method and params, but no id) with the same result to the client, or a
+  ``buildFailed`` one.
+- ``forget``: close the fonts compiled from ``input``.
+- ``status``: list the fonts being kept open.
+- ``shutdown``: stop the server.
+
+Failed requests get an ``error`` response with the ``type`` and ``message``
+of the exception instead of a ``result``.
+"""
+
+import argparse
+import json
+import logging
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+from io import BytesIO, TextIOWrapper
+
+from fontTools.designspaceLib import DesignSpaceDocument
+from fontTools.ttLib import TTFont
+
+import ufo2ft
+from ufo2ft.__main__ import DEFAULT_FORMATS, FORMATS, _inputKind, _outputPaths
+from ufo2ft.constants import COLOR_PALETTES_KEY, FILTERS_KEY
+from ufo2ft.outlineCompiler import IncrementalState
+from ufo2ft.util import _GlyphSet, makeComponentIndex, openFont
+
+logger = logging.getLogger(__name__)
+
+# the compiler classes of the formats which are built in stages
+_UFO_COMPILERS = {"ttf": "TTFCompiler", "otf": "OTFCompiler"}
+
+# the UFO files which are read again individually when they change; a change
+# to any other file outside of the glyphs directories reopens the whole font
+_FONT_FILES = {
+    "features.fea": "features",
+    "groups.plist": "groups",
+    "kerning.plist": "kerning",
+    "lib.plist": "lib",
+}
+
+_GLYPH_ORDER_KEY = "public.glyphOrder"
+
+# the changes which only affect the OpenType layout features
+_FEATURE_CHANGES = frozenset(["features", "groups", "kerning"])
+
+# the changes after which only the modified glyphs need to be compiled again
+_GLYPH_CHANGES = _FEATURE_CHANGES | {"glyphs"}
+
+
+def _scanFiles(paths):
+    # return {path: (mtime, size)} for the given files and the files within
+    # the given directories
+    result = {}
+    for path in paths:
+        if not os.path.isdir(path):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            result[path] = (st.st_mtime_ns, st.st_size)
+            continue
+        for dirPath, _, fileNames in os.walk(path):
+            for fileName in fileNames:
+                filePath = os.path.join(dirPath, fileName)
+                try:
+                    st = os.stat(filePath)
+                except FileNotFoundError:
+                    continue
+                result[filePath] = (st.st_mtime_ns, st.st_size)
+    return result
+
+
+class _SourceFiles:
+    """The modification times and sizes of a set of files and directories."""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.snapshot = _scanFiles(paths)
+
+    def changed(self):
+        """Return the files added, removed or modified since the last update."""
+        current = _scanFiles(self.paths)
+        return self._diff(current)
+
+    def update(self):
+        """Like changed(), and take the current state as the new reference."""
+        current = _scanFiles(self.paths)
+        changed = self._diff(current)
+        self.snapshot = current
+        return changed
+
+    def _diff(self, current):
+        return {
+            path
+            for path in current.keys() | self.snapshot.keys()
+            if current.get(path) != self.snapshot.get(path)
+        }
+
+
+class _WarmUFO:
+    """A UFO kept open, and updated from the files which change on disk."""
+
+    def __init__(self, path, ufo_module=None):
+        self.path = path
+        self.ufo_module = ufo_module
+        self.files = _SourceFiles([path])
+        self.font = openFont(path, ufo_module=ufo_module)
+        # the names of the glyphs read again by the last refresh, keyed by
+        # layer name
+        self.changedGlyphs = {}
+
+    def hasChanges(self):
+        return bool(self.files.changed())
+
+    def refresh(self):
+        """Read the files which changed again.
+
+        Return the changed file paths, relative to the UFO, and a set of
+        the kinds of changes: "glyphs", "features", "groups", "kerning",
+        "lib" or "font" when the font had to be reopened. The names of the
+        glyphs which changed are kept in `changedGlyphs`.
+        """
+        self.changedGlyphs = {}
+        relPaths = sorted(
+            os.path.relpath(path, self.path).replace(os.sep, "/")
+            for path in self.files.update()
+        )
+        if not relPaths:
+            return relPaths, set()
+
+        kinds = set()
+        glyphFiles = {}
+        for relPath in relPaths:
+            dirName, _, fileName = relPath.rpartition("/")
+            if relPath in _FONT_FILES:
+                kinds.add(_FONT_FILES[relPath])
+            elif (
+                dirName.startswith("glyphs")
+                and "/" not in dirName
+                and (fileName.endswith(".glif") or fileName == "contents.plist")
+            ):
+                glyphFiles.setdefault(dirName, set()).add(fileName)
+            else:
+                # e.g. fontinfo.plist, layercontents.plist, images or data
+                self.font = openFont(self.path, ufo_module=self.ufo_module)
+                return relPaths, {"font"}
+
+        from fontTools.ufoLib import UFOReader
+
+        reader = UFOReader(self.path, validate=False)
+        if "kerning" in kinds:
+            self.font.kerning.clear()
+            self.font.kerning.update(reader.readKerning())
+        if "groups" in kinds:
+            self.font.groups.clear()
+            self.font.groups.update(reader.readGroups())
+        if "features" in kinds:
+            self.font.features.text = reader.readFeatures()
+        if "lib" in kinds:
+            self.font.lib.clear()
+            self.font.lib.update(reader.readLib())
+        if glyphFiles:
+            if not self._reloadGlyphs(reader, glyphFiles):
+                self.font = openFont(self.path, ufo_module=self.ufo_module)
+                return relPaths, {"font"}
+            kinds.add("glyphs")
+        return relPaths, kinds
+
+    def _reloadGlyphs(self, reader, glyphFiles):
+        # defcon updates the glyph order when glyphs are added or removed, but
+        # it should stay as it is in lib.plist
+        glyphOrder = self.font.lib.get(_GLYPH_ORDER_KEY)
+        if glyphOrder is not None:
+            glyphOrder = list(glyphOrder)
+        try:
+            return self._readGlyphs(reader, glyphFiles)
+        finally:
+            if glyphOrder is not None:
+                self.font.lib[_GLYPH_ORDER_KEY] = glyphOrder
+            elif _GLYPH_ORDER_KEY in self.font.lib:
+                del self.font.lib[_GLYPH_ORDER_KEY]
+
+    def _readGlyphs(self, reader, glyphFiles):
+        glyphSets = {}
+        for layerName in reader.getLayerNames():
+            glyphSet = reader.getGlyphSet(layerName, validateRead=False)
+            glyphSets[glyphSet.dirName] = (layerName, glyphSet)
+        for dirName, fileNames in glyphFiles.items():
+            if dirName not in glyphSets:
+                return False
+            layerName, glyphSet = glyphSets[dirName]
+            layer = self.font.layers[layerName]
+            glyphNames = {
+                glyphName
+                for glyphName, fileName in glyphSet.contents.items()
+                if fileName in fileNames
+            }
+            if "contents.plist" in fileNames:
+                # glyphs were added or removed
+                glyphNames.update(set(layer.keys()) ^ glyphSet.contents.keys())
+            self.changedGlyphs.setdefault(layerName, set()).update(glyphNames)
+            for glyphName in glyphNames:
+                if glyphName in layer:
+                    del layer[glyphName]
+                if glyphName in glyphSet.contents:
+                    glyph = layer.newGlyph(glyphName)
+                    glyphSet.readGlyph(glyphName, glyph, glyph.getPointPen())
+        return True
+
+
+class _WarmDesignSpace:
+    """A designspace whose source UFOs are kept open."""
+
+    def __init__(self, path, ufo_module=None):
+        self.path = path
+        self.ufo_module = ufo_module
+        self._open()
+
+    def _open(self):
+        self.files = _SourceFiles([self.path])
+        self.doc = DesignSpaceDocument.fromfile(self.path)
+        self.ufos = {}
+        for source in self.doc.sources:
+            if source.path not in self.ufos:
+                self.ufos[source.path] = _WarmUFO(source.path, self.ufo_module)
+            source.font = self.ufos[source.path].font
+
+    def hasChanges(self):
+        return bool(self.files.changed()) or any(
+            ufo.hasChanges() for ufo in self.ufos.values()
+        )
+
+    def refresh(self):
+        """Like _WarmUFO.refresh, for the designspace and all its sources;
+        the paths are relative to the designspace's directory."""
+        root = os.path.dirname(self.path)
+        if self.files.update():
+            self._open()
+            return [os.path.basename(self.path)], {"font"}
+        relPaths = []
+        kinds = set()
+        for ufo in self.ufos.values():
+            ufoRelPath = os.path.relpath(ufo.path, root).replace(os.sep, "/")
+            paths, ufoKinds = ufo.refresh()
+            relPaths.extend(f"{ufoRelPath}/{path}" for path in paths)
+            kinds.update(ufoKinds)
+        for source in self.doc.sources:
+            source.font = self.ufos[source.path].font
+        return relPaths, kinds
+
+
+class _Project:
+    """A font built by the server, with the state kept between builds."""
+
+    def __init__(self, inputPath, formatName, outputDir, options, ufo_module=None):
+        self.inputPath = inputPath
+        self.formatName = formatName
+        self.outputDir = outputDir
+        self.options = options
+        self.ufo_module = ufo_module
+        self.sources = None
+        self.outputs = None
+        # the callables sending the notifications of watched builds
+        self.watchers = []
+        # the compiler of the last build of a UFO's outlines, with the glyph
+        # set, the saved TTFont it compiled before building the features and
+        # the rest of its IncrementalState
+        self._compiler = None
+        self._glyphSet = None
+        self._outlines = None
+        self._outlinesState = None
+
+    def hasChanges(self):
+        return self.sources is not None and self.sources.hasChanges()
+
+    def build(self):
+        start = time.perf_counter()
+        if self.sources is None:
+            if _inputKind(self.inputPath) == "ufo":
+                self.sources = _WarmUFO(self.inputPath, self.ufo_module)
+            else:
+                self.sources = _WarmDesignSpace(self.inputPath, self.ufo_module)
+            changes, kinds = [], {"font"}
+        else:
+            changes, kinds = self.sources.refresh()
+
+        rebuilt = None
+        if self.outputs is None or kinds:
+            try:
+                rebuilt = self._compile(kinds)
+            except BaseException:
+                # start from scratch next time
+                self.outputs = self._compiler = self._glyphSet = None
+                self._outlines = self._outlinesState = None
+                raise
+        return {
+            "input": self.inputPath,
+            "format": self.formatName,
+            "outputs": self.outputs,
+            "rebuilt": rebuilt,
+            "changes": changes,
+            "time": time.perf_counter() - start,
+        }
+
+    def _compile(self, kinds):
+        if self.formatName in _UFO_COMPILERS:
+            rebuilt, result = self._compileUFO(kinds)
+        else:
+            rebuilt = "full"
+            compileFuncName = FORMATS[self.formatName][0]
+            compileFunc = getattr(ufo2ft, compileFuncName)
+            result = compileFunc(self.sources.doc, **self.options)
+
+        os.makedirs(self.outputDir, exist_ok=True)
+        outputs = []
+        for outputPath, font in _outputPaths(
+            self.inputPath, self.formatName, result, self.outputDir
+        ):
+            logger.info("Saving %s", outputPath)
+            font.save(outputPath)
+            outputs.append(outputPath)
+        self.outputs = outputs
+        return rebuilt
+
+    def _compileUFO(self, kinds):
+        # Like BaseCompiler.compile, but keeping what's needed to only build
+        # the features, or the modified glyphs, again.
+        ufo = self.sources.font
+        if (
+            self._outlines is not None
+            and kinds <= _FEATURE_CHANGES
+            # filters may modify the features, e.g. DottedCircleFilter
+            and ("features" not in kinds or FILTERS_KEY not in ufo.lib)
+        ):
+            compiler = self._compiler
+            glyphSet = self._glyphSet
+            font = TTFont(BytesIO(self._outlines), cfg=compiler.ftConfig)
+            rebuilt = "features"
+        else:
+            compilerClass = getattr(ufo2ft, _UFO_COMPILERS[self.formatName])
+            compiler = compilerClass(**self.options)
+            glyphSet = self._preprocess(compiler, ufo, kinds)
+            previousState = None
+            rebuilt = "full"
+            if self._outlines is not None and kinds <= _GLYPH_CHANGES:
+                previousState = IncrementalState(
+                    TTFont(BytesIO(self._outlines), cfg=compiler.ftConfig),
+                    *self._outlinesState,
+                )
+                rebuilt = "glyphs"
+            outlineCompiler = compiler.makeOutlineCompiler(
+                ufo, glyphSet, previousState=previousState
+            )
+            font = outlineCompiler.compile()
+            _, *outlinesState = outlineCompiler.getIncrementalState()
+            stream = BytesIO()
+            font.save(stream)
+            self._compiler = compiler
+            self._glyphSet = glyphSet
+            self._outlines = stream.getvalue()
+            self._outlinesState = outlinesState
+
+        if compiler.layerName is None and not compiler.skipFeatureCompilation:
+            compiler.compileFeatures(ufo, font, glyphSet=glyphSet)
+        font = compiler.postprocess(font, ufo, glyphSet)
+        return rebuilt, font
+
+    def _preprocess(self, compiler, ufo, kinds):
+        # Preprocess only the modified glyphs and the composite glyphs using
+        # them, on top of the glyph set of the previous build, when the
+        # filters only read the glyphs they filter and their components: not
+        # with custom filters, or with color layers, whose glyphs are added
+        # to the glyph set by ExplodeColorLayerGlyphsFilter.
+        previous = self._glyphSet
+        if (
+            previous is None
+            or not kinds <= _GLYPH_CHANGES
+            or FILTERS_KEY in ufo.lib
+            or COLOR_PALETTES_KEY in ufo.lib
+            or self.options.get("filters")
+        ):
+            return compiler.preprocess(ufo)
+        layer = (
+            ufo.layers[compiler.layerName]
+            if compiler.layerName is not None
+            else ufo.layers.defaultLayer
+        )
+        changedGlyphs = self.sources.changedGlyphs
+        modified = changedGlyphs.get(layer.name, set())
+        # glyphs added or removed, or in other layers, change more than the
+        # glyphs themselves
+        if changedGlyphs.keys() - {layer.name} or not all(
+            name in layer and name in previous for name in modified
+        ):
+            return compiler.preprocess(ufo)
+
+        glyphNames = set()
+        usedBy = makeComponentIndex([layer])
+        stack = list(modified)
+        while stack:
+            glyphName = stack.pop()
+            if glyphName not in glyphNames:
+                glyphNames.add(glyphName)
+                stack.extend(usedBy.get(glyphName, ()))
+        processed = compiler.preprocess(ufo, glyphNames=glyphNames)
+        glyphSet = _GlyphSet(previous)
+        glyphSet.lib = processed.lib
+        glyphSet.name = processed.name
+        for glyphName in glyphNames:
+            if glyphName in processed:
+                glyphSet[glyphName] = processed[glyphName]
+        return glyphSet
+
+
+class BuildServer:
+    """Builds fonts on request, keeping their sources open between builds.
+
+    The methods can be called directly, or via `handle` with the requests
+    of the JSON protocol described in the module's docstring. Builds are
+    serialized: only one runs at a time.
+
+    The UFOs are opened with `ufo_module` (defcon or ufoLib2, by default
+    whichever is installed, see ufo2ft.util.openFont).
+    """
+
+    def __init__(self, pollInterval=1.0, ufo_module=None):
+        self.pollInterval = pollInterval
+        self.ufo_module = ufo_module
+        # (input path, format, output dir, options) -> _Project
+        self.projects = {}
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._watcher = None
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def start(self):
+        """Start polling the sources of the watched fonts in the background."""
+        if self._watcher is None:
+            self._watcher = threading.Thread(
+                target=self._watch, name="ufo2ft-build-server-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def _watch(self):
+        while not self._stopped.wait(self.pollInterval):
+            self.poll()
+
+    def wait(self, timeout=None):
+        """Wait for the server to be shut down."""
+        return self._stopped.wait(timeout)
+
+    def build(
+        self, inputPath, formatName=None, outputDir=None, options=None, watch=None
+    ):
+        """Build the font, reusing the results of the previous builds.
+
+        If `watch` is a callable, it is sent the notifications of the builds
+        made when the sources change (see `poll`).
+        """
+        inputPath = os.path.abspath(inputPath)
+        kind = _inputKind(inputPath)
+        if formatName is None:
+            formatName = DEFAULT_FORMATS[kind][0]
+        if formatName not in FORMATS:
+            raise ValueError(f"unknown format: {formatName!r}")
+        if FORMATS[formatName][1] != kind:
+            raise ValueError(
+                f"format {formatName!r} requires a {FORMATS[formatName][1]} input"
+            )
+        options = dict(options or {})
+        if options.get("inplace"):
+            raise ValueError("the build server can't compile fonts in place")
+        if outputDir is None:
+            outputDir = os.path.dirname(inputPath)
+        outputDir = os.path.abspath(outputDir)
+
+        key = (inputPath, formatName, outputDir, json.dumps(options, sort_keys=True))
+        with self._lock:
+            project = self.projects.get(key)
+            if project is None:
+                project = _Project(
+                    inputPath, formatName, outputDir, options, self.ufo_module
+                )
+                self.projects[key] = project
+            if watch is not None and watch not in project.watchers:
+                project.watchers.append(watch)
+            return project.build()
+
+    def poll(self):
+        """Rebuild the watched fonts whose sources changed, and send a
+        'rebuilt' or 'buildFailed' notification to their watchers."""
+        with self._lock:
+            projects = [p for p in self.projects.values() if p.watchers]
+        for project in projects:
+            with self._lock:
+                if not project.watchers or not project.hasChanges():
+                    continue
+                try:
+                    message = {"method": "rebuilt", "params": project.build()}
+                except Exception as e:
+                    logger.debug("Build of %s failed", project.inputPath, exc_info=True)
+                    message = {
+                        "method": "buildFailed",
+                        "params": {
+                            "input": project.inputPath,
+                            "format": project.formatName,
+                            "error": _errorInfo(e),
+                        },
+                    }
+                watchers = list(project.watchers)
+            for send in watchers:
+                try:
+                    send(message)
+                except (OSError, ValueError):
+                    # the client went away
+                    self.unwatch(send)
+
+    def unwatch(self, send):
+        """Stop sending notifications to the given callable."""
+        with self._lock:
+            for project in self.projects.values():
+                if send in project.watchers:
+                    project.watchers.remove(send)
+
+    def forget(self, inputPath):
+        """Close the fonts built from the given input, and return how many
+        builds were forgotten."""
+        inputPath = os.path.abspath(inputPath)
+        with self._lock:
+            keys = [key for key in self.projects if key[0] == inputPath]
+            for key in keys:
+                del self.projects[key]
+        return len(keys)
+
+    def status(self):
+        with self._lock:
+            return [
+                {
+                    "input": project.inputPath,
+                    "format": project.formatName,
+                    "outputDir": project.outputDir,
+                    "options": project.options,
+                    "outputs": project.outputs,
+                    "watched": bool(project.watchers),
+                }
+                for project in self.projects.values()
+            ]
+
+    def shutdown(self):
+        self._stopped.set()
+
+    def handle(self, message, send=None):
+        """Handle a decoded JSON request, and return the response.
+
+        `send` is the callable sending messages to the client, used for the
+        notifications of watched builds.
+        """
+        if not isinstance(message, dict):
+            return {"id": None, "error": _errorInfo(ValueError("invalid request"))}
+        requestId = message.get("id")
+        try:
+            result = self._dispatch(
+                message.get("method"), message.get("params") or {}, send
+            )
+        except Exception as e:
+            logger.debug("Request %r failed", requestId, exc_info=True)
+            return {"id": requestId, "error": _errorInfo(e)}
+        return {"id": requestId, "result": result}
+
+    def _dispatch(self, method, params, send):
+        if method == "build":
+            return self.build(
+                params["input"],
+                params.get("format"),
+                params.get("outputDir"),
+                params.get("options"),
+                watch=send if params.get("watch") else None,
+            )
+        elif method == "forget":
+            return {"forgotten": self.forget(params["input"])}
+        elif method == "status":
+            return {"projects": self.status()}
+        elif method == "shutdown":
+            self.shutdown()
+            return None
+        raise ValueError(f"unknown method: {method!r}")
+
+
+def _errorInfo(exception):
+    if isinstance(exception, KeyError):
+        message = f"missing parameter: {exception.args[0]}"
+    else:
+        message = str(exception)
+    return {"type": type(exception).__name__, "message": message}
+
+
+def serveStream(server, inStream, outStream):
+    """Handle the requests read from a text stream until it's closed or the
+    server is shut down, writing the responses to the other stream."""
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            outStream.write(json.dumps(message) + "\n")
+            outStream.flush()
+
+    try:
+        for line in inStream:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError as e:
+                send({"id": None, "error": _errorInfo(e)})
+                continue
+            send(server.handle(message, send))
+            if server.stopped:
+                break
+    finally:
+        server.unwatch(send)
+
+
+def serveSocket(server, path):
+    """Handle the requests of the clients connecting to a Unix socket at the
+    given path, until the server is shut down."""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            serveStream(
+                server,
+                TextIOWrapper(self.rfile, encoding="utf-8"),
+                TextIOWrapper(self.wfile, encoding="utf-8", write_through=True),
+            )
+
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        # left over by a server that didn't exit cleanly
+        os.remove(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as socketServer:
+        socketServer.daemon_threads = True
+        thread = threading.Thread(target=socketServer.serve_forever, daemon=True)
+        thread.start()
+        try:
+            server.wait()
+        finally:
+            socketServer.shutdown()
+            thread.join()
+            os.remove(path)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ufo2ft.buildServer",
+        description="Serve font build requests, keeping the sources open.",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="listen on a Unix socket instead of the standard input and output",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="how often to check the sources of the watched fonts (default: 1)",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(args)
+
+    if args.socket and not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        parser.error("Unix sockets are not supported on this platform")
+    # the standard output may be used for the responses
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(levelname)s: %(message)s",
+        stream=sys.stderr,
+    )
+
+    server = BuildServer(pollInterval=args.poll_interval)
+    server.start()
+    try:
+        if args.socket:
+            serveSocket(server, args.socket)
+        else:
+            serveStream(server, sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,471 @@
+"""Compact, array-backed glyph objects for the compile pipeline.
+
+A ``CompactGlyph`` holds the same data the compilers need from a defcon or
+ufoLib2 glyph (contours, components, anchors, metrics, unicodes and lib), but
+stores the contour points as flat arrays instead of one Python object per
+point, and drops the guidelines, image, note and notification machinery.
+
+Glyphs are read and written through the point and segment pen protocols, so
+filters and outline compilers can work on them like on any other glyph.
+"""
+
+from __future__ import annotations
+
+from array import array
+from copy import deepcopy
+
+from fontTools.misc.transform import Transform
+from fontTools.pens.pointPen import PointToSegmentPen, SegmentToPointPen
+
+__all__ = ["CompactGlyph", "CompactContour", "CompactComponent", "CompactAnchor"]
+
+# Each point has a type code: the low bits hold the segment type, the others
+# flag smooth points, and which of the coordinates were floats rather than ints
+# (the arrays store doubles, but we want to give back exactly what we got).
+_SEGMENT_TYPES = (None, "move", "line", "curve", "qcurve")
+_SEGMENT_CODES = {t: i for i, t in enumerate(_SEGMENT_TYPES)}
+_SEGMENT_MASK = 0x07
+_FLOAT_Y = 0x20
+_FLOAT_X = 0x40
+_SMOOTH = 0x80
+
+
+class CompactPoint:
+    """A read-only view of a contour point."""
+
+    __slots__ = ("x", "y", "segmentType", "smooth", "name", "identifier")
+
+    def __init__(
+        self, x, y, segmentType=None, smooth=False, name=None, identifier=None
+    ):
+        self.x = x
+        self.y = y
+        self.segmentType = segmentType
+        self.smooth = smooth
+        self.name = name
+        self.identifier = identifier
+
+    def __repr__(self):
+        return "<{} ({}, {}) {!r}{}>".format(
+            type(self).__name__,
+            self.x,
+            self.y,
+            self.segmentType,
+            " smooth" if self.smooth else "",
+        )
+
+
+class _PointData:
+    """Flat storage for the points of one or more contours."""
+
+    __slots__ = ("coordinates", "types", "ends", "pointInfo", "contourIds")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # x, y pairs of all the points, one after the other
+        self.coordinates = array("d")
+        # one type code per point
+        self.types = bytearray()
+        # index of the point after the last point of each contour
+        self.ends = array("L")
+        # optional {pointIndex: (name, identifier)}, only for points that have any
+        self.pointInfo = None
+        # optional {contourIndex: identifier}
+        self.contourIds = None
+
+    def __len__(self):
+        return len(self.ends)
+
+    def contourRange(self, index):
+        start = self.ends[index - 1] if index > 0 else 0
+        return start, self.ends[index]
+
+    def appendPoint(self, pt, segmentType, smooth, name, identifier):
+        if name is not None or identifier is not None:
+            if self.pointInfo is None:
+                self.pointInfo = {}
+            self.pointInfo[len(self.types)] = (name, identifier)
+        x, y = pt
+        code = _SEGMENT_CODES[segmentType]
+        if smooth:
+            code |= _SMOOTH
+        if not isinstance(x, int):
+            code |= _FLOAT_X
+        if not isinstance(y, int):
+            code |= _FLOAT_Y
+        self.coordinates.append(x)
+        self.coordinates.append(y)
+        self.types.append(code)
+
+    def point(self, i):
+        code = self.types[i]
+        x = self.coordinates[2 * i]
+        y = self.coordinates[2 * i + 1]
+        if not code & _FLOAT_X:
+            x = int(x)
+        if not code & _FLOAT_Y:
+            y = int(y)
+        return (x, y), _SEGMENT_TYPES[code & _SEGMENT_MASK], bool(code & _SMOOTH)
+
+    def endContour(self, identifier=None):
+        if identifier is not None:
+            if self.contourIds is None:
+                self.contourIds = {}
+            self.contourIds[len(self.ends)] = identifier
+        self.ends.append(len(self.types))
+
+    def drawContourPoints(self, index, pointPen):
+        start, end = self.contourRange(index)
+        identifier = self.contourIds.get(index) if self.contourIds else None
+        if identifier is not None:
+            pointPen.beginPath(identifier=identifier)
+        else:
+            pointPen.beginPath()
+        # same as self.point(i), inlined as it's called for every point drawn
+        coordinates = self.coordinates
+        types = self.types
+        pointInfo = self.pointInfo or {}
+        for i in range(start, end):
+            code = types[i]
+            x = coordinates[2 * i]
+            y = coordinates[2 * i + 1]
+            if not code & _FLOAT_X:
+                x = int(x)
+            if not code & _FLOAT_Y:
+                y = int(y)
+            segmentType = _SEGMENT_TYPES[code & _SEGMENT_MASK]
+            smooth = bool(code & _SMOOTH)
+            info = pointInfo.get(i)
+            if info is None:
+                pointPen.addPoint((x, y), segmentType=segmentType, smooth=smooth)
+                continue
+            kwargs = {}
+            name, identifier = info
+            if name is not None:
+                kwargs["name"] = name
+            if identifier is not None:
+                kwargs["identifier"] = identifier
+            pointPen.addPoint((x, y), segmentType=segmentType, smooth=smooth, **kwargs)
+        pointPen.endPath()
+
+    def iterContourPoints(self, index):
+        start, end = self.contourRange(index)
+        pointInfo = self.pointInfo or {}
+        for i in range(start, end):
+            (x, y), segmentType, smooth = self.point(i)
+            name, identifier = pointInfo.get(i, (None, None))
+            yield CompactPoint(x, y, segmentType, smooth, name, identifier)
+
+
+class CompactContour:
+    """A single contour, detached from the glyph it was read from.
+
+    Contours are returned by iterating over a CompactGlyph; they keep their own
+    copy of the points, so they stay valid after the glyph's contours are
+    cleared (e.g. when a filter redraws them).
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data=None):
+        self._data = data if data is not None else _PointData()
+
+    @property
+    def identifier(self):
+        return self._data.contourIds.get(0) if self._data.contourIds else None
+
+    def __len__(self):
+        start, end = self._data.contourRange(0)
+        return end - start
+
+    def __iter__(self):
+        return self._data.iterContourPoints(0)
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def drawPoints(self, pointPen):
+        self._data.drawContourPoints(0, pointPen)
+
+    def draw(self, pen):
+        self.drawPoints(PointToSegmentPen(pen))
+
+
+class CompactComponent:
+    __slots__ = ("baseGlyph", "transformation", "identifier")
+
+    def __init__(self, baseGlyph, transformation=(1, 0, 0, 1, 0, 0), identifier=None):
+        self.baseGlyph = baseGlyph
+        self.transformation = Transform(*transformation)
+        self.identifier = identifier
+
+    def __repr__(self):
+        return "<{} {!r} {}>".format(
+            type(self).__name__, self.baseGlyph, self.transformation
+        )
+
+    def drawPoints(self, pointPen):
+        if self.identifier is not None:
+            pointPen.addComponent(
+                self.baseGlyph, self.transformation, identifier=self.identifier
+            )
+        else:
+            pointPen.addComponent(self.baseGlyph, self.transformation)
+
+    def draw(self, pen):
+        pen.addComponent(self.baseGlyph, self.transformation)
+
+
+class CompactAnchor:
+    """An anchor that, like defcon's and ufoLib2's, can be converted to a dict."""
+
+    __slots__ = ("name", "x", "y", "color", "identifier")
+
+    _keys = ("x", "y", "name", "color", "identifier")
+
+    def __init__(self, x=0, y=0, name=None, color=None, identifier=None):
+        self.x = x
+        self.y = y
+        self.name = name
+        self.color = color
+        self.identifier = identifier
+
+    @classmethod
+    def fromAnchor(cls, anchor):
+        if isinstance(anchor, dict):
+            return cls(**{k: anchor.get(k) for k in cls._keys})
+        return cls(
+            anchor.x,
+            anchor.y,
+            anchor.name,
+            getattr(anchor, "color", None),
+            getattr(anchor, "identifier", None),
+        )
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name!r} ({self.x}, {self.y})>"
+
+    def keys(self):
+        return [k for k in self._keys if getattr(self, k) is not None]
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+
+class _CompactPointPen:
+    """Point pen appending contours to a _PointData, and components to a list
+    (or ignoring them if it's None)."""
+
+    def __init__(self, points, components=None):
+        self._points = points
+        self._components = components
+        self._contourId = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._contourId = identifier
+
+    def addPoint(
+        self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs
+    ):
+        self._points.appendPoint(pt, segmentType, smooth, name, identifier)
+
+    def endPath(self):
+        self._points.endContour(self._contourId)
+        self._contourId = None
+
+    def addComponent(self, baseGlyph, transformation, identifier=None, **kwargs):
+        if self._components is not None:
+            self._components.append(
+                CompactComponent(baseGlyph, transformation, identifier)
+            )
+
+
+class CompactGlyph:
+    """A glyph storing its outlines as flat arrays.
+
+    ``len(glyph)`` is the number of contours, and iterating over the glyph yields
+    detached CompactContour objects. Glyphs are modified through the pens
+    returned by ``getPointPen`` and ``getPen``, and methods like
+    ``clearContours``, ``clearComponents`` and ``appendAnchor``; the points of
+    existing contours can't be changed in place.
+    """
+
+    __slots__ = (
+        "name",
+        "width",
+        "height",
+        "_unicodes",
+        "lib",
+        "_points",
+        "components",
+        "_anchors",
+    )
+
+    # attributes of defcon/ufoLib2 glyphs that we don't keep, but that some
+    # consumers (e.g. fontMath.MathGlyph) expect to exist
+    guidelines = ()
+    image = None
+    note = None
+
+    def __init__(self, name=None, width=0, height=0, unicodes=None, lib=None):
+        self.name = name
+        self.width = width
+        self.height = height
+        self._unicodes = list(unicodes) if unicodes else []
+        self.lib = lib if lib is not None else {}
+        self._points = _PointData()
+        self.components = []
+        self._anchors = []
+
+    @classmethod
+    def fromGlyph(cls, glyph):
+        """Return a CompactGlyph with a copy of the data from a defcon or ufoLib2
+        glyph (or any other glyph object supporting the point pen protocol).
+        """
+        self = cls(
+            glyph.name,
+            glyph.width,
+            glyph.height,
+            glyph.unicodes,
+            deepcopy(glyph.lib),
+        )
+        self.anchors = glyph.anchors
+        glyph.drawPoints(self.getPointPen())
+        return self
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name!r}>"
+
+    # unicodes
+
+    @property
+    def unicodes(self):
+        return self._unicodes
+
+    @unicodes.setter
+    def unicodes(self, value):
+        self._unicodes = list(value) if value else []
+
+    @property
+    def unicode(self):
+        return self._unicodes[0] if self._unicodes else None
+
+    @unicode.setter
+    def unicode(self, value):
+        if value is None:
+            self._unicodes = []
+        elif self._unicodes:
+            if value in self._unicodes:
+                self._unicodes.remove(value)
+            self._unicodes.insert(0, value)
+        else:
+            self._unicodes = [value]
+
+    @property
+    def verticalOrigin(self):
+        return self.lib.get("public.verticalOrigin")
+
+    # contours
+
+    def __len__(self):
+        return len(self._points)
+
+    def __iter__(self):
+        for i in range(len(self._points)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        points = self._points
+        if index < 0:
+            index += len(points)
+        if not 0 <= index < len(points):
+            raise IndexError(index)
+        data = _PointData()
+        points.drawContourPoints(index, _CompactPointPen(data))
+        return CompactContour(data)
+
+    def clearContours(self):
+        self._points.clear()
+
+    def appendContour(self, contour):
+        pen = self.getPointPen()
+        contour.drawPoints(pen)
+
+    # components
+
+    def clearComponents(self):
+        self.components.clear()
+
+    def removeComponent(self, component):
+        self.components.remove(component)
+
+    # anchors
+
+    @property
+    def anchors(self):
+        return self._anchors
+
+    @anchors.setter
+    def anchors(self, value):
+        self._anchors = [CompactAnchor.fromAnchor(a) for a in value]
+
+    def appendAnchor(self, anchor, *args):
+        # defcon and ufoLib2 take an anchor dict or object; ufoLib2 also
+        # takes (name, (x, y))
+        if args:
+            x, y = args[0]
+            anchor = CompactAnchor(x, y, anchor)
+        self._anchors.append(CompactAnchor.fromAnchor(anchor))
+
+    def clearAnchors(self):
+        self._anchors.clear()
+
+    # pens
+
+    def getPointPen(self):
+        return _CompactPointPen(self._points, self.components)
+
+    def getPen(self):
+        return SegmentToPointPen(self.getPointPen())
+
+    def drawPoints(self, pointPen):
+        points = self._points
+        for i in range(len(points)):
+            points.drawContourPoints(i, pointPen)
+        for component in self.components:
+            component.drawPoints(pointPen)
+
+    def draw(self, pen):
+        self.drawPoints(PointToSegmentPen(pen))
+
+
+class _LazyCompactGlyph(CompactGlyph):
+    """A CompactGlyph read from a GLIF file, which can drop its outlines and
+    read them again when they are needed."""
+
+    __slots__ = ("_glifReader", "_pointData")
+
+    def __init__(self, name, glifReader):
+        self._glifReader = glifReader
+        super().__init__(name)
+        glifReader.readGlyph(name, self, self.getPointPen())
+
+    @property
+    def _points(self):
+        if self._pointData is None:
+            points = _PointData()
+            self._glifReader.readGlyph(self.name, pointPen=_CompactPointPen(points))
+            self._pointData = points
+        return self._pointData
+
+    @_points.setter
+    def _points(self, value):
+        self._pointData = value
+
+    def releaseOutlines(self):
+        """Drop the contours, to be read again from the GLIF file if needed."""
+        self._pointData = None
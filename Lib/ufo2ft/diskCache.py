@@ -0,0 +1,261 @@
+"""A size-bounded cache of binary data on disk, shared between builds.
+
+The cache is content-addressed: the keys are digests of everything the values
+are computed from, so an entry never needs to be invalidated, it is only
+evicted when it hasn't been used for a while. The entries are grouped in
+namespaces, one for each kind of value (e.g. compiled TrueType glyphs).
+
+The entries are stored in a SQLite database in the cache directory, which can
+be shared by concurrent builds, in threads or processes. When the total size
+of the values exceeds ``maxSize``, the least recently used entries are evicted.
+
+>>> from ufo2ft import compileTTF
+>>> from ufo2ft.diskCache import DiskCache
+>>> cache = DiskCache("~/.cache/ufo2ft", maxSize=512 * 1024**2)
+>>> ttf = compileTTF(ufo, cache=cache)  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["DiskCache", "DEFAULT_MAX_SIZE"]
+
+DEFAULT_MAX_SIZE = 1024**3
+
+# the number of keys looked up or touched in each SQL statement, below the
+# limit of bound parameters of old versions of SQLite
+_BATCH_SIZE = 500
+
+
+class DiskCache:
+    """A cache of binary values keyed by bytes, in the ``path`` directory.
+
+    The cache never raises errors: if the database can't be opened or
+    written to (e.g. the disk is full), it logs a warning and behaves as if
+    it were empty.
+    """
+
+    fileName = "ufo2ft-cache.sqlite"
+    # seconds to wait for the database to be unlocked by other builds
+    timeout = 60.0
+    # the entries used more recently than this many seconds ago aren't marked
+    # as used again: the successive builds of a font reuse the same entries,
+    # and updating them all takes longer than reading them
+    touchInterval = 3600.0
+
+    def __init__(self, path, maxSize=DEFAULT_MAX_SIZE):
+        self.path = os.path.expanduser(os.fspath(path))
+        self.maxSize = maxSize
+        self._connection = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, maxSize={self.maxSize})"
+
+    def __getstate__(self):
+        # caches can be sent to worker processes, which open their own
+        # connection to the database
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_connection"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(self.path, exist_ok=True)
+            connection = sqlite3.connect(
+                os.path.join(self.path, self.fileName),
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            try:
+                # must be set before the table is created to have any effect
+                connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                self._enableWAL(connection)
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    " namespace TEXT NOT NULL,"
+                    " key BLOB NOT NULL,"
+                    " value BLOB NOT NULL,"
+                    " size INTEGER NOT NULL,"
+                    " lastUsed REAL NOT NULL,"
+                    " PRIMARY KEY (namespace, key)"
+                    ") WITHOUT ROWID"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS entriesLastUsed ON entries (lastUsed)"
+                )
+            except BaseException:
+                connection.close()
+                raise
+            self._connection = connection
+        return self._connection
+
+    def _enableWAL(self, connection):
+        # Switching the journal mode doesn't wait for the other connections
+        # that are creating the database at the same time, so retry until it
+        # succeeds or the timeout expires; once the database is in WAL mode,
+        # this is a no-op.
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                connection.execute("PRAGMA journal_mode = WAL")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or time.monotonic() > deadline:
+                    raise
+            time.sleep(0.01)
+
+    def _run(self, func, default):
+        # call func with the database connection, unless the cache is unusable
+        with self._lock:
+            if self._disabled:
+                return default
+            try:
+                return func(self._connect())
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Disabling the cache in %s: %s", self.path, e)
+                self._disabled = True
+                return default
+
+    def getMany(self, namespace: str, keys: Iterable[bytes]) -> dict[bytes, bytes]:
+        """Return the values found in the cache for the given keys, keyed by
+        key; the missing keys are left out."""
+        keys = list(keys)
+
+        def getMany(connection):
+            result = {}
+            stale = []
+            staleTime = time.time() - self.touchInterval
+            for i in range(0, len(keys), _BATCH_SIZE):
+                batch = keys[i : i + _BATCH_SIZE]
+                for key, value, lastUsed in connection.execute(
+                    "SELECT key, value, lastUsed FROM entries WHERE namespace = ? "
+                    f"AND key IN ({', '.join('?' * len(batch))})",
+                    (namespace, *batch),
+                ):
+                    result[key] = value
+                    if lastUsed <= staleTime:
+                        stale.append(key)
+            if stale:
+                self._touch(connection, namespace, stale)
+            return result
+
+        if not keys:
+            return {}
+        return self._run(getMany, {})
+
+    def get(self, namespace: str, key: bytes) -> bytes | None:
+        """Return the value for the key, or None if it's not in the cache."""
+        return self.getMany(namespace, [key]).get(key)
+
+    def putMany(self, namespace: str, items: Iterable[tuple[bytes, bytes]]) -> None:
+        """Store (key, value) items in the cache, then evict the least recently
+        used entries if it got too big."""
+        now = time.time()
+        rows = [(namespace, key, value, len(value), now) for key, value in items]
+
+        def putMany(connection):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows
+                )
+                evicted = self._evict(connection)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            if evicted:
+                connection.execute("PRAGMA incremental_vacuum")
+
+        if rows:
+            self._run(putMany, None)
+
+    def put(self, namespace: str, key: bytes, value: bytes) -> None:
+        """Store the value for the key in the cache."""
+        self.putMany(namespace, [(key, value)])
+
+    def _touch(self, connection, namespace, keys):
+        # mark the entries as used, so they are evicted last
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for i in range(0, len(keys), _BATCH_SIZE):
+                batch = keys[i : i + _BATCH_SIZE]
+                connection.execute(
+                    "UPDATE entries SET lastUsed = ? WHERE namespace = ? "
+                    f"AND key IN ({', '.join('?' * len(batch))})",
+                    (now, namespace, *batch),
+                )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _evict(self, connection):
+        # delete the least recently used entries until the cache fits in
+        # 90% of its maximum size, so that it isn't full again after the
+        # next build; return the number of entries evicted
+        (totalSize,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if totalSize <= self.maxSize:
+            return 0
+        excess = totalSize - int(self.maxSize * 0.9)
+        evicted = []
+        cursor = connection.execute(
+            "SELECT namespace, key, size FROM entries ORDER BY lastUsed"
+        )
+        for namespace, key, size in cursor:
+            evicted.append((namespace, key))
+            excess -= size
+            if excess <= 0:
+                break
+        cursor.close()
+        connection.executemany(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?", evicted
+        )
+        logger.debug("Evicted %d entries from the cache in %s", len(evicted), self.path)
+        return len(evicted)
+
+    def size(self) -> int:
+        """Return the total size of the values in the cache, in bytes."""
+
+        def size(connection):
+            (totalSize,) = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            return totalSize
+
+        return self._run(size, 0)
+
+    def clear(self) -> None:
+        """Remove all the entries from the cache."""
+
+        def clear(connection):
+            connection.execute("DELETE FROM entries")
+            connection.execute("PRAGMA incremental_vacuum")
+
+        self._run(clear, None)
+
+    def close(self) -> None:
+        """Close the database; it is opened again if the cache is used."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -16,6 +16,7 @@ from fontTools.feaLib.lexer import IncludingLexer, Lexer
 from fontTools.feaLib.parser import Parser
 from fontTools.misc.loggingTools import Timer
 
+from ufo2ft.buildReport import reportSpan
 from ufo2ft.constants import MTI_FEATURES_PREFIX
 from ufo2ft.featureWriters import (
     CursFeatureWriter,
@@ -347,7 +348,8 @@ class FeatureCompiler(BaseFeatureCompiler):
                 path = self.ufo.path
                 for writer in self.featureWriters:
                     try:
-                        writer.write(self.ufo, featureFile, compiler=self)
+                        with reportSpan(type(writer).__name__, "featureWriter"):
+                            writer.write(self.ufo, featureFile, compiler=self)
                     except FeatureLibError:
                         if path is None:
                             self._write_temporary_feature_file(featureFile.asFea())
@@ -380,7 +382,7 @@ class FeatureCompiler(BaseFeatureCompiler):
         # if we generated some automatic features, includes have already been
         # resolved, and we work from a string which does't exist on disk
         path = self.ufo.path if not self.featureWriters else None
-        with timer("build OpenType features"):
+        with timer("build OpenType features"), reportSpan("feaLib", "features"):
             try:
                 addOpenTypeFeaturesFromString(self.ttFont, self.features, filename=path)
             except FeatureLibError:
@@ -414,7 +416,8 @@ class MtiFeatureCompiler(BaseFeatureCompiler):
 
     def buildTables(self):
         for tag, features in self.mtiFeatures.items():
-            table = mtiLib.build(features.splitlines(), self.ttFont)
+            with reportSpan("mtiLib", "features", table=tag):
+                table = mtiLib.build(features.splitlines(), self.ttFont)
             assert table.tableTag == tag
             self.ttFont[tag] = table
 
@@ -307,6 +307,12 @@ class BaseFeatureWriter:
         if compiler is not None:
             return compiler.glyphSet
 
+        # without a compiler, the subset glyphSet is only made once per call
+        # to `write`, however many times the writer asks for it
+        orderedGlyphSet = getattr(self.context, "orderedGlyphSet", None)
+        if orderedGlyphSet is not None:
+            return orderedGlyphSet
+
         from ufo2ft.util import _GlyphSet, makeOfficialGlyphOrder
 
         font = self.context.font
@@ -316,7 +322,10 @@ class BaseFeatureWriter:
             skipExportGlyphs=set(font.lib.get("public.skipExportGlyphs", [])),
         )
         glyphOrder = makeOfficialGlyphOrder(glyphSet, font.glyphOrder)
-        return OrderedDict((gn, glyphSet[gn]) for gn in glyphOrder)
+        self.context.orderedGlyphSet = OrderedDict(
+            (gn, glyphSet[gn]) for gn in glyphOrder
+        )
+        return self.context.orderedGlyphSet
 
     def compileGSUB(self):
         """Compile a temporary GSUB table from the current feature file."""
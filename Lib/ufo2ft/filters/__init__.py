@@ -6,21 +6,28 @@ from ufo2ft.constants import FILTERS_KEY
 from ufo2ft.util import _loadPluginFromString
 
 from .base import BaseFilter, BaseIFilter
-from .cubicToQuadratic import CubicToQuadraticFilter
-from .decomposeComponents import DecomposeComponentsFilter, DecomposeComponentsIFilter
-from .decomposeTransformedComponents import (
-    DecomposeTransformedComponentsFilter,
-    DecomposeTransformedComponentsIFilter,
-)
-from .dottedCircle import DottedCircleFilter
-from .explodeColorLayerGlyphs import ExplodeColorLayerGlyphsFilter
-from .flattenComponents import FlattenComponentsFilter, FlattenComponentsIFilter
-from .propagateAnchors import PropagateAnchorsFilter, PropagateAnchorsIFilter
-from .removeOverlaps import RemoveOverlapsFilter
-from .reverseContourDirection import ReverseContourDirectionFilter
-from .skipExportGlyphs import SkipExportGlyphsFilter, SkipExportGlyphsIFilter
-from .sortContours import SortContoursFilter
-from .transformations import TransformationsFilter
+
+# The built-in filters are imported on first access, as some of them depend on
+# modules which are slow to import (e.g. the feature compiler).
+_FILTER_MODULES = {
+    "CubicToQuadraticFilter": "cubicToQuadratic",
+    "DecomposeComponentsFilter": "decomposeComponents",
+    "DecomposeComponentsIFilter": "decomposeComponents",
+    "DecomposeTransformedComponentsFilter": "decomposeTransformedComponents",
+    "DecomposeTransformedComponentsIFilter": "decomposeTransformedComponents",
+    "DottedCircleFilter": "dottedCircle",
+    "ExplodeColorLayerGlyphsFilter": "explodeColorLayerGlyphs",
+    "FlattenComponentsFilter": "flattenComponents",
+    "FlattenComponentsIFilter": "flattenComponents",
+    "PropagateAnchorsFilter": "propagateAnchors",
+    "PropagateAnchorsIFilter": "propagateAnchors",
+    "RemoveOverlapsFilter": "removeOverlaps",
+    "ReverseContourDirectionFilter": "reverseContourDirection",
+    "SkipExportGlyphsFilter": "skipExportGlyphs",
+    "SkipExportGlyphsIFilter": "skipExportGlyphs",
+    "SortContoursFilter": "sortContours",
+    "TransformationsFilter": "transformations",
+}
 
 __all__ = [
     "BaseFilter",
@@ -50,6 +57,17 @@ __all__ = [
 logger = logging.getLogger(__name__)
 
 
+def __getattr__(name):
+    if name in _FILTER_MODULES:
+        module = importlib.import_module(f"{__name__}.{_FILTER_MODULES[name]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_FILTER_MODULES))
+
+
 def getFilterClass(filterName, pkg="ufo2ft.filters"):
     """Given a filter name, import and return the filter class.
     By default, filter modules are searched within the ``ufo2ft.filters``
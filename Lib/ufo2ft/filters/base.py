@@ -2,15 +2,19 @@ from __future__ import annotations
 
 import logging
 import sys
+from contextlib import nullcontext
+from time import perf_counter, process_time
 from types import SimpleNamespace
 from typing import TYPE_CHECKING, FrozenSet, Tuple
 
 from fontTools.misc.loggingTools import Timer
 
+from ufo2ft.buildReport import reportSpan
 from ufo2ft.util import (
     _getNewGlyphFactory,
     _GlyphSet,
     _LazyFontName,
+    _readOnlyGlyphSet,
     getMaxComponentDepth,
     zip_strict,
 )
@@ -166,10 +170,20 @@ class BaseFilter:
         and initializes an empty set that keeps track of the names of the
         glyphs that were modified.
 
+        Subclasses which know in advance which glyphs they may modify can set
+        `glyphNames` to the set of their names, so that only those glyphs are
+        passed to `filter`; the default None means all the glyphs.
+
+        While a glyph is passed to `filter`, `glyphName` is the name under
+        which it is stored in the glyph set; this can differ from the glyph's
+        own name, e.g. for the glyphs copied from the color layers.
+
         Returns the namespace instance.
         """
         self.context = SimpleNamespace(font=font, glyphSet=glyphSet)
         self.context.modified = set()
+        self.context.glyphNames = None
+        self.context.glyphName = None
         proto = font.layers.defaultLayer.instantiateGlyphObject()
         self.context.glyphFactory = _getNewGlyphFactory(proto)
         return self.context
@@ -181,60 +195,54 @@ class BaseFilter:
         """
         raise NotImplementedError
 
+    def getMutableGlyph(self, glyph):
+        """Return a version of `glyph` from the current glyph set that can be
+        modified in place.
+
+        Filters that set `_copyOnWrite = True` must call this before changing
+        a glyph. When running on a copy-on-write glyph set, this makes a
+        private copy of the glyph the first time it's requested; otherwise the
+        glyph is returned as is.
+        """
+        glyphSet = self.context.glyphSet
+        # glyphs shared with the source layer are always stored under their own
+        # name; any other glyph object is already private to the glyph set
+        if _readOnlyGlyphSet(glyphSet).get(glyph.name) is glyph:
+            return glyphSet[glyph.name]
+        return glyph
+
+    def finish(self):
+        """Subclasses can perform here custom code after the filter was run on
+        all the glyphs, e.g. log a summary of the changes, using the context
+        set by `set_context`.
+        """
+        pass
+
     @property
     def name(self):
         return self.__class__.__name__
 
+    # Filters which only modify the glyphs they obtain from `getMutableGlyph`
+    # can set this to True, so that the (possibly shared) glyph objects of a
+    # copy-on-write glyph set are passed to `filter` without copying them first.
+    _copyOnWrite = False
+
+    # Filters whose `set_context` doesn't look at the glyphs, and whose `filter`
+    # only reads and modifies the glyph it is passed, can set this to True, so
+    # that the preprocessors run them in the same pass over the glyph set as
+    # the filters before them (see `runFilters`).
+    _fusable = False
+
     def __call__(self, font, glyphSet=None):
         """Run this filter on all the included glyphs.
         Return the set of glyph names that were modified, if any.
 
         If `glyphSet` (dict) argument is provided, run the filter on
-        the glyphs contained therein (which may be copies).
+        the glyphs contained therein (which may be copies, or copy-on-write).
         Otherwise, run the filter in-place on the font's default
         glyph set.
         """
-        fontName = _LazyFontName(font)
-        if glyphSet is not None and getattr(glyphSet, "name", None):
-            logger.info("Running %s on %s-%s", self.name, fontName, glyphSet.name)
-        else:
-            logger.info("Running %s on %s", self.name, fontName)
-
-        if glyphSet is None:
-            glyphSet = _GlyphSet.from_layer(font)
-
-        context = self.set_context(font, glyphSet)
-
-        filter_ = self.filter
-        include = self.include
-        modified = context.modified
-
-        # process composite glyphs in decreasing component depth order (i.e. composites
-        # with more deeply nested components before shallower ones) to avoid
-        # order-dependent interferences while filtering glyphs with nested components
-        # https://github.com/googlefonts/ufo2ft/issues/621
-        orderedGlyphs = sorted(
-            glyphSet.keys(), key=lambda g: -getMaxComponentDepth(glyphSet[g], glyphSet)
-        )
-
-        with Timer() as t:
-            for glyphName in orderedGlyphs:
-                if glyphName in modified:
-                    continue
-                glyph = glyphSet[glyphName]
-                if include(glyph) and filter_(glyph):
-                    modified.add(glyphName)
-
-        num = len(modified)
-        if num > 0:
-            timing_logger.debug(
-                "Took %.3fs to run %s on %d glyph%s",
-                t,
-                self.name,
-                len(modified),
-                "" if num == 1 else "s",
-            )
-        return modified
+        return runFilters([self], font, glyphSet)[0]
 
     @classmethod
     def getInterpolatableFilterClass(cls) -> BaseIFilter | None:
@@ -254,6 +262,143 @@ class BaseFilter:
         return getattr(module, ifilter_name, None)
 
 
+def runFilters(filters, font, glyphSet=None):
+    """Run the filters on all their included glyphs, in a single pass over the
+    glyph set: each glyph goes through all the filters in turn.
+
+    Return the set of glyph names modified by each filter.
+
+    This gives the same result as running the filters one after the other
+    only if all but the first are fusable (see `BaseFilter._fusable`), and
+    none overrides `BaseFilter.__call__`.
+
+    When a BuildReport is collected, the span of the pass has a child span for
+    each of the filters, with the time spent in their steps of the pass.
+    """
+    fontName = _LazyFontName(font)
+    for filter_ in filters:
+        if glyphSet is not None and getattr(glyphSet, "name", None):
+            logger.info("Running %s on %s-%s", filter_.name, fontName, glyphSet.name)
+        else:
+            logger.info("Running %s on %s", filter_.name, fontName)
+
+    if glyphSet is None:
+        glyphSet = _GlyphSet.from_layer(font)
+
+    name = "+".join(filter_.name for filter_ in filters)
+    fused = len(filters) > 1
+    with reportSpan(name, "filter") as span:
+        # when fusing filters, record a span for each of them, to which the
+        # time spent in its steps of the single pass is added
+        contexts = []
+        stepSpans = []
+        for filter_ in filters:
+            stepReport = reportSpan(filter_.name, "filter") if fused else nullcontext()
+            with stepReport as stepSpan:
+                contexts.append(filter_.set_context(font, glyphSet))
+            stepSpans.append(stepSpan)
+
+        # process composite glyphs in decreasing component depth order (i.e.
+        # composites with more deeply nested components before shallower ones)
+        # to avoid order-dependent interferences while filtering glyphs with
+        # nested components: https://github.com/googlefonts/ufo2ft/issues/621
+        readOnlyGlyphs = _readOnlyGlyphSet(glyphSet)
+        glyphNames = readOnlyGlyphs.keys()
+        restricted = [getattr(context, "glyphNames", None) for context in contexts]
+        if all(names is not None for names in restricted):
+            glyphNames = [
+                glyphName
+                for glyphName in set().union(*restricted)
+                if glyphName in readOnlyGlyphs
+            ]
+        orderedGlyphs = sorted(
+            glyphNames,
+            key=lambda g: -getMaxComponentDepth(readOnlyGlyphs[g], readOnlyGlyphs),
+        )
+        # each filter only gets the glyphs it's restricted to, if any, even
+        # when the pass goes through all of them for the other filters
+        steps = [
+            (
+                filter_.filter,
+                filter_.include,
+                names,
+                context,
+                context.modified,
+                readOnlyGlyphs if filter_._copyOnWrite else glyphSet,
+            )
+            for filter_, context, names in zip(filters, contexts, restricted)
+        ]
+
+        with Timer() as t:
+            if span is None:
+                _runSteps(steps, orderedGlyphs)
+            elif fused:
+                span.glyphTimes = None
+                _runTimedSteps(steps, orderedGlyphs, stepSpans)
+            else:
+                _runSteps(steps, orderedGlyphs, span.glyphTimes)
+        allModified = set().union(*(context.modified for context in contexts))
+        if span is not None:
+            span.glyphs = len(allModified)
+
+        for filter_, stepSpan, context in zip(filters, stepSpans, contexts):
+            if stepSpan is None:
+                filter_.finish()
+                continue
+            wallStart, cpuStart = perf_counter(), process_time()
+            filter_.finish()
+            stepSpan.wallTime += perf_counter() - wallStart
+            stepSpan.cpuTime += process_time() - cpuStart
+            stepSpan.glyphs = len(context.modified)
+
+    num = len(allModified)
+    if num > 0:
+        timing_logger.debug(
+            "Took %.3fs to run %s on %d glyph%s",
+            t,
+            name,
+            num,
+            "" if num == 1 else "s",
+        )
+    return [context.modified for context in contexts]
+
+
+def _runSteps(steps, glyphNames, glyphTimes=None):
+    for glyphName in glyphNames:
+        if glyphTimes is not None:
+            start = perf_counter()
+        for filter_, include, names, context, modified, glyphs in steps:
+            if glyphName in modified or (names is not None and glyphName not in names):
+                continue
+            context.glyphName = glyphName
+            glyph = glyphs[glyphName]
+            if include(glyph) and filter_(glyph):
+                modified.add(glyphName)
+        if glyphTimes is not None:
+            glyphTimes[glyphName] = perf_counter() - start
+
+
+def _runTimedSteps(steps, glyphNames, spans):
+    # like _runSteps, adding the time spent in each step to the span of its
+    # filter, and recording the glyph times per filter if they are profiled
+    for glyphName in glyphNames:
+        for (filter_, include, names, context, modified, glyphs), span in zip(
+            steps, spans
+        ):
+            if glyphName in modified or (names is not None and glyphName not in names):
+                continue
+            context.glyphName = glyphName
+            wallStart, cpuStart = perf_counter(), process_time()
+            glyph = glyphs[glyphName]
+            if include(glyph) and filter_(glyph):
+                modified.add(glyphName)
+            elapsed = perf_counter() - wallStart
+            span.wallTime += elapsed
+            span.cpuTime += process_time() - cpuStart
+            if span.glyphTimes is not None:
+                span.glyphTimes[glyphName] = elapsed
+
+
 HashableLocation: TypeAlias = FrozenSet[Tuple[str, float]]
 
 
@@ -279,6 +424,9 @@ class BaseIFilter(BaseFilter):
         and optional instantiator and initializes an empty set that keeps track
         of the names of the glyphs that were modified.
 
+        Like in `BaseFilter.set_context`, subclasses can set `glyphNames` to
+        only filter the glyphs with those names.
+
         Any extra keyword arguments are passed to the context namespace.
 
         Returns the namespace instance.
@@ -291,6 +439,7 @@ class BaseIFilter(BaseFilter):
             **kwargs,
         )
         self.context.modified = set()
+        self.context.glyphNames = None
         # this is used to memoize locationsFromComponentGlyphs method below, to avoid
         # redoing the same work over and over again (especially when font has loads of
         # masters and many nested components).
@@ -332,37 +481,51 @@ class BaseIFilter(BaseFilter):
         if glyphSets is None:
             glyphSets = [_GlyphSet.from_layer(font) for font in fonts]
 
-        context = self.set_context(fonts, glyphSets, instantiator, **kwargs)
-
-        filter_ = self.filter
-        include = self.include
-        modified = context.modified
-
-        # process composite glyphs in decreasing component depth order (i.e. composites
-        # with more deeply nested components before shallower ones) to avoid
-        # order-dependent interferences while filtering glyphs with nested components
-        # https://github.com/googlefonts/ufo2ft/issues/621
-        allGlyphNames = set.union(*(set(glyphSet.keys()) for glyphSet in glyphSets))
-
-        def comp_depth(g):
-            for glyphSet in glyphSets:
-                if g in glyphSet:
-                    return -getMaxComponentDepth(glyphSet[g], glyphSet)
-            raise AssertionError
-
-        orderedGlyphs = sorted(allGlyphNames, key=comp_depth)
-
-        with Timer() as t:
-            for glyphName in orderedGlyphs:
-                if glyphName in modified:
-                    continue
-                glyphs = [
-                    glyphSet[glyphName]
-                    for glyphSet in glyphSets
-                    if glyphName in glyphSet
-                ]
-                if any(include(g) for g in glyphs) and filter_(glyphName, glyphs):
-                    modified.add(glyphName)
+        with reportSpan(self.name, "filter") as span:
+            context = self.set_context(fonts, glyphSets, instantiator, **kwargs)
+
+            filter_ = self.filter
+            include = self.include
+            modified = context.modified
+
+            # process composite glyphs in decreasing component depth order (i.e.
+            # composites with more deeply nested components before shallower ones)
+            # to avoid order-dependent interferences while filtering glyphs with
+            # nested components: https://github.com/googlefonts/ufo2ft/issues/621
+            allGlyphNames = set.union(*(set(glyphSet.keys()) for glyphSet in glyphSets))
+            if getattr(context, "glyphNames", None) is not None:
+                allGlyphNames &= context.glyphNames
+
+            readOnlyGlyphSets = [_readOnlyGlyphSet(glyphSet) for glyphSet in glyphSets]
+
+            def comp_depth(g):
+                for glyphSet in readOnlyGlyphSets:
+                    if g in glyphSet:
+                        return -getMaxComponentDepth(glyphSet[g], glyphSet)
+                raise AssertionError
+
+            orderedGlyphs = sorted(allGlyphNames, key=comp_depth)
+            if self._copyOnWrite:
+                glyphSets = readOnlyGlyphSets
+
+            glyphTimes = span.glyphTimes if span is not None else None
+            with Timer() as t:
+                for glyphName in orderedGlyphs:
+                    if glyphName in modified:
+                        continue
+                    if glyphTimes is not None:
+                        start = perf_counter()
+                    glyphs = [
+                        glyphSet[glyphName]
+                        for glyphSet in glyphSets
+                        if glyphName in glyphSet
+                    ]
+                    if any(include(g) for g in glyphs) and filter_(glyphName, glyphs):
+                        modified.add(glyphName)
+                    if glyphTimes is not None:
+                        glyphTimes[glyphName] = perf_counter() - start
+            if span is not None:
+                span.glyphs = len(modified)
 
         num = len(modified)
         if num > 0:
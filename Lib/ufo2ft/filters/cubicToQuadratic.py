@@ -1,74 +1,386 @@
+import hashlib
+import json
 import logging
 
+import fontTools
 from fontTools.cu2qu.ufo import CURVE_TYPE_LIB_KEY, DEFAULT_MAX_ERR
 from fontTools.pens.cu2quPen import Cu2QuPointPen
 
+from ufo2ft.buildReport import reportSpan
 from ufo2ft.filters import BaseFilter
 from ufo2ft.fontInfoData import getAttrWithFallback
+from ufo2ft.util import _copyGlyph, _getContours, _readOnlyGlyphSet, _setContours
 
 logger = logging.getLogger(__name__)
 
 
+class Cu2QuCache:
+    """The contours converted to quadratic curves, stored in a
+    ufo2ft.diskCache.DiskCache.
+
+    The converted contours of a glyph are keyed by its contours in all the
+    masters, the maximum errors and the conversion options, along with the
+    spline length statistics of the conversion, so they can be reproduced
+    when the contours are loaded from the cache.
+    """
+
+    namespace = "cu2qu"
+    # changed when the converted contours of the same glyphs change
+    version = 1
+
+    def __init__(self, cache, reverseDirection, allQuadratic):
+        self.cache = cache
+        self.options = [self.version, fontTools.version, reverseDirection, allQuadratic]
+
+    def key(self, glyphs, maxErrors):
+        """Return the key of the glyph's converted contours, given the glyph
+        from each master and the maximum error for each."""
+        data = json.dumps(
+            [self.options, maxErrors, [_getContours(glyph) for glyph in glyphs]],
+            separators=(",", ":"),
+        )
+        return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+    def getMany(self, keys):
+        """Return the cached values of the given keys, keyed by key."""
+        return self.cache.getMany(self.namespace, keys)
+
+    def putMany(self, items):
+        """Store the (key, value) items returned by makeValue."""
+        self.cache.putMany(self.namespace, items)
+
+    @staticmethod
+    def makeValue(glyphs, stats):
+        """Return the value to cache for the converted glyphs, given the
+        spline length statistics of their conversion."""
+        data = json.dumps(
+            [list(stats.items()), [_getContours(glyph) for glyph in glyphs]],
+            separators=(",", ":"),
+        )
+        return data.encode("utf-8")
+
+    @staticmethod
+    def apply(value, glyphs, stats):
+        """Replace the contours of the (mutable) glyphs with the converted
+        contours of a cached value, and add its statistics to stats."""
+        glyphStats, contours = json.loads(value)
+        for glyph, glyphContours in zip(glyphs, contours):
+            _setContours(glyph, glyphContours)
+        for length, count in glyphStats:
+            stats[length] = stats.get(length, 0) + count
+
+
+# the minimum number of glyphs converted by each worker process, below which
+# starting the processes takes longer than converting the glyphs
+_MIN_GLYPHS_PER_WORKER = 32
+
+
+def _convertGlyphs(items, reverseDirection, allQuadratic):
+    # convert the glyphs in a worker process: items are (glyphName, contours,
+    # maxErrors) tuples, with the contours of the glyph in each master; return
+    # the (glyphName, contours, stats) of the modified glyphs, and the names of
+    # the incompatible glyphs
+    from fontTools.cu2qu.errors import IncompatibleGlyphsError
+    from fontTools.cu2qu.ufo import glyphs_to_quadratic
+
+    from ufo2ft.compactGlyph import CompactGlyph
+
+    results = []
+    incompatible = []
+    for glyphName, contours, maxErrors in items:
+        glyphs = []
+        for glyphContours in contours:
+            glyph = CompactGlyph(glyphName)
+            _setContours(glyph, glyphContours)
+            glyphs.append(glyph)
+        stats = {}
+        try:
+            if not glyphs_to_quadratic(
+                glyphs, maxErrors, reverseDirection, stats, allQuadratic
+            ):
+                continue
+        except IncompatibleGlyphsError:
+            incompatible.append(glyphName)
+            continue
+        results.append((glyphName, [_getContours(g) for g in glyphs], stats))
+    return results, incompatible
+
+
+def fontsToQuadratic(
+    glyphSets,
+    maxErrors,
+    reverseDirection,
+    allQuadratic,
+    cache=None,
+    rememberCurveType=False,
+    workers=1,
+):
+    """Convert the curves of the glyph sets of several masters to quadratic,
+    like fontTools.cu2qu.ufo.fonts_to_quadratic.
+
+    If a ``cache`` (ufo2ft.diskCache.DiskCache) is given, the converted contours
+    are stored in it, and those of the unchanged glyphs are loaded from it.
+
+    With more than one ``workers``, the glyphs are split between as many
+    processes, each converting all the masters of its glyphs.
+
+    Return the set of modified glyph names.
+    """
+    from fontTools.cu2qu.errors import IncompatibleGlyphsError
+    from fontTools.cu2qu.ufo import IncompatibleFontsError, glyphs_to_quadratic
+
+    if rememberCurveType:
+        curveTypes = {
+            glyphSet.lib.get(CURVE_TYPE_LIB_KEY, "cubic") for glyphSet in glyphSets
+        }
+        if len(curveTypes) == 1:
+            curveType = next(iter(curveTypes))
+            if curveType in ("quadratic", "mixed"):
+                logger.info("Curves already converted to quadratic")
+                return set()
+            elif curveType != "cubic":
+                raise NotImplementedError(curveType)
+        elif len(curveTypes) > 1:
+            # going to crash later if they do differ
+            logger.warning("fonts may contain different curve types")
+
+    glyphNames = sorted(set().union(*(glyphSet.keys() for glyphSet in glyphSets)))
+    masters = {}
+    for glyphName in glyphNames:
+        masters[glyphName] = (
+            [glyphSet[glyphName] for glyphSet in glyphSets if glyphName in glyphSet],
+            [
+                error
+                for glyphSet, error in zip(glyphSets, maxErrors)
+                if glyphName in glyphSet
+            ],
+        )
+
+    stats = {}
+    modified = set()
+    toConvert = glyphNames
+    cu2quCache = None
+    if cache is not None:
+        cu2quCache = Cu2QuCache(cache, reverseDirection, allQuadratic)
+        with reportSpan("loadCachedContours", "filter") as span:
+            keys = {
+                glyphName: cu2quCache.key(*masters[glyphName])
+                for glyphName in glyphNames
+            }
+            cachedValues = cu2quCache.getMany(keys.values())
+            if span is not None:
+                span.glyphs = len(cachedValues)
+        logger.info("Loaded %d converted glyphs from the cache", len(cachedValues))
+        toConvert = []
+        for glyphName in glyphNames:
+            value = cachedValues.get(keys[glyphName])
+            if value is not None:
+                Cu2QuCache.apply(value, masters[glyphName][0], stats)
+                modified.add(glyphName)
+            else:
+                toConvert.append(glyphName)
+
+    toCache = []
+    glyphErrors = {}
+
+    def converted(glyphName, glyphStats):
+        modified.add(glyphName)
+        if cu2quCache is not None:
+            glyphs = masters[glyphName][0]
+            value = Cu2QuCache.makeValue(glyphs, glyphStats)
+            toCache.append((keys[glyphName], value))
+        for length, count in glyphStats.items():
+            stats[length] = stats.get(length, 0) + count
+
+    chunkSize = max(_MIN_GLYPHS_PER_WORKER, -(-len(toConvert) // max(workers, 1)))
+    if workers > 1 and len(toConvert) > chunkSize:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunks = [
+            [
+                (
+                    glyphName,
+                    [_getContours(glyph) for glyph in masters[glyphName][0]],
+                    masters[glyphName][1],
+                )
+                for glyphName in toConvert[i : i + chunkSize]
+            ]
+            for i in range(0, len(toConvert), chunkSize)
+        ]
+        incompatible = []
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            futures = [
+                executor.submit(_convertGlyphs, chunk, reverseDirection, allQuadratic)
+                for chunk in chunks
+            ]
+            for future in futures:
+                results, chunkIncompatible = future.result()
+                for glyphName, contours, glyphStats in results:
+                    for glyph, glyphContours in zip(masters[glyphName][0], contours):
+                        _setContours(glyph, glyphContours)
+                    converted(glyphName, glyphStats)
+                incompatible.extend(chunkIncompatible)
+        # convert the incompatible glyphs again to get the errors about the
+        # actual glyphs
+        toConvert = incompatible
+
+    for glyphName in toConvert:
+        glyphs, errors = masters[glyphName]
+        glyphStats = {}
+        try:
+            # unmodified glyphs have no curves: converting them again is cheap
+            if not glyphs_to_quadratic(
+                glyphs, errors, reverseDirection, glyphStats, allQuadratic
+            ):
+                continue
+        except IncompatibleGlyphsError as exc:
+            logger.error(exc)
+            glyphErrors[glyphName] = exc
+            continue
+        converted(glyphName, glyphStats)
+    if cu2quCache is not None:
+        cu2quCache.putMany(toCache)
+
+    if glyphErrors:
+        raise IncompatibleFontsError(glyphErrors)
+    if modified:
+        logger.info(
+            "New spline lengths: %s"
+            % (", ".join("%s: %d" % (ln, stats[ln]) for ln in sorted(stats.keys())))
+        )
+
+    if rememberCurveType:
+        newCurveType = "quadratic" if allQuadratic else "mixed"
+        for glyphSet in glyphSets:
+            if glyphSet.lib.get(CURVE_TYPE_LIB_KEY, "cubic") != newCurveType:
+                glyphSet.lib[CURVE_TYPE_LIB_KEY] = newCurveType
+    return modified
+
+
 class CubicToQuadraticFilter(BaseFilter):
     _kwargs = {
         "conversionError": None,
         "reverseDirection": True,
         "rememberCurveType": False,
         "allQuadratic": True,
+        "cache": None,
     }
+    _copyOnWrite = True
+    _fusable = True
+
+    def start(self):
+        if self.options.cache is not None:
+            # the cached contours are looked up before running the filter
+            self._fusable = False
 
     def set_context(self, font, glyphSet):
         ctx = super().set_context(font, glyphSet)
 
-        relativeError = self.options.conversionError or DEFAULT_MAX_ERR
-        ctx.absoluteError = relativeError * getAttrWithFallback(font.info, "unitsPerEm")
-
-        ctx.stats = {}
-
-        return ctx
-
-    def __call__(self, font, glyphSet=None):
+        ctx.skip = False
         if self.options.rememberCurveType:
             # check first in the global font lib, then in layer lib
             for lib in (font.lib, getattr(glyphSet, "lib", {})):
                 curve_type = lib.get(CURVE_TYPE_LIB_KEY, "cubic")
                 if curve_type == "quadratic":
                     logger.info("Curves already converted to quadratic")
-                    return set()
+                    ctx.skip = True
+                    return ctx
                 elif curve_type == "cubic":
                     pass  # keep converting
                 else:
                     raise NotImplementedError(curve_type)
+            # 'lib' here is the layer's lib, as defined in for loop variable
+            ctx.lib = lib
 
-        modified = super().__call__(font, glyphSet)
-        if modified:
-            stats = self.context.stats
+        relativeError = self.options.conversionError or DEFAULT_MAX_ERR
+        ctx.absoluteError = relativeError * getAttrWithFallback(font.info, "unitsPerEm")
+
+        ctx.stats = {}
+
+        # with a DiskCache, the converted contours of all the glyphs are looked
+        # up at once; those converted by the filter are stored at the end
+        ctx.cu2quCache = ctx.cacheKeys = None
+        if self.options.cache is not None:
+            ctx.cu2quCache = Cu2QuCache(
+                self.options.cache,
+                self.options.reverseDirection,
+                self.options.allQuadratic,
+            )
+            with reportSpan("loadCachedContours", "filter") as span:
+                glyphs = _readOnlyGlyphSet(glyphSet)
+                maxErrors = [ctx.absoluteError]
+                ctx.cacheKeys = {
+                    name: ctx.cu2quCache.key([glyph], maxErrors)
+                    for name, glyph in glyphs.items()
+                    if len(glyph) and self.include(glyph)
+                }
+                ctx.cachedValues = ctx.cu2quCache.getMany(ctx.cacheKeys.values())
+                if span is not None:
+                    span.glyphs = len(ctx.cachedValues)
+            ctx.toCache = []
+
+        return ctx
+
+    def finish(self):
+        ctx = self.context
+        if ctx.skip:
+            return
+        if ctx.cu2quCache is not None:
+            logger.info(
+                "Loaded %d converted glyphs from the cache", len(ctx.cachedValues)
+            )
+            ctx.cu2quCache.putMany(ctx.toCache)
+        if ctx.modified:
+            stats = ctx.stats
             logger.info(
                 "New spline lengths: %s"
                 % (", ".join("%s: %d" % (ln, stats[ln]) for ln in sorted(stats.keys())))
             )
 
         if self.options.rememberCurveType:
-            # 'lib' here is the layer's lib, as defined in for loop variable
-            curve_type = lib.get(CURVE_TYPE_LIB_KEY, "cubic")
+            curve_type = ctx.lib.get(CURVE_TYPE_LIB_KEY, "cubic")
             if curve_type != "quadratic":
-                lib[CURVE_TYPE_LIB_KEY] = "quadratic"
-
-        return modified
+                ctx.lib[CURVE_TYPE_LIB_KEY] = "quadratic"
 
     def filter(self, glyph):
-        if not len(glyph):
+        ctx = self.context
+        if ctx.skip or not len(glyph):
             return False
 
+        key = None
+        if ctx.cacheKeys is not None:
+            # the glyphs are keyed by their name in the glyph set, which is not
+            # that of the glyphs copied from the color layers
+            glyphName = ctx.glyphName
+            key = ctx.cacheKeys.get(glyphName)
+            value = ctx.cachedValues.get(key)
+            if value is not None:
+                glyphSet = ctx.glyphSet
+                readOnly = _readOnlyGlyphSet(glyphSet)
+                if readOnly is not glyphSet and readOnly.get(glyphName) is glyph:
+                    # rather than copying the shared glyph's contours only to
+                    # replace them, copy the rest of it
+                    glyph = glyphSet[glyphName] = _copyGlyph(
+                        glyph, ctx.glyphFactory, contours=False
+                    )
+                Cu2QuCache.apply(value, [glyph], ctx.stats)
+                return True
+
+        glyph = self.getMutableGlyph(glyph)
+        stats = {} if key is not None else ctx.stats
         pen = Cu2QuPointPen(
             glyph.getPointPen(),
-            self.context.absoluteError,
+            ctx.absoluteError,
             reverse_direction=self.options.reverseDirection,
-            stats=self.context.stats,
+            stats=stats,
             all_quadratic=self.options.allQuadratic,
         )
         contours = list(glyph)
         glyph.clearContours()
         for contour in contours:
             contour.drawPoints(pen)
+        if key is not None:
+            ctx.toCache.append((key, Cu2QuCache.makeValue([glyph], stats)))
+            for length, count in stats.items():
+                ctx.stats[length] = ctx.stats.get(length, 0) + count
         return True
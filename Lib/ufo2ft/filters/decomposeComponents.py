@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from ufo2ft.filters import BaseFilter, BaseIFilter
-from ufo2ft.util import decomposeCompositeGlyph, zip_strict
+from ufo2ft.util import _FlattenedOutlines, decomposeCompositeGlyph, zip_strict
 
 if TYPE_CHECKING:
     from ufoLib2.objects import Glyph
@@ -15,16 +15,33 @@ class DecomposeComponentsFilter(BaseFilter):
     # the decomposed contours will be merged correctly:
     # https://github.com/googlefonts/gftools/pull/425
     _pre = True
+    _copyOnWrite = True
+
+    def set_context(self, font, glyphSet):
+        ctx = super().set_context(font, glyphSet)
+        # the base glyphs' outlines, flattened once for all their composites
+        ctx.outlines = _FlattenedOutlines(glyphSet)
+        return ctx
 
     def filter(self, glyph: Glyph) -> bool:
         if not glyph.components:
             return False
-        decomposeCompositeGlyph(glyph, self.context.glyphSet)
+        glyph = self.getMutableGlyph(glyph)
+        outlines = self.context.outlines
+        decomposeCompositeGlyph(glyph, self.context.glyphSet, outlines=outlines)
+        outlines.invalidate(glyph.name)
         return True
 
 
 class DecomposeComponentsIFilter(BaseIFilter):
     _pre = True
+    _copyOnWrite = True
+
+    def set_context(self, fonts, glyphSets, instantiator=None, **kwargs):
+        ctx = super().set_context(fonts, glyphSets, instantiator, **kwargs)
+        # the flattened outlines of each master, made when first needed
+        ctx.outlines = [None] * len(glyphSets)
+        return ctx
 
     def filter(self, glyphName: str, glyphs: list[Glyph]) -> bool:
         if not any(glyph.components for glyph in glyphs):
@@ -32,10 +49,16 @@ class DecomposeComponentsIFilter(BaseIFilter):
 
         self.ensureCompositeDefinedAtComponentLocations(glyphName)
 
-        for glyphSet, interpolatedLayer in zip_strict(
-            self.context.glyphSets, self.getInterpolatedLayers()
+        allOutlines = self.context.outlines
+        for i, (glyphSet, interpolatedLayer) in enumerate(
+            zip_strict(self.context.glyphSets, self.getInterpolatedLayers())
         ):
             glyph = glyphSet.get(glyphName)
             if glyph is not None:
-                decomposeCompositeGlyph(glyph, interpolatedLayer or glyphSet)
+                layer = interpolatedLayer or glyphSet
+                outlines = allOutlines[i]
+                if outlines is None:
+                    outlines = allOutlines[i] = _FlattenedOutlines(layer)
+                decomposeCompositeGlyph(glyph, layer, outlines=outlines)
+                outlines.invalidate(glyphName)
         return True
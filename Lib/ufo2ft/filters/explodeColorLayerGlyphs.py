@@ -1,6 +1,6 @@
 from ufo2ft.constants import COLOR_LAYER_MAPPING_KEY, COLOR_LAYERS_KEY
 from ufo2ft.filters import BaseFilter
-from ufo2ft.util import _GlyphSet
+from ufo2ft.util import _CopyOnWriteGlyphSet
 
 
 class ExplodeColorLayerGlyphsFilter(BaseFilter):
@@ -9,6 +9,8 @@ class ExplodeColorLayerGlyphsFilter(BaseFilter):
     in the COLR table.
     """
 
+    _copyOnWrite = True
+
     def set_context(self, font, glyphSet):
         context = super().set_context(font, glyphSet)
         context.globalColorLayerMapping = font.lib.get(COLOR_LAYER_MAPPING_KEY)
@@ -25,7 +27,9 @@ class ExplodeColorLayerGlyphsFilter(BaseFilter):
     def _getLayer(self, font, layerName):
         layer = self.context.layerGlyphSets.get(layerName)
         if layer is None:
-            layer = _GlyphSet.from_layer(font, layerName)
+            # the layer glyphs that we copy to the default layer get modified,
+            # so we must not share them with the source font
+            layer = _CopyOnWriteGlyphSet.from_layer(font, layerName)
             self.context.layerGlyphSets[layerName] = layer
         return layer
 
@@ -72,7 +76,7 @@ class ExplodeColorLayerGlyphsFilter(BaseFilter):
         for layerName, colorID in colorLayerMapping:
             layerGlyphSet = self._getLayer(font, layerName)
             if glyph.name in layerGlyphSet:
-                if glyph == layerGlyphSet[glyph.name]:
+                if glyph == layerGlyphSet.readOnly[glyph.name]:
                     layerGlyphName = glyph.name
                 else:
                     layerGlyphName = self._copyGlyph(
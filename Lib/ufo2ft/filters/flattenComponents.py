@@ -5,7 +5,7 @@ import logging
 from fontTools.misc.transform import Transform
 
 from ufo2ft.filters import BaseFilter, BaseIFilter
-from ufo2ft.util import zip_strict
+from ufo2ft.util import _readOnlyGlyphSet, zip_strict
 
 logger = logging.getLogger(__name__)
 
@@ -13,42 +13,71 @@ logger = logging.getLogger(__name__)
 class FlattenComponentsFilter(BaseFilter):
     """Replace nested components with their referents so that max depth is 1."""
 
+    _copyOnWrite = True
+
     def __call__(self, font, glyphSet=None):
         modified = super().__call__(font, glyphSet)
         if modified:
             logger.info("Flattened composite glyphs: %i" % len(modified))
         return modified
 
+    def set_context(self, font, glyphSet):
+        ctx = super().set_context(font, glyphSet)
+        # the flattened components of the composite glyphs used as components
+        ctx.flattened = {}
+        return ctx
+
     def filter(self, glyph):
-        return _flattenGlyphComponents(glyph, self.context.glyphSet)
+        glyphSet = _readOnlyGlyphSet(self.context.glyphSet)
+        if not any(
+            compo.baseGlyph not in glyphSet
+            or not _isSimpleOrMixed(glyphSet[compo.baseGlyph])
+            for compo in glyph.components
+        ):
+            return False
+        glyph = self.getMutableGlyph(glyph)
+        flattened = self.context.flattened
+        modified = _flattenGlyphComponents(glyph, glyphSet, flattened)
+        flattened.pop(glyph.name, None)
+        return modified
 
 
 class FlattenComponentsIFilter(BaseIFilter):
     """Interpolatable variant of FlattenComponentsFilter."""
 
+    _copyOnWrite = True
+
     def __call__(self, fonts, glyphSets=None, instantiator=None, **kwargs):
         modified = super().__call__(fonts, glyphSets, instantiator, **kwargs)
         if modified:
             logger.info("Flattened composite glyphs: %i" % len(modified))
         return modified
 
+    def set_context(self, fonts, glyphSets, instantiator=None, **kwargs):
+        ctx = super().set_context(fonts, glyphSets, instantiator, **kwargs)
+        ctx.flattened = [{} for _ in glyphSets]
+        return ctx
+
     def filter(self, glyphName: str, glyphs: list) -> bool:
         flattened = False
         if not any(glyph.components for glyph in glyphs):
             return flattened
 
-        defaultGlyphSet = self.getDefaultGlyphSet()
+        defaultGlyphSet = _readOnlyGlyphSet(self.getDefaultGlyphSet())
         if not any(_haveNestedComponents(g, defaultGlyphSet) for g in glyphs):
             return flattened
 
-        for glyphSet, interpolatedLayer in zip_strict(
-            self.context.glyphSets, self.getInterpolatedLayers()
+        for glyphSet, interpolatedLayer, memo in zip_strict(
+            self.context.glyphSets,
+            self.getInterpolatedLayers(),
+            self.context.flattened,
         ):
             glyph = glyphSet.get(glyphName)
             if glyph is not None:
                 flattened = _flattenGlyphComponents(
-                    glyph, interpolatedLayer or glyphSet
+                    glyph, _readOnlyGlyphSet(interpolatedLayer or glyphSet), memo
                 )
+                memo.pop(glyphName, None)
 
         return flattened
 
@@ -65,7 +94,7 @@ def _haveNestedComponents(glyph, glyphSet):
     )
 
 
-def _flattenGlyphComponents(glyph, glyphSet):
+def _flattenGlyphComponents(glyph, glyphSet, memo=None):
     flattened = False
     if not glyph.components:
         return flattened
@@ -73,7 +102,7 @@ def _flattenGlyphComponents(glyph, glyphSet):
     glyph.clearComponents()
     pen = glyph.getPointPen()
     for comp in components:
-        flattened_tuples = _flattenComponent(glyphSet, comp, found_in=glyph)
+        flattened_tuples = _flattenComponent(glyphSet, comp, found_in=glyph, memo=memo)
         if flattened_tuples[0] != (comp.baseGlyph, comp.transformation):
             flattened = True
         for flattened_tuple in flattened_tuples:
@@ -81,8 +110,13 @@ def _flattenGlyphComponents(glyph, glyphSet):
     return flattened
 
 
-def _flattenComponent(glyphSet, component, found_in):
-    """Returns a list of tuples (baseGlyph, transform) of nested component."""
+def _flattenComponent(glyphSet, component, found_in, memo=None):
+    """Returns a list of tuples (baseGlyph, transform) of nested component.
+
+    If a `memo` dict is given, the flattened components of each composite base
+    glyph are stored in it, so that they are only looked up once however many
+    glyphs use it; the entry of a base glyph must be removed when it changes.
+    """
     if component.baseGlyph not in glyphSet:
         raise ValueError(
             f"Could not find component '{component.baseGlyph}' used in '{found_in.name}'"
@@ -94,13 +128,22 @@ def _flattenComponent(glyphSet, component, found_in):
         transformation = Transform(*component.transformation)
         return [(component.baseGlyph, transformation)]
 
+    nested_components = memo.get(component.baseGlyph) if memo is not None else None
+    if nested_components is None:
+        nested_components = [
+            flattened_component
+            for nested in glyph.components
+            for flattened_component in _flattenComponent(
+                glyphSet, nested, found_in=glyph, memo=memo
+            )
+        ]
+        if memo is not None:
+            memo[component.baseGlyph] = nested_components
+
     all_flattened_components = []
-    for nested in glyph.components:
-        flattened_components = _flattenComponent(glyphSet, nested, found_in=glyph)
-        for i, (name, tr) in enumerate(flattened_components):
-            flat_tr = Transform(*component.transformation)
-            flat_tr = flat_tr.translate(tr.dx, tr.dy)
-            flat_tr = flat_tr.transform((tr.xx, tr.xy, tr.yx, tr.yy, 0, 0))
-            flattened_components[i] = (name, flat_tr)
-        all_flattened_components.extend(flattened_components)
+    for name, tr in nested_components:
+        flat_tr = Transform(*component.transformation)
+        flat_tr = flat_tr.translate(tr.dx, tr.dy)
+        flat_tr = flat_tr.transform((tr.xx, tr.xy, tr.yx, tr.yy, 0, 0))
+        all_flattened_components.append((name, flat_tr))
     return all_flattened_components
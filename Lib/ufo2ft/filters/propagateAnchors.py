@@ -19,6 +19,7 @@ import logging
 from collections import deque
 from dataclasses import dataclass
 from math import atan2, degrees, isinf
+from typing import NamedTuple
 
 from fontTools.misc.transform import Transform
 
@@ -28,7 +29,12 @@ from ufo2ft.constants import (
     OPENTYPE_CATEGORIES_KEY,
 )
 from ufo2ft.filters import BaseFilter, BaseIFilter
-from ufo2ft.util import OpenTypeCategories, _GlyphSet, zip_strict
+from ufo2ft.util import (
+    OpenTypeCategories,
+    _GlyphSet,
+    _readOnlyGlyphSet,
+    zip_strict,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -344,6 +350,66 @@ def anchors_traversing_components(
     return sorted(all_anchors.values(), key=lambda a: a.name)
 
 
+class _ComponentData(NamedTuple):
+    # the parts of a component used by anchors_traversing_components
+    baseGlyph: str
+    transformation: tuple
+
+
+# the minimum number of glyphs, summed over the masters, whose anchors each
+# worker process propagates, below which sending the glyphs to the processes
+# and back takes longer than propagating their anchors
+_MIN_GLYPHS_PER_WORKER = 10000
+
+
+def _master_items(glyphs):
+    """Return the (glyph name, anchors, components, component anchor map)
+    items of _propagate_master_anchors for the (glyph name, glyph) pairs of a
+    master, with the anchors and the components as plain tuples, which are
+    cheap to send to worker processes."""
+    return [
+        (
+            name,
+            [(a.name, a.x, a.y) for a in glyph.anchors],
+            [(c.baseGlyph, tuple(c.transformation)) for c in glyph.components],
+            _get_component_anchors(glyph),
+        )
+        for name, glyph in glyphs
+    ]
+
+
+def _propagate_master_anchors(items, marks, ligatures):
+    """Return the propagated anchors of the glyphs of one master, keyed by
+    glyph name.
+
+    The items are returned by _master_items, for the glyphs in dependency
+    order, as returned by _depth_sorted_glyphs.
+    """
+    done_anchors = {}
+    base_glyph_counts = {}
+    for name, existing, components, component_anchor_map in items:
+        done_anchors[name] = anchors_traversing_components(
+            name,
+            [AnchorData(*anchor) for anchor in existing],
+            [_ComponentData(*component) for component in components],
+            name in marks,
+            name in ligatures,
+            done_anchors,
+            base_glyph_counts,
+            component_anchor_map=component_anchor_map,
+        )
+    return done_anchors
+
+
+def _propagate_master_anchors_compact(items, marks, ligatures):
+    # run _propagate_master_anchors in a worker process, returning the anchors
+    # as plain (name, x, y) tuples
+    return {
+        name: [(a.name, a.x, a.y) for a in anchors]
+        for name, anchors in _propagate_master_anchors(items, marks, ligatures).items()
+    }
+
+
 def _compute_component_closure(glyph_set, root_names):
     """Given a set of included root glyph names, return the full closure
     including all transitive component dependencies."""
@@ -392,15 +458,20 @@ class _CombinedGlyph:
         return getattr(self._glyph, name)
 
 
+def _anchors_changed(glyph, new_anchors):
+    """Return True if `new_anchors` differ from the glyph's current anchors."""
+    old = [(a.name, round(a.x, 6), round(a.y, 6)) for a in glyph.anchors]
+    new = [(a.name, round(a.x, 6), round(a.y, 6)) for a in new_anchors]
+    return old != new
+
+
 def _write_anchors_to_glyph(glyph, new_anchors):
     """Write AnchorData list to a glyph, replacing existing anchors.
 
     Preserves existing anchor identifiers where names match.
     Returns True if the glyph was actually modified.
     """
-    old = [(a.name, round(a.x, 6), round(a.y, 6)) for a in glyph.anchors]
-    new = [(a.name, round(a.x, 6), round(a.y, 6)) for a in new_anchors]
-    if old == new:
+    if not _anchors_changed(glyph, new_anchors):
         return False
 
     old_by_name = {}
@@ -432,6 +503,9 @@ class PropagateAnchorsFilter(BaseFilter):
 
         if glyphSet is None:
             glyphSet = _GlyphSet.from_layer(font)
+        # only the glyphs whose anchors change are modified below, so read the
+        # others without triggering copy-on-write
+        glyphs = _readOnlyGlyphSet(glyphSet)
 
         categories = OpenTypeCategories.load(font)
         preliminary = None
@@ -439,15 +513,15 @@ class PropagateAnchorsFilter(BaseFilter):
             preliminary = font.lib.get(_PRELIMINARY_CATEGORIES_KEY)
             if preliminary:
                 categories = OpenTypeCategories.from_dict(preliminary)
-        marks, ligatures = _classify_glyphs(glyphSet, categories)
+        marks, ligatures = _classify_glyphs(glyphs, categories)
 
-        sorted_glyphs = _depth_sorted_glyphs(glyphSet)
+        sorted_glyphs = _depth_sorted_glyphs(glyphs)
 
         done_anchors = {}
         base_glyph_counts = {}
 
         for name in sorted_glyphs:
-            glyph = glyphSet[name]
+            glyph = glyphs[name]
             existing = _anchors_from_glyph(glyph)
             is_mark = name in marks
             is_ligature = name in ligatures
@@ -477,18 +551,19 @@ class PropagateAnchorsFilter(BaseFilter):
 
         # Determine which glyphs to write: included roots + component closure
         include = self.include
-        included_roots = {name for name in glyphSet if include(glyphSet[name])}
-        write_set = _compute_component_closure(glyphSet, included_roots)
+        included_roots = {name for name in glyphs if include(glyphs[name])}
+        write_set = _compute_component_closure(glyphs, included_roots)
 
         modified = set()
         for name in sorted_glyphs:
             if name not in write_set:
                 continue
-            glyph = glyphSet[name]
+            glyph = glyphs[name]
             if not glyph.components:
                 continue
             new_anchors = done_anchors[name]
-            if _write_anchors_to_glyph(glyph, new_anchors):
+            if _anchors_changed(glyph, new_anchors):
+                _write_anchors_to_glyph(glyphSet[name], new_anchors)
                 modified.add(name)
 
         if modified:
@@ -506,6 +581,7 @@ class PropagateAnchorsIFilter(BaseIFilter):
             glyphSets = [_GlyphSet.from_layer(font) for font in fonts]
 
         self.set_context(fonts, glyphSets, instantiator, **kwargs)
+        readOnlyGlyphSets = [_readOnlyGlyphSet(gs) for gs in glyphSets]
         ds_categories = kwargs.get("openTypeCategories")
         preliminary = kwargs.get("preliminaryOpenTypeCategories")
         if ds_categories:
@@ -518,7 +594,7 @@ class PropagateAnchorsIFilter(BaseIFilter):
         interpolated_layers = self.getInterpolatedLayers()
 
         # Classify using default font's glyphSet
-        default_gs = self.getDefaultGlyphSet()
+        default_gs = _readOnlyGlyphSet(self.getDefaultGlyphSet())
         marks, ligatures = _classify_glyphs(default_gs, categories)
 
         # Get union of all glyph names across masters
@@ -526,42 +602,52 @@ class PropagateAnchorsIFilter(BaseIFilter):
         for gs in glyphSets:
             all_glyph_names.update(gs.keys())
 
-        combined = _combined_glyph_set(glyphSets)
+        combined = _combined_glyph_set(readOnlyGlyphSets)
         sorted_glyphs = _depth_sorted_glyphs(combined)
 
-        # Per-master done_anchors and base_glyph_counts
-        per_master_done = [{} for _ in glyphSets]
-        per_master_counts = [{} for _ in glyphSets]
-
-        for name in sorted_glyphs:
-            is_mark = name in marks
-            is_ligature = name in ligatures
-
-            for i, (glyphSet, interpolatedLayer) in enumerate(
-                zip_strict(glyphSets, interpolated_layers)
-            ):
+        # The anchors of each master are propagated independently: read the
+        # glyphs of each master in the depth order, then propagate them in
+        # parallel processes if more than one job was requested, and there are
+        # enough glyphs for that to be faster.
+        per_master_items = []
+        for glyphSet, interpolatedLayer in zip_strict(
+            readOnlyGlyphSets, interpolated_layers
+        ):
+            glyphs = []
+            for name in sorted_glyphs:
                 if name in glyphSet:
-                    glyph = glyphSet[name]
+                    glyphs.append((name, glyphSet[name]))
                 elif interpolatedLayer is not None and name in interpolatedLayer:
-                    glyph = interpolatedLayer[name]
-                else:
-                    continue
-
-                existing = _anchors_from_glyph(glyph)
-                done = per_master_done[i]
-                counts = per_master_counts[i]
-
-                result = anchors_traversing_components(
-                    name,
-                    existing,
-                    glyph.components,
-                    is_mark,
-                    is_ligature,
-                    done,
-                    counts,
-                    component_anchor_map=_get_component_anchors(glyph),
-                )
-                done[name] = result
+                    glyphs.append((name, interpolatedLayer[name]))
+            per_master_items.append(_master_items(glyphs))
+
+        num_glyphs = sum(len(items) for items in per_master_items)
+        jobs = min(
+            getattr(self.context, "jobs", 1),
+            len(per_master_items),
+            num_glyphs // _MIN_GLYPHS_PER_WORKER,
+        )
+        if jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                per_master_done = [
+                    {
+                        name: [AnchorData(*anchor) for anchor in anchors]
+                        for name, anchors in done.items()
+                    }
+                    for done in executor.map(
+                        _propagate_master_anchors_compact,
+                        per_master_items,
+                        [marks] * len(per_master_items),
+                        [ligatures] * len(per_master_items),
+                    )
+                ]
+        else:
+            per_master_done = [
+                _propagate_master_anchors(items, marks, ligatures)
+                for items in per_master_items
+            ]
 
         # Finalize preliminary categories after propagation: prune anchorless
         # ligatures and infer bases from attaching anchors.  Write the result
@@ -586,7 +672,7 @@ class PropagateAnchorsIFilter(BaseIFilter):
         include = self.include
         included_roots = set()
         for name in all_glyph_names:
-            for gs in glyphSets:
+            for gs in readOnlyGlyphSets:
                 if name in gs and include(gs[name]):
                     included_roots.add(name)
                     break
@@ -596,16 +682,18 @@ class PropagateAnchorsIFilter(BaseIFilter):
         for name in sorted_glyphs:
             if name not in write_set:
                 continue
-            has_components = any(name in gs and gs[name].components for gs in glyphSets)
+            has_components = any(
+                name in gs and gs[name].components for gs in readOnlyGlyphSets
+            )
             if not has_components:
                 continue
 
-            for i, glyphSet in enumerate(glyphSets):
-                if name not in glyphSet:
+            for i, (glyphSet, glyphs) in enumerate(zip(glyphSets, readOnlyGlyphSets)):
+                if name not in glyphs:
                     continue
-                glyph = glyphSet[name]
                 new_anchors = per_master_done[i].get(name, [])
-                if _write_anchors_to_glyph(glyph, new_anchors):
+                if _anchors_changed(glyphs[name], new_anchors):
+                    _write_anchors_to_glyph(glyphSet[name], new_anchors)
                     modified.add(name)
 
         if modified:
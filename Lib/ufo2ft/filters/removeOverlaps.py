@@ -1,21 +1,260 @@
+import hashlib
+import importlib
+import json
 import logging
+import struct
 from enum import Enum
 
+from fontTools.pens.areaPen import AreaPen
+
+from ufo2ft.buildReport import reportSpan
 from ufo2ft.filters import BaseFilter
+from ufo2ft.util import _copyGlyph, _getContours, _readOnlyGlyphSet, _setContours
 
 logger = logging.getLogger(__name__)
 
 
+def _segments(points):
+    # split the points of a closed contour into (segmentType, points) tuples,
+    # the points going from an on-curve point to the next one; return None
+    # for open contours and contours with no on-curve point
+    onCurves = [i for i, point in enumerate(points) if point[2] is not None]
+    if not onCurves or points[0][2] == "move":
+        return None
+    first = onCurves[0]
+    segments = []
+    current = [tuple(points[first][:2])]
+    for x, y, segmentType, *_ in points[first + 1 :] + points[: first + 1]:
+        current.append((x, y))
+        if segmentType is not None:
+            segments.append((segmentType, current))
+            current = [(x, y)]
+    return segments
+
+
+def _area(segments):
+    pen = AreaPen()
+    pen.moveTo(segments[-1][1][-1])
+    for segmentType, points in segments:
+        if segmentType == "line":
+            pen.lineTo(points[-1])
+        elif segmentType == "curve":
+            pen.curveTo(*points[1:])
+        else:
+            pen.qCurveTo(*points[1:])
+    pen.closePath()
+    return pen.value
+
+
+def _bounds(points):
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _separated(a, b):
+    # whether the convex hulls of two sets of points are disjoint: look for a
+    # separating axis among the x and y axes and the normals of the edges
+    # between successive points (all the edges of the hull if the points are
+    # convex, otherwise the test may fail to find one, which is conservative)
+    axes = [(1, 0), (0, 1)]
+    for points in (a, b):
+        for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+            if (x0, y0) != (x1, y1):
+                axes.append((y0 - y1, x1 - x0))
+    for ax, ay in axes:
+        projA = [x * ax + y * ay for x, y in a]
+        projB = [x * ax + y * ay for x, y in b]
+        if max(projA) < min(projB) or max(projB) < min(projA):
+            return True
+    return False
+
+
+def _separatedAt(point, a, b):
+    # whether the segments with the points a and b, which start at the same
+    # point, meet only there: look for a line through the point with the
+    # other points of each segment on either side of it
+    px, py = point
+    a = [(x - px, y - py) for x, y in a if (x, y) != point]
+    b = [(x - px, y - py) for x, y in b if (x, y) != point]
+    if not a or not b:
+        return False
+    for dx, dy in a + b:
+        for line in ((dx, dy), (-dy, dx)):
+            sides = []
+            for points in (a, b):
+                crosses = {_sign(line[0] * y - line[1] * x) for x, y in points}
+                # the points on the line must be on opposite rays
+                dots = {
+                    _sign(line[0] * x + line[1] * y)
+                    for x, y in points
+                    if line[0] * y - line[1] * x == 0
+                }
+                crosses.discard(0)
+                if len(crosses) > 1 or len(dots) > 1:
+                    break
+                sides.append((crosses, dots))
+            else:
+                (crossesA, dotsA), (crossesB, dotsB) = sides
+                if not (crossesA & crossesB) and not (dotsA & dotsB):
+                    return True
+    return False
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def _selfIntersects(segments):
+    # whether any two segments of a contour may intersect, other than at the
+    # point shared by consecutive segments; only the pairs of segments whose
+    # bounding boxes intersect are checked, sweeping them from left to right
+    count = len(segments)
+    if count < 3:
+        return True
+    boxes = sorted((_bounds(points), i) for i, (_, points) in enumerate(segments))
+    active = []
+    for box, i in boxes:
+        active = [(other, j) for other, j in active if other[2] >= box[0]]
+        for other, j in active:
+            if other[1] > box[3] or box[1] > other[3]:
+                continue
+            a = segments[i][1]
+            b = segments[j][1]
+            if (i - j) % count == 1:
+                if not _separatedAt(a[0], a, b):
+                    return True
+            elif (j - i) % count == 1:
+                if not _separatedAt(b[0], a, b):
+                    return True
+            elif not _separated(a, b):
+                return True
+        active.append((box, i))
+    return False
+
+
+def _isFloat32(value):
+    return struct.unpack("f", struct.pack("f", value))[0] == value
+
+
+def _isMonotonic(a, b, c, d):
+    # whether a cubic bezier with these coordinates along one axis has no
+    # extremum between its ends, i.e. its derivative (a quadratic bezier)
+    # doesn't change sign
+    d0, d1, d2 = b - a, c - b, d - c
+    if d0 < 0 or d2 < 0:
+        d0, d1, d2 = -d0, -d1, -d2
+    return d0 >= 0 and d2 >= 0 and (d1 >= 0 or d1 * d1 <= d0 * d2)
+
+
+def _isConvex(points, strict=False):
+    # whether the control polygon of a curve is convex, so that the curve
+    # has no loop nor inflection; if strict, no three points are collinear
+    crosses = set()
+    for (x0, y0), (x1, y1), (x2, y2) in zip(
+        points, points[1:] + points[:1], points[2:] + points[:2]
+    ):
+        crosses.add(_sign((x1 - x0) * (y2 - y1) - (y1 - y0) * (x2 - x1)))
+    if strict:
+        return len(crosses) == 1 and 0 not in crosses
+    crosses.discard(0)
+    return len(crosses) < 2
+
+
+def _isQuadratic(points):
+    # whether a cubic curve is a degree-elevated quadratic curve
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = points
+    return x0 - 3 * x1 + 3 * x2 - x3 == 0 and y0 - 3 * y1 + 3 * y2 - y3 == 0
+
+
+def _hasCollinearLines(segments):
+    # whether two consecutive lines are collinear, which booleanOperations
+    # merges into one
+    previous = segments[-1]
+    for segment in segments:
+        if previous[0] == "line" and segment[0] == "line":
+            (x0, y0), (x1, y1) = previous[1]
+            x2, y2 = segment[1][-1]
+            if (x1 - x0) * (y2 - y1) == (y1 - y0) * (x2 - x1):
+                return True
+        previous = segment
+    return False
+
+
+def _unionIsUnchanged(contours, backend):
+    """Return True if the union of the contours (as returned by
+    ufo2ft.util._getContours) computed by the backend is the contours
+    themselves, other than the smooth flags of their points.
+
+    This is only known for a single contour (the backends sort the contours
+    in their own order), which must be closed, start with an on-curve point,
+    be counter-clockwise and not intersect itself. booleanOperations also
+    merges collinear lines (and doesn't support quadratic curves), whereas
+    pathops splits the cubic curves at their extrema, turns the degenerate ones
+    into lines or quadratic curves and rounds the coordinates to 32-bit floats.
+    """
+    if len(contours) != 1:
+        return False
+    _, points = contours[0]
+    if not points or points[0][2] is None:
+        return False
+    segments = _segments(points)
+    if segments is None:
+        return False
+    for segmentType, segmentPoints in segments:
+        if segmentType == "curve" and not (
+            len(segmentPoints) == 4 and _isConvex(segmentPoints)
+        ):
+            return False
+    if backend is RemoveOverlapsFilter.Backend.SKIA_PATHOPS:
+        if not all(_isFloat32(x) and _isFloat32(y) for x, y, *_ in points):
+            return False
+        for segmentType, segmentPoints in segments:
+            if segmentType == "curve" and not (
+                _isConvex(segmentPoints, strict=True)
+                and not _isQuadratic(segmentPoints)
+                and _isMonotonic(*(x for x, _ in segmentPoints))
+                and _isMonotonic(*(y for _, y in segmentPoints))
+            ):
+                return False
+    elif _hasCollinearLines(segments) or any(
+        segmentType == "qcurve" for segmentType, _ in segments
+    ):
+        return False
+    return _area(segments) > 0 and not _selfIntersects(segments)
+
+
 class RemoveOverlapsFilter(BaseFilter):
+    """Remove the overlaps of the glyphs' contours, with the union of the
+    contours computed by the booleanOperations or skia-pathops backend.
+
+    The glyphs with a single contour which doesn't intersect itself, nor
+    needs to be made counter-clockwise, are left as they are without running
+    the backend.
+
+    If a ``cache`` (ufo2ft.diskCache.DiskCache) is given, the contours without
+    overlaps are stored in it, and loaded from it in the next builds as long
+    as the glyphs' contours and the backend don't change.
+    """
+
     class Backend(Enum):
         BOOLEAN_OPERATIONS = "booleanOperations"
         SKIA_PATHOPS = "pathops"
 
     # use booleanOperations by default, unless pathops specified as backend
-    _kwargs = {"backend": Backend.BOOLEAN_OPERATIONS}
+    _kwargs = {"backend": Backend.BOOLEAN_OPERATIONS, "cache": None}
+    _copyOnWrite = True
+    _fusable = True
+
+    cacheNamespace = "removeOverlaps"
+    # changed when the contours without overlaps of the same glyphs change
+    cacheVersion = 1
 
     def start(self):
         self.options.backend = self.Backend(self.options.backend)
+        if self.options.cache is not None:
+            # the cached contours are looked up before running the filter
+            self._fusable = False
 
         if self.options.backend is self.Backend.BOOLEAN_OPERATIONS:
             from booleanOperations import BooleanOperationsError, union
@@ -36,10 +275,93 @@ class RemoveOverlapsFilter(BaseFilter):
         else:
             raise AssertionError(self.options.backend)
 
+    def set_context(self, font, glyphSet):
+        ctx = super().set_context(font, glyphSet)
+
+        # with a DiskCache, the glyphs which may have overlaps are found first,
+        # so that the keys of their contours can be looked up all at once; the
+        # contours computed by the filter are stored at the end
+        ctx.overlapping = ctx.cacheKeys = None
+        if self.options.cache is None:
+            return ctx
+
+        glyphs = _readOnlyGlyphSet(glyphSet)
+        ctx.overlapping = {}
+        with reportSpan("findOverlaps", "filter") as span:
+            for name, glyph in glyphs.items():
+                if not len(glyph) or not self.include(glyph):
+                    continue
+                contours = _getContours(glyph)
+                if not _unionIsUnchanged(contours, self.options.backend):
+                    ctx.overlapping[name] = contours
+            if span is not None:
+                span.glyphs = len(ctx.overlapping)
+
+        backend = importlib.import_module(self.options.backend.value)
+        options = [
+            self.cacheVersion,
+            self.options.backend.value,
+            getattr(backend, "__version__", None),
+        ]
+        with reportSpan("loadCachedContours", "filter") as span:
+            ctx.cacheKeys = {
+                name: hashlib.blake2b(
+                    json.dumps([options, contours], separators=(",", ":")).encode(
+                        "utf-8"
+                    ),
+                    digest_size=16,
+                ).digest()
+                for name, contours in ctx.overlapping.items()
+            }
+            ctx.cachedValues = self.options.cache.getMany(
+                self.cacheNamespace, ctx.cacheKeys.values()
+            )
+            if span is not None:
+                span.glyphs = len(ctx.cachedValues)
+        ctx.toCache = []
+
+        return ctx
+
+    def finish(self):
+        ctx = self.context
+        if ctx.cacheKeys is not None:
+            logger.info(
+                "Loaded %d glyphs without overlaps from the cache",
+                len(ctx.cachedValues),
+            )
+            self.options.cache.putMany(self.cacheNamespace, ctx.toCache)
+
     def filter(self, glyph):
-        if not len(glyph):
+        ctx = self.context
+        # the glyphs are keyed by their name in the glyph set, which is not
+        # that of the glyphs copied from the color layers
+        glyphName = ctx.glyphName
+        if ctx.overlapping is not None:
+            if glyphName not in ctx.overlapping:
+                return False
+        elif not len(glyph) or _unionIsUnchanged(
+            _getContours(glyph), self.options.backend
+        ):
             return False
 
+        key = None
+        if ctx.cacheKeys is not None:
+            key = ctx.cacheKeys[glyphName]
+            value = ctx.cachedValues.get(key)
+            if value is not None:
+                glyphSet = ctx.glyphSet
+                readOnly = _readOnlyGlyphSet(glyphSet)
+                if readOnly is not glyphSet and readOnly.get(glyphName) is glyph:
+                    # rather than copying the shared glyph's contours only to
+                    # replace them, copy the rest of it
+                    glyph = glyphSet[glyphName] = _copyGlyph(
+                        glyph, ctx.glyphFactory, contours=False
+                    )
+                _setContours(glyph, json.loads(value))
+                return True
+
+        glyph = self.getMutableGlyph(glyph)
+
         contours = list(glyph)
         glyph.clearContours()
         pen = getattr(glyph, self.penGetter)()
@@ -48,4 +370,7 @@ class RemoveOverlapsFilter(BaseFilter):
         except (self.Error, ValueError, TypeError):
             logger.error("Failed to remove overlaps for %s", glyph.name)
             raise
+        if key is not None:
+            value = json.dumps(_getContours(glyph), separators=(",", ":"))
+            ctx.toCache.append((key, value.encode("utf-8")))
         return True
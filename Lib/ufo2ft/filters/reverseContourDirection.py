@@ -4,9 +4,14 @@ from ufo2ft.filters import BaseFilter
 
 
 class ReverseContourDirectionFilter(BaseFilter):
+    _copyOnWrite = True
+    _fusable = True
+
     def filter(self, glyph):
         if not len(glyph):
             return False
+
+        glyph = self.getMutableGlyph(glyph)
         pen = ReverseContourPointPen(glyph.getPointPen())
         contours = list(glyph)
         glyph.clearContours()
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
 from ufo2ft.filters import BaseFilter, BaseIFilter
-from ufo2ft.util import decomposeCompositeGlyph, zip_strict
+from ufo2ft.util import decomposeCompositeGlyph, makeComponentIndex, zip_strict
+
+
+def _usersOf(glyphNames, glyphSets):
+    # the composite glyphs which reference any of the given glyphs directly
+    usedBy = makeComponentIndex(glyphSets)
+    return set().union(*(usedBy.get(glyphName, ()) for glyphName in glyphNames))
 
 
 class SkipExportGlyphsFilter(BaseFilter):
@@ -9,10 +15,17 @@ class SkipExportGlyphsFilter(BaseFilter):
 
     _pre = True
     _args = ("skipExportGlyphs",)
+    _copyOnWrite = True
 
     def start(self):
         self.options.skipExportGlyphs = frozenset(self.options.skipExportGlyphs)
 
+    def set_context(self, font, glyphSet):
+        ctx = super().set_context(font, glyphSet)
+        # only the composites of the non-export glyphs need to be decomposed
+        ctx.glyphNames = _usersOf(self.options.skipExportGlyphs, [glyphSet])
+        return ctx
+
     def filter(self, glyph) -> bool:
         if not glyph.components or self.options.skipExportGlyphs.isdisjoint(
             comp.baseGlyph for comp in glyph.components
@@ -27,7 +40,7 @@ class SkipExportGlyphsFilter(BaseFilter):
         # glyph and need not be fully decomposed to contours; any further
         # decompositions (e.g. of mixed glyphs) can be performed later.
         decomposeCompositeGlyph(
-            glyph,
+            self.getMutableGlyph(glyph),
             self.context.glyphSet,
             decomposeNested=False,
             include=self.options.skipExportGlyphs,
@@ -58,10 +71,16 @@ class SkipExportGlyphsIFilter(BaseIFilter):
 
     _pre = True
     _args = ("skipExportGlyphs",)
+    _copyOnWrite = True
 
     def start(self):
         self.options.skipExportGlyphs = frozenset(self.options.skipExportGlyphs)
 
+    def set_context(self, fonts, glyphSets, instantiator=None, **kwargs):
+        ctx = super().set_context(fonts, glyphSets, instantiator, **kwargs)
+        ctx.glyphNames = _usersOf(self.options.skipExportGlyphs, glyphSets)
+        return ctx
+
     def filter(self, glyphName: str, glyphs: list) -> bool:
         if not any(glyph.components for glyph in glyphs) or all(
             self.options.skipExportGlyphs.isdisjoint(
@@ -20,10 +20,15 @@ class SortContoursFilter(BaseFilter):
     or U+2591 LIGHT SHADE).
     """
 
+    _copyOnWrite = True
+    _fusable = True
+
     def filter(self, glyph):
         if len(glyph) == 0:  # As in, no contours.
             return False
 
+        glyph = self.getMutableGlyph(glyph)
+
         if glyph.components:
             logger.warning(
                 "Glyph '%s' contains components which will not be sorted.",
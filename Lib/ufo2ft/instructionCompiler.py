@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import array
 import logging
+import struct
 from functools import partial
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
 
 from fontTools import ttLib
 from fontTools.misc.fixedTools import floatToFixedToFloat
-from fontTools.pens.hashPointPen import HashPointPen
+from fontTools.pens.hashPointPen import HashPointPen, MissingComponentError
 from fontTools.pens.roundingPen import RoundingPointPen
 from fontTools.ttLib import newTable
 from fontTools.ttLib.tables._g_l_y_f import (
@@ -43,6 +44,69 @@ class InstructionCompiler:
         if not autoUseMyMetrics:
             # If autoUseMyMetrics is False, replace the method with a no-op
             self.autoUseMyMetrics = lambda ttGlyph, glyphName: None
+        # the hashes of the glyphs computed by checkGlyphHashes
+        self._glyphHashes = {}
+
+    def checkGlyphHashes(
+        self, glyphNames: Iterable[str], jobs: int = 1
+    ) -> Dict[str, bool]:
+        """Check the stored hashes of the UFO glyphs with TrueType instructions
+        against the glyphs of the 'glyf' table all at once, and return whether
+        each one matches, keyed by glyph name.
+
+        The glyphs used as components are hashed only once. With more than one
+        ``jobs``, the glyphs are hashed in as many processes.
+
+        The hashes are reused when compiling the glyph instructions, so the
+        'glyf' table must contain the checked glyphs and their components.
+        """
+        glyf = self.otf["glyf"]
+        metrics = self.otf["hmtx"].metrics
+        storedHashes = {}
+        for name in glyphNames:
+            if name not in self.ufo:
+                continue
+            ttdata = self.ufo[name].lib.get(TRUETYPE_INSTRUCTIONS_KEY, None)
+            if ttdata is not None:
+                storedHashes[name] = ttdata.get("id", None)
+        items = [
+            (name, metrics[name][0])
+            for name, storedHash in storedHashes.items()
+            if storedHash is not None
+        ]
+
+        jobs = min(jobs, len(items))
+        if jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            chunkSize = -(-len(items) // jobs)
+            chunks = []
+            for i in range(0, len(items), chunkSize):
+                chunk = items[i : i + chunkSize]
+                # the glyphs of the chunk and the glyphs they use as components
+                glyphs = {}
+                stack = [name for name, _ in chunk]
+                while stack:
+                    name = stack.pop()
+                    if name in glyphs or name not in glyf:
+                        continue
+                    glyphs[name] = glyph = glyf[name]
+                    if glyph.isComposite():
+                        stack.extend(c.glyphName for c in glyph.components)
+                chunkMetrics = {name: metrics[name] for name in glyphs}
+                chunks.append((chunk, glyphs, chunkMetrics))
+            hashes = {}
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                for chunkHashes in executor.map(_hashGlyphs, *zip(*chunks)):
+                    hashes.update(chunkHashes)
+        else:
+            hashes = _hashGlyphs(items, glyf, metrics)
+
+        self._glyphHashes.update(hashes)
+        return {
+            name: storedHash is not None and storedHash == hashes[name]
+            for name, storedHash in storedHashes.items()
+        }
 
     def _check_glyph_hash(
         self, glyph: Glyph, ttglyph: TTGlyph, stored_hash: Optional[str]
@@ -56,14 +120,18 @@ class InstructionCompiler:
             )
             return False
 
-        ttwidth = self.otf["hmtx"][glyph.name][0]
-        hash_pen = HashPointPen(ttwidth, self.otf.getGlyphSet())
-        round_pen = RoundingPointPen(
-            hash_pen, transformRoundFunc=partial(floatToFixedToFloat, precisionBits=14)
-        )
-        ttglyph.drawPoints(round_pen, self.otf["glyf"])
+        glyph_hash = self._glyphHashes.get(glyph.name)
+        if glyph_hash is None:
+            ttwidth = self.otf["hmtx"][glyph.name][0]
+            hash_pen = HashPointPen(ttwidth, self.otf.getGlyphSet())
+            round_pen = RoundingPointPen(
+                hash_pen,
+                transformRoundFunc=partial(floatToFixedToFloat, precisionBits=14),
+            )
+            ttglyph.drawPoints(round_pen, self.otf["glyf"])
+            glyph_hash = hash_pen.hash
 
-        if stored_hash != hash_pen.hash:
+        if stored_hash != glyph_hash:
             logger.error(
                 f"The stored hash for glyph '{glyph.name}' does not match the "
                 "TrueType output glyph. Glyph will have no instructions in the font."
@@ -296,11 +364,8 @@ class InstructionCompiler:
                     setattr(maxp, name, value)
 
         # Recalculate maxp.maxSizeOfInstructions
-        sizes = [
-            len(ttglyph.program.getBytecode())
-            for ttglyph in self.otf["glyf"].glyphs.values()
-            if hasattr(ttglyph, "program")
-        ]
+        glyf = self.otf["glyf"]
+        sizes = [_instructionsSize(ttglyph, glyf) for ttglyph in glyf.glyphs.values()]
         maxp.maxSizeOfInstructions = max(sizes, default=0)
 
     def setupTable_cvt(self) -> None:
@@ -343,3 +408,86 @@ class InstructionCompiler:
 
     def setupTable_prep(self) -> None:
         self._compile_program("controlValueProgram", "prep")
+
+
+class _GlyphHasher:
+    """Compute the hashes of TrueType glyphs like InstructionCompiler does with
+    a HashPointPen, but drawing each glyph used as a component only once.
+
+    *glyphs* maps glyph names to TTGlyphs (e.g. the 'glyf' table) and
+    *metrics* maps them to (advance width, lsb) tuples, like 'hmtx'.
+    """
+
+    def __init__(self, glyphs, metrics):
+        self.glyphs = glyphs
+        self.metrics = metrics
+        self._componentData = {}
+
+    def hash(self, ttglyph: TTGlyph, width: int) -> str:
+        hash_pen = _ComponentHashPointPen(self, width)
+        round_pen = RoundingPointPen(
+            hash_pen, transformRoundFunc=partial(floatToFixedToFloat, precisionBits=14)
+        )
+        ttglyph.drawPoints(round_pen, self.glyphs)
+        return hash_pen.hash
+
+    def componentData(self, glyphName: str, nested: bool) -> str:
+        """Return the hash data of the glyph used as a component."""
+        try:
+            glyph = self.glyphs[glyphName]
+        except KeyError:
+            raise MissingComponentError(glyphName) from None
+        # like the TTFont's glyph set, the simple glyphs directly used as
+        # components are drawn shifted by their lsb, if it's not their xMin
+        offset = 0
+        if not nested and not glyph.isComposite() and hasattr(glyph, "xMin"):
+            offset = self.metrics[glyphName][1] - glyph.xMin
+        key = (glyphName, offset)
+        data = self._componentData.get(key)
+        if data is None:
+            pen = _ComponentHashPointPen(self)
+            glyph.drawPoints(pen, self.glyphs, offset)
+            data = self._componentData[key] = "".join(pen.data)
+        return data
+
+
+class _ComponentHashPointPen(HashPointPen):
+    """A HashPointPen getting the data of the components from a _GlyphHasher."""
+
+    def __init__(self, hasher: _GlyphHasher, glyphWidth: Optional[int] = None):
+        super().__init__(glyphWidth or 0)
+        self.hasher = hasher
+        # the pens drawing the components themselves have no width
+        self.nested = glyphWidth is None
+        if self.nested:
+            self.data = []
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        tr = "".join([f"{t:+}" for t in transformation])
+        self.data.append("[")
+        self.data.append(self.hasher.componentData(baseGlyphName, self.nested))
+        self.data.append(f"({tr})]")
+
+
+def _hashGlyphs(items, glyphs, metrics):
+    """Return the hashes of the (glyphName, width) *items*, keyed by glyph
+    name (see _GlyphHasher)."""
+    hasher = _GlyphHasher(glyphs, metrics)
+    return {name: hasher.hash(glyphs[name], width) for name, width in items}
+
+
+def _instructionsSize(ttglyph: TTGlyph, glyf) -> int:
+    # the size of the glyph's instructions, read from the binary data of the
+    # simple glyphs which are not decompiled (e.g. reused from a previous build)
+    data = getattr(ttglyph, "data", None)
+    if data:
+        (numberOfContours,) = struct.unpack(">h", data[:2])
+        if numberOfContours < 0:
+            ttglyph.expand(glyf)
+        else:
+            # the header is followed by the end points of the contours
+            offset = 10 + 2 * numberOfContours
+            return struct.unpack(">H", data[offset : offset + 2])[0]
+    if hasattr(ttglyph, "program"):
+        return len(ttglyph.program.getBytecode())
+    return 0
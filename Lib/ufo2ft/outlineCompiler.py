@@ -1,9 +1,15 @@
+import hashlib
 import logging
 import math
+import struct
 from collections import Counter, namedtuple
+from collections.abc import Mapping
 from io import BytesIO
+from time import perf_counter
 from types import SimpleNamespace
+from typing import NamedTuple
 
+import fontTools
 from fontTools.cffLib import (
     CharStrings,
     GlobalSubrsIndex,
@@ -15,7 +21,7 @@ from fontTools.cffLib import (
 )
 from fontTools.misc.arrayTools import unionRect
 from fontTools.misc.roundTools import noRound, otRound
-from fontTools.pens.boundsPen import ControlBoundsPen
+from fontTools.pens.boundsPen import BoundsPen, ControlBoundsPen
 from fontTools.pens.pointPen import SegmentToPointPen
 from fontTools.pens.reverseContourPen import ReverseContourPen
 from fontTools.pens.t2CharStringPen import T2CharStringPen
@@ -26,6 +32,8 @@ from fontTools.ttLib.tables._g_l_y_f import Glyph, flagCubic
 from fontTools.ttLib.tables._h_e_a_d import mac_epoch_diff
 from fontTools.ttLib.tables.O_S_2f_2 import Panose
 
+import ufo2ft
+from ufo2ft.buildReport import reportSpan
 from ufo2ft.constants import (
     COLOR_LAYERS_KEY,
     COLOR_PALETTES_KEY,
@@ -52,6 +60,7 @@ from ufo2ft.util import (
     _copyGlyph,
     _getNewGlyphFactory,
     colrClipBoxQuantization,
+    fingerprintGlyphs,
     getMaxComponentDepth,
     makeOfficialGlyphOrder,
     makeUnicodeToGlyphNameMapping,
@@ -64,6 +73,23 @@ BoundingBox = namedtuple("BoundingBox", ["xMin", "yMin", "xMax", "yMax"])
 EMPTY_BOUNDING_BOX = BoundingBox(0, 0, 0, 0)
 
 
+class IncrementalState(NamedTuple):
+    """What an outline compiler needs to know about a previous build of a font
+    to only compile the glyphs which changed since (see the ``previousState``
+    option of the outline compilers).
+
+    ``font`` is the TTFont returned by the compiler, before anything else was
+    added to it; ``options`` are the compiler's glyphCompileOptions; and
+    ``fingerprints`` and ``boundingBoxes`` the glyphs' fingerprints and
+    bounding boxes, keyed by glyph name.
+    """
+
+    font: TTFont
+    options: tuple
+    fingerprints: dict
+    boundingBoxes: dict
+
+
 def _isNonBMP(s):
     for c in s:
         if ord(c) > 65535:
@@ -117,6 +143,7 @@ class BaseOutlineCompiler:
         ftConfig=None,
         *,
         compilingVFDefaultSource=True,
+        previousState=None,
     ):
         self.ufo = font
         # use the previously filtered glyphSet, if any
@@ -139,11 +166,15 @@ class BaseOutlineCompiler:
         self.colrAutoClipBoxes = colrAutoClipBoxes
         self.colrClipBoxQuantization = colrClipBoxQuantization
         self.ftConfig = ftConfig or {}
+        # an IncrementalState, to reuse the glyphs of a previous build
+        self.previousState = previousState
         # cached values defined later on
         self._glyphBoundingBoxes = None
         self._fontBoundingBox = None
         self._compiledGlyphs = None
         self._maxComponentDepths = None
+        self._glyphFingerprints = None
+        self._reusedGlyphs = None
 
     def compile(self):
         """
@@ -170,25 +201,19 @@ class BaseOutlineCompiler:
         self.otf.setGlyphOrder(self.glyphOrder)
 
         # populate basic tables
-        self.setupTable_head()
-        self.setupTable_hmtx()
-        self.setupTable_hhea()
-        self.setupTable_name()
-        self.setupTable_maxp()
-        self.setupTable_cmap()
-        self.setupTable_OS2()
-        self.setupTable_post()
+        tables = ["head", "hmtx", "hhea", "name", "maxp", "cmap", "OS2", "post"]
         if self.vertical:
-            self.setupTable_vmtx()
-            self.setupTable_vhea()
+            tables += ["vmtx", "vhea"]
         if self.colorLayers:
-            self.setupTable_COLR()
-            self.setupTable_CPAL()
+            tables += ["COLR", "CPAL"]
         if self.meta:
-            self.setupTable_meta()
+            tables.append("meta")
         if any(key.startswith(GLYPHS_MATH_PREFIX) for key in self.ufo.lib):
-            self.setupTable_MATH()
-        self.setupOtherTables()
+            tables.append("MATH")
+        for table in tables:
+            self._setupTable(table)
+        with reportSpan("setupOtherTables", "table"):
+            self.setupOtherTables()
         if self.colorLayers and self.colrAutoClipBoxes:
             self._computeCOLRClipBoxes()
         self.importTTX()
@@ -203,11 +228,170 @@ class BaseOutlineCompiler:
         """
         raise NotImplementedError
 
+    def _setupTable(self, table):
+        with reportSpan(f"setupTable_{table}", "table"):
+            getattr(self, f"setupTable_{table}")()
+
     def getCompiledGlyphs(self):
         if self._compiledGlyphs is None:
-            self._compiledGlyphs = self.compileGlyphs()
+            reused = self.getReusedGlyphs()
+            with reportSpan(
+                "compileGlyphs", "glyphs", glyphs=len(self.glyphOrder) - len(reused)
+            ) as span:
+                self._glyphTimes = span.glyphTimes if span is not None else None
+                try:
+                    compiledGlyphs = self.compileGlyphs()
+                finally:
+                    self._glyphTimes = None
+            if reused:
+                compiledGlyphs = {
+                    name: reused[name] if name in reused else compiledGlyphs[name]
+                    for name in self.glyphOrder
+                }
+            self._compiledGlyphs = compiledGlyphs
         return self._compiledGlyphs
 
+    def glyphCompileOptions(self):
+        """Return a tuple of the options which affect the compiled glyphs.
+
+        The glyphs of a previous build are only reused if it was made with
+        the same options. Subclasses adding such options must extend it.
+        """
+        return (type(self).__name__,)
+
+    @property
+    def glyphFingerprints(self):
+        """The fingerprints of the glyphs, keyed by glyph name: the digests of
+        what their compiled glyphs depend on (see
+        :class:`ufo2ft.util.GlyphFingerprinter`)."""
+        if self._glyphFingerprints is None:
+            with reportSpan("fingerprintGlyphs", "glyphs", glyphs=len(self.glyphOrder)):
+                self._glyphFingerprints = fingerprintGlyphs(
+                    self.allGlyphs, self.glyphOrder
+                )
+        return self._glyphFingerprints
+
+    def getPreviousCompiledGlyphs(self, font):
+        """Return the compiled glyphs of a previous build's TTFont, keyed by
+        glyph name, or None if they can't be reused.
+
+        **This should not be called externally.** Subclasses must override
+        this method to support incremental compilation.
+        """
+        return None
+
+    def getReusedGlyphs(self):
+        """Return the compiled glyphs of the previous build which are reused
+        as they are, keyed by glyph name: those whose fingerprint didn't change.
+        """
+        if self._reusedGlyphs is None:
+            self._reusedGlyphs = {}
+            previous = self.previousState
+            if previous is None:
+                return self._reusedGlyphs
+            if previous.options != self.glyphCompileOptions():
+                logger.info(
+                    "The previous build used different options; "
+                    "compiling all the glyphs again"
+                )
+                return self._reusedGlyphs
+            previousGlyphs = self.getPreviousCompiledGlyphs(previous.font)
+            if previousGlyphs is None:
+                return self._reusedGlyphs
+            fingerprints = self.glyphFingerprints
+            self._reusedGlyphs = {
+                name: previousGlyphs[name]
+                for name in self.glyphOrder
+                if previous.fingerprints.get(name) == fingerprints[name]
+                and name in previous.boundingBoxes
+                and name in previousGlyphs
+            }
+            logger.info(
+                "Reusing %d glyphs of the previous build, compiling %d",
+                len(self._reusedGlyphs),
+                len(self.glyphOrder) - len(self._reusedGlyphs),
+            )
+        return self._reusedGlyphs
+
+    def getIncrementalState(self):
+        """Return the IncrementalState to pass as ``previousState`` to the
+        compiler of the next build of the same font, after compile was called.
+
+        Its TTFont is the one returned by compile: if it's going to be modified
+        (e.g. by compiling the features), save a copy of it first, and use the
+        copy in the state.
+        """
+        return IncrementalState(
+            self.otf,
+            self.glyphCompileOptions(),
+            self.glyphFingerprints,
+            self.glyphBoundingBoxes,
+        )
+
+    # number of glyphs compiled between two releases of their source outlines
+    releaseChunkSize = 256
+
+    # glyph name -> compile time in seconds, while compiling glyphs for a build
+    # report that profiles glyphs
+    _glyphTimes = None
+
+    def iterGlyphsToCompile(self):
+        """Yield (glyphName, glyph) tuples in glyph order, for compileGlyphs,
+        except for the glyphs reused from a previous build.
+
+        If the glyph set supports releasing glyphs (i.e. they were read lazily
+        from disk), the glyphs' outlines are released in chunks once they are
+        compiled, but the glyphs used as components are kept until all the
+        composite glyphs using them are compiled too.
+
+        When profiling glyphs, the time taken by the caller to compile each
+        glyph (i.e. until it asks for the next one) is recorded.
+        """
+        glyphTimes = self._glyphTimes
+        if glyphTimes is None:
+            yield from self._iterGlyphsToCompile()
+            return
+        for glyphName, glyph in self._iterGlyphsToCompile():
+            start = perf_counter()
+            yield glyphName, glyph
+            glyphTimes[glyphName] = perf_counter() - start
+
+    def _iterGlyphsToCompile(self):
+        allGlyphs = self.allGlyphs
+        glyphOrder = self.glyphOrder
+        reused = self.getReusedGlyphs()
+        if reused:
+            glyphOrder = [name for name in glyphOrder if name not in reused]
+        release = getattr(allGlyphs, "release", None)
+        if release is None:
+            for glyphName in glyphOrder:
+                yield glyphName, allGlyphs[glyphName]
+            return
+
+        glyphs = allGlyphs.readOnly
+        remainingUsers = Counter(
+            component.baseGlyph
+            for glyphName in glyphOrder
+            for component in glyphs[glyphName].components
+        )
+        compiled = set()
+        chunkSize = self.releaseChunkSize
+        for i in range(0, len(glyphOrder), chunkSize):
+            chunk = glyphOrder[i : i + chunkSize]
+            for glyphName in chunk:
+                yield glyphName, allGlyphs[glyphName]
+            releasable = []
+            for glyphName in chunk:
+                compiled.add(glyphName)
+                if not remainingUsers[glyphName]:
+                    releasable.append(glyphName)
+                for component in glyphs[glyphName].components:
+                    baseGlyph = component.baseGlyph
+                    remainingUsers[baseGlyph] -= 1
+                    if not remainingUsers[baseGlyph] and baseGlyph in compiled:
+                        releasable.append(baseGlyph)
+            release(releasable)
+
     def makeGlyphsBoundingBoxes(self):
         """
         Make bounding boxes for all the glyphs, and return a dictionary of
@@ -1313,6 +1497,65 @@ class BaseOutlineCompiler:
                     self.otf.sfntVersion = sfntVersion
 
 
+class _BoundsT2CharStringPen(T2CharStringPen):
+    """A T2CharStringPen which also computes the bounds of the charstring.
+
+    The points are passed to a BoundsPen as the charstring interpreter would
+    draw them, by adding up the rounded relative coordinates. When the
+    charstring is specialized, successive moves are merged into one, so only
+    the last of them counts.
+
+    The bounds are the same as those computed by ``T2CharString.calcBounds``
+    as long as the coordinates are rounded to integers; else the merged
+    relative coordinates may add up to slightly different floats.
+    """
+
+    def __init__(self, *args, mergeMoves=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mergeMoves = mergeMoves
+        self._boundsPen = BoundsPen(None)
+        self._current = (0, 0)
+        self._pendingMove = None
+
+    def _nextPoints(self):
+        x, y = self._current
+        args = self._commands[-1][1]
+        points = []
+        for i in range(0, len(args), 2):
+            x = x + args[i]
+            y = y + args[i + 1]
+            points.append((x, y))
+        self._current = (x, y)
+        return points
+
+    def _flushMove(self):
+        if self._pendingMove is not None:
+            self._boundsPen.moveTo(self._pendingMove)
+            self._pendingMove = None
+
+    def _moveTo(self, pt):
+        super()._moveTo(pt)
+        if not self.mergeMoves:
+            self._flushMove()
+        (self._pendingMove,) = self._nextPoints()
+
+    def _lineTo(self, pt):
+        super()._lineTo(pt)
+        self._flushMove()
+        self._boundsPen.lineTo(*self._nextPoints())
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        super()._curveToOne(pt1, pt2, pt3)
+        self._flushMove()
+        self._boundsPen.curveTo(*self._nextPoints())
+
+    def getBounds(self):
+        """Return the (xMin, yMin, xMax, yMax) bounds of the charstring, or
+        None if it's empty."""
+        self._flushMove()
+        return self._boundsPen.bounds
+
+
 class OutlineOTFCompiler(BaseOutlineCompiler):
     """Compile a .otf font with CFF outlines."""
 
@@ -1334,6 +1577,7 @@ class OutlineOTFCompiler(BaseOutlineCompiler):
         ftConfig=None,
         *,
         compilingVFDefaultSource=True,
+        previousState=None,
     ):
         if roundTolerance is not None:
             self.roundTolerance = float(roundTolerance)
@@ -1351,11 +1595,14 @@ class OutlineOTFCompiler(BaseOutlineCompiler):
             colrClipBoxQuantization=colrClipBoxQuantization,
             ftConfig=ftConfig,
             compilingVFDefaultSource=compilingVFDefaultSource,
+            previousState=previousState,
         )
         if not isinstance(optimizeCFF, bool):
             optimizeCFF = optimizeCFF >= CFFOptimization.SPECIALIZE
         self.optimizeCFF = optimizeCFF
         self._defaultAndNominalWidths = None
+        # the bounds of the compiled charstrings, computed while drawing them
+        self._charStringBounds = {}
 
     def getDefaultAndNominalWidths(self):
         """Return (defaultWidthX, nominalWidthX).
@@ -1385,6 +1632,24 @@ class OutlineOTFCompiler(BaseOutlineCompiler):
             self._defaultAndNominalWidths = (defaultWidthX, nominalWidthX)
         return self._defaultAndNominalWidths
 
+    def glyphCompileOptions(self):
+        # the widths are encoded relative to the nominal width
+        return super().glyphCompileOptions() + (
+            self.roundTolerance,
+            self.optimizeCFF,
+            self.getDefaultAndNominalWidths(),
+        )
+
+    def getPreviousCompiledGlyphs(self, font):
+        if "CFF " not in font:
+            return None
+        cff = font["CFF "].cff
+        topDict = cff.topDictIndex[0]
+        if len(cff.GlobalSubrs) or len(getattr(topDict.Private, "Subrs", ())):
+            logger.info("Can't reuse the glyphs of a subroutinized CFF table")
+            return None
+        return topDict.CharStrings
+
     def compileGlyphs(self):
         """Compile and return the CFF T2CharStrings for this font."""
         defaultWidth, nominalWidth = self.getDefaultAndNominalWidths()
@@ -1395,10 +1660,23 @@ class OutlineOTFCompiler(BaseOutlineCompiler):
             defaultWidthX=defaultWidth, nominalWidthX=nominalWidth
         )
         compiledGlyphs = {}
-        for glyphName in self.glyphOrder:
-            glyph = self.allGlyphs[glyphName]
-            cs = self.getCharStringForGlyph(glyph, private)
+        if (
+            type(self).getCharStringForGlyph
+            is not OutlineOTFCompiler.getCharStringForGlyph
+            or self.roundTolerance < 0.5
+        ):
+            # the bounds are computed from the charstrings afterwards: those made
+            # by a subclass are unknown, and fractional relative coordinates may
+            # not add up to the same floats once the charstrings are specialized
+            for glyphName, glyph in self.iterGlyphsToCompile():
+                cs = self.getCharStringForGlyph(glyph, private)
+                compiledGlyphs[glyphName] = cs
+            return compiledGlyphs
+        charStringBounds = self._charStringBounds
+        for glyphName, glyph in self.iterGlyphsToCompile():
+            cs, bounds = self._drawCharString(glyph, private)
             compiledGlyphs[glyphName] = cs
+            charStringBounds[glyphName] = bounds
         return compiledGlyphs
 
     def makeGlyphsBoundingBoxes(self):
@@ -1424,8 +1702,16 @@ class OutlineOTFCompiler(BaseOutlineCompiler):
         tolerance = self.roundTolerance
         glyphBoxes = {}
         charStrings = self.getCompiledGlyphs()
+        charStringBounds = self._charStringBounds
+        reused = self.getReusedGlyphs()
         for name, cs in charStrings.items():
-            bounds = cs.calcBounds(charStrings)
+            if name in reused:
+                glyphBoxes[name] = self.previousState.boundingBoxes[name]
+                continue
+            if name in charStringBounds:
+                bounds = charStringBounds[name]
+            else:
+                bounds = cs.calcBounds(charStrings)
             if bounds is not None:
                 rounded = []
                 for value in bounds[:2]:
@@ -1446,6 +1732,12 @@ class OutlineOTFCompiler(BaseOutlineCompiler):
         may override this method to handle the charstring creation
         in a different way if desired.
         """
+        return self._drawCharString(glyph, private, globalSubrs)[0]
+
+    def _drawCharString(self, glyph, private, globalSubrs=None):
+        """Return the Type2CharString for the *glyph* and its bounds, computed
+        while drawing it (see :class:`_BoundsT2CharStringPen`).
+        """
         width = glyph.width
         defaultWidth = private.defaultWidthX
         nominalWidth = private.nominalWidthX
@@ -1457,10 +1749,15 @@ class OutlineOTFCompiler(BaseOutlineCompiler):
             width -= nominalWidth
         if width is not None:
             width = otRound(width)
-        pen = T2CharStringPen(width, self.allGlyphs, roundTolerance=self.roundTolerance)
+        pen = _BoundsT2CharStringPen(
+            width,
+            self.allGlyphs,
+            roundTolerance=self.roundTolerance,
+            mergeMoves=self.optimizeCFF,
+        )
         glyph.draw(pen)
         charString = pen.getCharString(private, globalSubrs, optimize=self.optimizeCFF)
-        return charString
+        return charString, pen.getBounds()
 
     def setupTable_maxp(self):
         """Make the maxp table."""
@@ -1472,9 +1769,9 @@ class OutlineOTFCompiler(BaseOutlineCompiler):
         maxp.numGlyphs = len(self.glyphOrder)
 
     def setupOtherTables(self):
-        self.setupTable_CFF()
+        self._setupTable("CFF")
         if self.vertical:
-            self.setupTable_VORG()
+            self._setupTable("VORG")
 
     def setupTable_CFF(self):
         """Make the CFF table."""
@@ -1677,6 +1974,8 @@ class OutlineTTFCompiler(BaseOutlineCompiler):
         ftConfig=None,
         *,
         compilingVFDefaultSource=True,
+        previousState=None,
+        cache=None,
     ):
         super().__init__(
             font,
@@ -1689,11 +1988,17 @@ class OutlineTTFCompiler(BaseOutlineCompiler):
             colrClipBoxQuantization=colrClipBoxQuantization,
             ftConfig=ftConfig,
             compilingVFDefaultSource=compilingVFDefaultSource,
+            previousState=previousState,
         )
         self.autoUseMyMetrics = autoUseMyMetrics
         self.dropImpliedOnCurves = dropImpliedOnCurves
         self.roundCoordinates = roundCoordinates
         self.glyphDataFormat = glyphDataFormat
+        # a ufo2ft.diskCache.DiskCache of compiled glyphs, shared between builds
+        self.cache = cache
+        # the keys of the glyphs which can be cached, and the cached glyphs
+        self._glyphCacheKeys = {}
+        self._cachedGlyphs = {}
 
     def makeMissingRequiredGlyphs(self, font, glyphSet, sfntVersion, notdefGlyph=None):
         """
@@ -1723,14 +2028,68 @@ class OutlineTTFCompiler(BaseOutlineCompiler):
                             comp.baseGlyph, width=0xFFFF, height=0xFFFF
                         )
 
+    def glyphCompileOptions(self):
+        return super().glyphCompileOptions() + (
+            self.roundCoordinates,
+            self.dropImpliedOnCurves,
+            self.glyphDataFormat,
+            self.autoUseMyMetrics,
+        )
+
+    def getPreviousCompiledGlyphs(self, font):
+        if "glyf" not in font:
+            return None
+        return _PreviousTTGlyphs(font["glyf"])
+
+    # the DiskCache namespace of the compiled glyphs
+    glyphCacheNamespace = "glyf"
+
+    def getReusedGlyphs(self):
+        """Return the compiled glyphs reused from the previous build, or
+        loaded from the cache, keyed by glyph name.
+
+        Only the simple glyphs are cached, as composite glyphs refer to their
+        components by glyph ID, and only when the coordinates are rounded, as
+        the cached glyphs are compiled to binary data. The cache keys are the
+        glyphs' fingerprints, the glyphCompileOptions and the versions of
+        ufo2ft and fontTools.
+        """
+        if self._reusedGlyphs is None:
+            reused = super().getReusedGlyphs()
+            if self.cache is not None and self.roundCoordinates:
+                with reportSpan("loadCachedGlyphs", "glyphs") as span:
+                    self._cachedGlyphs = self._loadCachedGlyphs(reused)
+                    if span is not None:
+                        span.glyphs = len(self._cachedGlyphs)
+                reused.update(self._cachedGlyphs)
+        return self._reusedGlyphs
+
+    def _loadCachedGlyphs(self, reused):
+        prefix = hashlib.blake2b(
+            repr(
+                (ufo2ft.__version__, fontTools.version, self.glyphCompileOptions())
+            ).encode("utf-8"),
+            digest_size=16,
+        ).digest()
+        glyphs = getattr(self.allGlyphs, "readOnly", self.allGlyphs)
+        fingerprints = self.glyphFingerprints
+        self._glyphCacheKeys = keys = {
+            name: prefix + fingerprints[name]
+            for name in self.glyphOrder
+            if name not in reused and not glyphs[name].components
+        }
+        found = self.cache.getMany(self.glyphCacheNamespace, keys.values())
+        cached = {name: Glyph(found[key]) for name, key in keys.items() if key in found}
+        logger.info("Loaded %d glyphs from the cache", len(cached))
+        return cached
+
     def compileGlyphs(self):
         """Compile and return the TrueType glyphs for this font."""
         allGlyphs = self.allGlyphs
         ttGlyphs = {}
         round = otRound if self.roundCoordinates else noRound
         glyphDataFormat = self.glyphDataFormat
-        for name in self.glyphOrder:
-            glyph = allGlyphs[name]
+        for name, glyph in self.iterGlyphsToCompile():
             pen = TTGlyphPointPen(allGlyphs)
             try:
                 glyph.drawPoints(pen)
@@ -1765,8 +2124,24 @@ class OutlineTTFCompiler(BaseOutlineCompiler):
         """
         glyphBoxes = {}
         ttGlyphs = self.getCompiledGlyphs()
+        reused = self.getReusedGlyphs()
+        # the names of the glyphs whose bounds were already computed: the
+        # bounds of composite glyphs with only integer translations are derived
+        # from those of their components, which are computed once and shared
+        # by all the composites using them, rather than once for each
+        boundsDone = set()
         for glyphName, glyph in ttGlyphs.items():
-            glyph.recalcBounds(ttGlyphs)
+            if glyphName in self._cachedGlyphs:
+                glyphBoxes[glyphName] = _compiledGlyphBounds(glyph)
+                continue
+            if glyphName in reused:
+                glyphBoxes[glyphName] = self.previousState.boundingBoxes[glyphName]
+                continue
+            if glyphName not in boundsDone:
+                if reused and glyph.isComposite():
+                    _expandBaseGlyphs(glyph, ttGlyphs)
+                glyph.recalcBounds(ttGlyphs, boundsDone=boundsDone)
+                boundsDone.add(glyphName)
             bounds = BoundingBox(glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax)
             if bounds == EMPTY_BOUNDING_BOX:
                 bounds = None
@@ -1830,7 +2205,7 @@ class OutlineTTFCompiler(BaseOutlineCompiler):
             self.ufo, self.otf, autoUseMyMetrics=self.autoUseMyMetrics
         )
 
-        self.setupTable_glyf()
+        self._setupTable("glyf")
 
         if "cvt " in self.tables:
             self.instructionCompiler.setupTable_cvt()
@@ -1854,18 +2229,113 @@ class OutlineTTFCompiler(BaseOutlineCompiler):
         glyf.glyphOrder = self.glyphOrder
 
         ttGlyphs = self.getCompiledGlyphs()
-        # Sort the glyphs so that simple glyphs are compiled first, and composite
-        # glyphs are compiled later. Otherwise the glyph hashes may not be ready
-        # to calculate when a base glyph of a composite glyph is not in the font yet.
+        # Sort the glyphs so that simple glyphs come first, and composite
+        # glyphs later, in the order of their component depths.
         maxComponentDepths = self.getMaxComponentDepths()
-        for name in sorted(self.glyphOrder, key=lambda n: maxComponentDepths.get(n, 0)):
+        glyphOrder = sorted(self.glyphOrder, key=lambda n: maxComponentDepths.get(n, 0))
+        for name in glyphOrder:
+            # the glyph order is already set: glyf[name] = ttGlyph would look
+            # for the name in it, which is quadratic
+            glyf.glyphs[name] = ttGlyphs[name]
+        # the glyphs reused from a previous build or loaded from the cache
+        # already have their instructions
+        reused = self.getReusedGlyphs()
+        # all the glyphs are in the table, so the hashes of the glyphs to be
+        # hinted can be checked at once, hashing their components only once
+        self.instructionCompiler.checkGlyphHashes(
+            name for name in glyphOrder if name not in reused
+        )
+        cacheKeys = self._glyphCacheKeys
+        toCache = []
+        for name in glyphOrder:
+            if name in reused:
+                continue
             ttGlyph = ttGlyphs[name]
             self.instructionCompiler.compileGlyphInstructions(ttGlyph, name)
-            glyf[name] = ttGlyph
+            if name in cacheKeys and ttGlyph.numberOfContours > 0:
+                toCache.append((cacheKeys[name], ttGlyph.compile(glyf)))
+        if toCache:
+            with reportSpan("cacheGlyphs", "glyphs", glyphs=len(toCache)):
+                self.cache.putMany(self.glyphCacheNamespace, toCache)
 
         # update various maxp fields based on glyf without needing to compile the font
         if "maxp" in self.otf:
-            self.otf["maxp"].recalc(self.otf)
+            if reused:
+                self._recalcMaxp(glyf)
+            else:
+                self.otf["maxp"].recalc(self.otf)
+        if reused:
+            # The glyph bounding boxes, and the head, hhea, vhea and maxp
+            # values derived from them, are all set already: recalculating
+            # them when saving the font would decompile all the reused glyphs.
+            self.otf.recalcBBoxes = False
+
+    def _recalcMaxp(self, glyf):
+        # Like maxp.recalc, without expanding the simple glyphs reused from a
+        # previous build. The head bounding box is already set from the same
+        # glyph bounding boxes, which are also used to set bit 1 of the head
+        # flags if the left side bearings of all the glyphs are their xMin.
+        maxp = self.otf["maxp"]
+        maxPoints = maxContours = 0
+        maxCompositePoints = maxCompositeContours = 0
+        maxComponentElements = maxComponentDepth = 0
+        simpleValues = {}
+        for glyphName in self.glyphOrder:
+            values = _simpleGlyphMaxpValues(glyf.glyphs[glyphName])
+            if values is not None:
+                simpleValues[glyphName] = values
+                maxPoints = max(maxPoints, values[0])
+                maxContours = max(maxContours, values[1])
+
+        def compositeValues(glyph, depth):
+            nPoints = nContours = 0
+            maxDepth = depth
+            for component in glyph.components:
+                baseName = component.glyphName
+                if baseName in simpleValues:
+                    nP, nC = simpleValues[baseName]
+                else:
+                    baseGlyph = glyf.glyphs[baseName]
+                    if not baseGlyph.isComposite():
+                        continue
+                    nP, nC, baseDepth = compositeValues(baseGlyph, depth + 1)
+                    maxDepth = max(maxDepth, baseDepth)
+                nPoints += nP
+                nContours += nC
+            return nPoints, nContours, maxDepth
+
+        for glyphName in self.glyphOrder:
+            glyph = glyf.glyphs[glyphName]
+            if glyphName in simpleValues or not glyph.isComposite():
+                continue
+            nPoints, nContours, depth = compositeValues(glyph, 1)
+            maxCompositePoints = max(maxCompositePoints, nPoints)
+            maxCompositeContours = max(maxCompositeContours, nContours)
+            maxComponentElements = max(maxComponentElements, len(glyph.components))
+            maxComponentDepth = max(maxComponentDepth, depth)
+        maxp.numGlyphs = len(self.glyphOrder)
+        maxp.maxPoints = maxPoints
+        maxp.maxContours = maxContours
+        maxp.maxCompositePoints = maxCompositePoints
+        maxp.maxCompositeContours = maxCompositeContours
+        maxp.maxComponentElements = maxComponentElements
+        maxp.maxComponentDepth = maxComponentDepth
+
+        if "head" in self.otf and "hmtx" in self.otf:
+            hmtx = self.otf["hmtx"]
+            allXMinIsLsb = True
+            for glyphName in self.glyphOrder:
+                if not _glyphNumberOfContours(glyf.glyphs[glyphName]):
+                    continue
+                bounds = self.glyphBoundingBoxes[glyphName]
+                if hmtx[glyphName][1] != (bounds.xMin if bounds else 0):
+                    allXMinIsLsb = False
+                    break
+            head = self.otf["head"]
+            if allXMinIsLsb:
+                head.flags |= 0x2
+            else:
+                head.flags &= ~0x2
 
     # NOTE: the previous 'autoUseMyMetrics' method was moved to the InstructionCompiler
     # This property setter is kept for backward compatibility to support the relatively
@@ -1881,6 +2351,87 @@ class OutlineTTFCompiler(BaseOutlineCompiler):
         self._autoUseMyMetrics = bool(value)
 
 
+class _PreviousTTGlyphs(Mapping):
+    """The glyphs of a previous build's glyf table, to be reused in a new one.
+
+    The simple glyphs are returned as they are, without decompiling them. The
+    composite glyphs are decompiled, as they refer to their components by
+    glyph ID in the previous glyph order.
+    """
+
+    def __init__(self, glyf):
+        self.glyf = glyf
+
+    def __getitem__(self, glyphName):
+        glyph = self.glyf.glyphs[glyphName]
+        if glyph.isComposite():
+            glyph = self.glyf[glyphName]
+        return glyph
+
+    def __contains__(self, glyphName):
+        return glyphName in self.glyf.glyphs
+
+    def __iter__(self):
+        return iter(self.glyf.glyphs)
+
+    def __len__(self):
+        return len(self.glyf.glyphs)
+
+
+def _glyphNumberOfContours(glyph):
+    # return the numberOfContours of a TrueType glyph, reading it from its
+    # data if it's not decompiled
+    data = getattr(glyph, "data", None)
+    if data is None:
+        return glyph.numberOfContours
+    if not data:
+        return 0
+    return struct.unpack(">h", data[:2])[0]
+
+
+def _simpleGlyphMaxpValues(glyph):
+    # return (nPoints, nContours) of a simple TrueType glyph, reading them
+    # from its data if it's not decompiled; None if empty or composite
+    data = getattr(glyph, "data", None)
+    if data is None:
+        if glyph.numberOfContours > 0:
+            return glyph.getMaxpValues()
+        return None
+    (numberOfContours,) = struct.unpack(">h", data[:2])
+    if numberOfContours <= 0:
+        return None
+    # the header is followed by the end points of the contours
+    offset = 10 + 2 * (numberOfContours - 1)
+    (lastPoint,) = struct.unpack(">H", data[offset : offset + 2])
+    return lastPoint + 1, numberOfContours
+
+
+def _compiledGlyphBounds(glyph):
+    # return the BoundingBox of a TrueType glyph loaded from the cache, from
+    # its header while it is still compiled; None if empty. It may already be
+    # expanded by a composite glyph using it, with its bounds recalculated
+    if not hasattr(glyph, "data"):
+        bounds = BoundingBox(glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax)
+    elif not glyph.data:
+        return None
+    else:
+        bounds = BoundingBox(*struct.unpack(">4h", glyph.data[2:10]))
+    return None if bounds == EMPTY_BOUNDING_BOX else bounds
+
+
+def _expandBaseGlyphs(glyph, ttGlyphs):
+    # decompile the base glyphs of a composite glyph, which may be simple
+    # glyphs reused from a previous build
+    for component in glyph.components:
+        baseGlyph = ttGlyphs.get(component.glyphName)
+        if baseGlyph is None:
+            continue
+        if baseGlyph.isComposite():
+            _expandBaseGlyphs(baseGlyph, ttGlyphs)
+        else:
+            baseGlyph.expand(ttGlyphs)
+
+
 class StubGlyph:
     """
     This object will be used to create missing glyphs
@@ -3,6 +3,7 @@ from __future__ import annotations
 import itertools
 from typing import TYPE_CHECKING
 
+from ufo2ft.buildReport import reportSpan
 from ufo2ft.constants import (
     _PRELIMINARY_CATEGORIES_KEY,
     COLOR_LAYER_MAPPING_KEY,
@@ -11,13 +12,21 @@ from ufo2ft.constants import (
     OPENTYPE_CATEGORIES_KEY,
 )
 from ufo2ft.filters import isValidFilter, loadFilters
-from ufo2ft.filters.base import BaseFilter, BaseIFilter
+from ufo2ft.filters.base import BaseFilter, BaseIFilter, runFilters
 from ufo2ft.filters.decomposeComponents import (
     DecomposeComponentsFilter,
     DecomposeComponentsIFilter,
 )
 from ufo2ft.fontInfoData import getAttrWithFallback
-from ufo2ft.util import _GlyphSet, _hasOverflowingComponentTransforms, zip_strict
+from ufo2ft.util import (
+    _CompactGlyphSet,
+    _CopyOnWriteGlyphSet,
+    _GlyphSet,
+    _hasOverflowingComponentTransforms,
+    _LazyGlyphSet,
+    _readOnlyGlyphSet,
+    zip_strict,
+)
 
 if TYPE_CHECKING:
     from ufo2ft.instantiator import Instantiator
@@ -49,6 +58,86 @@ def _load_custom_filters(ufo, filters=None):
     return result
 
 
+def _makeGlyphSet(
+    ufo,
+    layerName=None,
+    inplace=False,
+    skipExportGlyphs=None,
+    compactGlyphs=False,
+    lazyGlyphs=False,
+):
+    # Unless we modify the UFO in place, glyphs are copied lazily, only when
+    # some filter modifies them; or all at once to compact glyphs if requested;
+    # or they are read from disk when needed.
+    if inplace:
+        return _GlyphSet.from_layer(ufo, layerName, skipExportGlyphs=skipExportGlyphs)
+    if lazyGlyphs:
+        return _LazyGlyphSet.from_layer(
+            ufo, layerName, skipExportGlyphs=skipExportGlyphs
+        )
+    if compactGlyphs:
+        return _CompactGlyphSet.from_layer(
+            ufo, layerName, skipExportGlyphs=skipExportGlyphs
+        )
+    return _CopyOnWriteGlyphSet.from_layer(
+        ufo, layerName, skipExportGlyphs=skipExportGlyphs
+    )
+
+
+def _restrictGlyphSet(glyphSet, glyphNames):
+    # Remove the glyphs other than glyphNames and their (nested) components.
+    glyphs = _readOnlyGlyphSet(glyphSet)
+    keep = set()
+    stack = [name for name in glyphNames if name in glyphs]
+    while stack:
+        glyphName = stack.pop()
+        if glyphName in keep:
+            continue
+        keep.add(glyphName)
+        stack.extend(
+            component.baseGlyph
+            for component in glyphs[glyphName].components
+            if component.baseGlyph in glyphs
+        )
+    for glyphName in [name for name in glyphs.keys() if name not in keep]:
+        del glyphSet[glyphName]
+
+
+def _canFuse(func):
+    # Filters that run on each glyph on its own, without any custom __call__.
+    return (
+        isinstance(func, BaseFilter)
+        and not isinstance(func, BaseIFilter)
+        and type(func).__call__ is BaseFilter.__call__
+    )
+
+
+def _groupFilters(funcs):
+    # Group the consecutive filters that can run in a single pass over the glyph
+    # set: any filter can start a group, the following ones must be fusable.
+    groups = []
+    for func in funcs:
+        if groups and _canFuse(func) and func._fusable and _canFuse(groups[-1][0]):
+            groups[-1].append(func)
+        else:
+            groups.append([func])
+    return groups
+
+
+def _releaseGlyphs(glyphSet):
+    # Drop the unmodified outlines that were read from disk by the last filter.
+    if isinstance(glyphSet, _LazyGlyphSet):
+        glyphSet.release()
+
+
+def _freezeGlyphSet(glyphSet):
+    # Return a plain glyph set from a copy-on-write one once filtering is done,
+    # so that the compilers reading from it don't trigger any more copies.
+    if isinstance(glyphSet, _CopyOnWriteGlyphSet):
+        return glyphSet.freeze()
+    return glyphSet
+
+
 class BasePreProcessor:
     """Base class for objects that performs pre-processing operations on
     the UFO glyphs, such as decomposing composites, removing overlaps, or
@@ -56,8 +145,29 @@ class BasePreProcessor:
 
     By default the input UFO is **not** modified. The ``process`` method
     returns a dictionary containing the new modified glyphset, keyed by
-    glyph name. If ``inplace`` is True, the input UFO is modified directly
-    without the need to first copy the glyphs.
+    glyph name. Only the glyphs that the filters modify are copied, the
+    others are shared with the input UFO and must not be modified.
+    If ``inplace`` is True, the input UFO is modified directly without the
+    need to copy any glyphs.
+
+    If ``compactGlyphs`` is True (and ``inplace`` is False), all the glyphs
+    are converted upfront to ``ufo2ft.compactGlyph.CompactGlyph`` objects,
+    which store outlines as flat arrays and use much less memory than defcon
+    or ufoLib2 glyphs. Filters must then only use the glyph API these support.
+
+    If ``lazyGlyphs`` is True (and ``inplace`` is False), the glyphs are not
+    taken from the font object but read as compact glyphs from the UFO on disk
+    (at ``ufo.path``), only when they are first accessed; the outlines of the
+    glyphs that weren't modified are dropped after each filter is run, and
+    again after they are compiled. The font must not have unsaved changes.
+
+    If ``glyphNames`` is given, only those glyphs are preprocessed and returned,
+    together with the glyphs they use as components, which the filters may
+    read (e.g. to decompose them). The other glyphs are left out of the glyph
+    set, so that e.g. the glyphs modified since a previous build and the
+    composite glyphs using them can be preprocessed again on their own. This
+    is only equivalent to preprocessing all the glyphs if the filters only
+    read the glyphs they filter and their components.
 
     Subclasses can override the ``initDefaultFilters`` method and return
     a list of built-in filters which are performed in a predefined order,
@@ -87,15 +197,20 @@ class BasePreProcessor:
         skipExportGlyphs=None,
         preliminaryOpenTypeCategories=None,
         filters=None,
+        compactGlyphs=False,
+        lazyGlyphs=False,
+        glyphNames=None,
         **kwargs,
     ):
         self.ufo = ufo
         self.inplace = inplace
         self.layerName = layerName
         self.preliminaryOpenTypeCategories = preliminaryOpenTypeCategories
-        self.glyphSet = _GlyphSet.from_layer(
-            ufo, layerName, copy=not inplace, skipExportGlyphs=skipExportGlyphs
+        self.glyphSet = _makeGlyphSet(
+            ufo, layerName, inplace, skipExportGlyphs, compactGlyphs, lazyGlyphs
         )
+        if glyphNames is not None:
+            _restrictGlyphSet(self.glyphSet, glyphNames)
         self.defaultFilters = self.initDefaultFilters(**kwargs)
 
         filters = _load_custom_filters(ufo, filters)
@@ -112,11 +227,16 @@ class BasePreProcessor:
         if preliminary and not ufo.lib.get(OPENTYPE_CATEGORIES_KEY):
             ufo.lib[_PRELIMINARY_CATEGORIES_KEY] = preliminary
         try:
-            for func in self.preFilters + self.defaultFilters + self.postFilters:
-                func(ufo, glyphSet)
+            funcs = self.preFilters + self.defaultFilters + self.postFilters
+            for group in _groupFilters(funcs):
+                if len(group) > 1:
+                    runFilters(group, ufo, glyphSet)
+                else:
+                    group[0](ufo, glyphSet)
+                _releaseGlyphs(glyphSet)
         finally:
             ufo.lib.pop(_PRELIMINARY_CATEGORIES_KEY, None)
-        return glyphSet
+        return _freezeGlyphSet(glyphSet)
 
 
 def _init_explode_color_layer_glyphs_filter(ufo, filters):
@@ -149,9 +269,15 @@ class OTFPreProcessor(BasePreProcessor):
     By default, booleanOperations is used to remove overlaps. You can choose
     skia-pathops by setting ``overlapsBackend`` to the enum value
     ``RemoveOverlapsFilter.SKIA_PATHOPS``, or the string "pathops".
+
+    If a ``cache`` (ufo2ft.diskCache.DiskCache) is given, the contours without
+    overlaps are stored in it, and loaded from it in the next builds as long
+    as the glyphs' contours and the backend don't change.
     """
 
-    def initDefaultFilters(self, removeOverlaps=False, overlapsBackend=None):
+    def initDefaultFilters(
+        self, removeOverlaps=False, overlapsBackend=None, cache=None
+    ):
         filters = []
 
         _init_explode_color_layer_glyphs_filter(self.ufo, filters)
@@ -162,9 +288,11 @@ class OTFPreProcessor(BasePreProcessor):
             from ufo2ft.filters.removeOverlaps import RemoveOverlapsFilter
 
             if overlapsBackend is not None:
-                filters.append(RemoveOverlapsFilter(backend=overlapsBackend))
+                filters.append(
+                    RemoveOverlapsFilter(backend=overlapsBackend, cache=cache)
+                )
             else:
-                filters.append(RemoveOverlapsFilter())
+                filters.append(RemoveOverlapsFilter(cache=cache))
 
         return filters
 
@@ -203,6 +331,11 @@ class TTFPreProcessor(OTFPreProcessor):
     type "quadratic" is saved in font' lib under a private cu2qu key; the
     preprocessor will not try to convert them again if the curve type is
     already set to "quadratic".
+
+    If a ``cache`` (ufo2ft.diskCache.DiskCache) is given, the contours without
+    overlaps and the converted contours are stored in it, and loaded from it in
+    the next builds as long as the glyphs' contours and the backend or
+    conversion options don't change.
     """
 
     def initDefaultFilters(
@@ -215,6 +348,7 @@ class TTFPreProcessor(OTFPreProcessor):
         allQuadratic=True,
         reverseDirection=True,
         rememberCurveType=True,
+        cache=None,
     ):
         filters = []
 
@@ -242,9 +376,11 @@ class TTFPreProcessor(OTFPreProcessor):
             from ufo2ft.filters.removeOverlaps import RemoveOverlapsFilter
 
             if overlapsBackend is not None:
-                filters.append(RemoveOverlapsFilter(backend=overlapsBackend))
+                filters.append(
+                    RemoveOverlapsFilter(backend=overlapsBackend, cache=cache)
+                )
             else:
-                filters.append(RemoveOverlapsFilter())
+                filters.append(RemoveOverlapsFilter(cache=cache))
 
         if convertCubics:
             from ufo2ft.filters.cubicToQuadratic import CubicToQuadraticFilter
@@ -255,6 +391,7 @@ class TTFPreProcessor(OTFPreProcessor):
                     reverseDirection=reverseDirection,
                     rememberCurveType=rememberCurveType and self.inplace,
                     allQuadratic=allQuadratic,
+                    cache=cache,
                 )
             )
         elif reverseDirection:
@@ -275,6 +412,9 @@ class BaseInterpolatablePreProcessor:
     The optional `instantiator` can be used by filters to interpolate glyph
     instances (e.g. when decomposing composite glyphs defined at more or less
     source locations as some of their components' base glyphs).
+
+    The number of ``jobs`` is passed on to the interpolatable filters, which
+    can process the masters in as many processes.
     """
 
     def __init__(
@@ -286,11 +426,15 @@ class BaseInterpolatablePreProcessor:
         openTypeCategories=None,
         preliminaryOpenTypeCategories=None,
         filters=None,
+        compactGlyphs=False,
+        lazyGlyphs=False,
         *,
         instantiator: Instantiator | None = None,
+        jobs=1,
         **kwargs,
     ):
         self.ufos = ufos
+        self.jobs = jobs
         self.inplace = inplace
         self.openTypeCategories = openTypeCategories
         self.preliminaryOpenTypeCategories = preliminaryOpenTypeCategories
@@ -310,7 +454,13 @@ class BaseInterpolatablePreProcessor:
         # For each UFO, make a mapping of name to glyph object (and ensure it
         # contains none of the glyphs to be skipped, or any references to it).
         self.glyphSets = [
-            _GlyphSet.from_layer(ufo, layerName, copy=not inplace)
+            _makeGlyphSet(
+                ufo,
+                layerName,
+                inplace,
+                compactGlyphs=compactGlyphs,
+                lazyGlyphs=lazyGlyphs,
+            )
             for ufo, layerName in zip_strict(ufos, layerNames)
         ]
         if skipExportGlyphs:
@@ -337,7 +487,7 @@ class BaseInterpolatablePreProcessor:
         for filterses in (self.preFilters, self.defaultFilters, self.postFilters):
             for filters in itertools.zip_longest(*filterses):
                 self._run(*filters)
-        return self.glyphSets
+        return [_freezeGlyphSet(glyphSet) for glyphSet in self.glyphSets]
 
     def _update_instantiator(self):
         # the instantiator's source layers must be updated after each filter is run,
@@ -345,6 +495,10 @@ class BaseInterpolatablePreProcessor:
         if self.instantiator is not None:
             self.instantiator.replace_source_layers(self.glyphSets)
 
+    def _release_glyphs(self):
+        for glyphSet in self.glyphSets:
+            _releaseGlyphs(glyphSet)
+
     def _run_interpolatable(self, filter_: BaseIFilter) -> set[str]:
         # apply a single, interpolatable filter to all the glyphSets
         modified = filter_(
@@ -353,9 +507,11 @@ class BaseInterpolatablePreProcessor:
             self.instantiator,
             openTypeCategories=self.openTypeCategories,
             preliminaryOpenTypeCategories=self.preliminaryOpenTypeCategories,
+            jobs=self.jobs,
         )
         if modified:
             self._update_instantiator()
+        self._release_glyphs()
         return modified
 
     @staticmethod
@@ -423,6 +579,7 @@ class BaseInterpolatablePreProcessor:
                 modified |= filter_(ufo, glyphSet)
         if modified:
             self._update_instantiator()
+        self._release_glyphs()
         return modified
 
 
@@ -444,9 +601,12 @@ class TTFInterpolatablePreProcessor(BaseInterpolatablePreProcessor):
     be interpolation compatible, depending on the particular filter used or
     whether they are applied to only some vs all of the UFOs.
 
-    The ``conversionError``, ``reverseDirection``, ``flattenComponents`` and
-    ``rememberCurveType`` arguments work in the same way as in the
-    ``TTFPreProcessor``.
+    The ``conversionError``, ``reverseDirection``, ``flattenComponents``,
+    ``rememberCurveType`` and ``cache`` arguments work in the same way as in
+    the ``TTFPreProcessor``.
+
+    With more than one ``jobs``, the glyphs are also converted to quadratic
+    curves in as many processes.
     """
 
     def __init__(
@@ -464,8 +624,12 @@ class TTFInterpolatablePreProcessor(BaseInterpolatablePreProcessor):
         preliminaryOpenTypeCategories=None,
         filters=None,
         allQuadratic=True,
+        compactGlyphs=False,
+        lazyGlyphs=False,
         *,
         instantiator: Instantiator | None = None,
+        cache=None,
+        jobs=1,
         **kwargs,
     ):
         from fontTools.cu2qu.ufo import DEFAULT_MAX_ERR
@@ -478,7 +642,10 @@ class TTFInterpolatablePreProcessor(BaseInterpolatablePreProcessor):
             openTypeCategories=openTypeCategories,
             preliminaryOpenTypeCategories=preliminaryOpenTypeCategories,
             filters=filters,
+            compactGlyphs=compactGlyphs,
+            lazyGlyphs=lazyGlyphs,
             instantiator=instantiator,
+            jobs=jobs,
             **kwargs,
         )
         self.flattenComponents = flattenComponents
@@ -491,6 +658,7 @@ class TTFInterpolatablePreProcessor(BaseInterpolatablePreProcessor):
         self._reverseDirection = reverseDirection
         self._rememberCurveType = rememberCurveType
         self.allQuadratic = allQuadratic
+        self.cache = cache
 
     def process(self):
         from fontTools.cu2qu.ufo import fonts_to_quadratic
@@ -505,7 +673,7 @@ class TTFInterpolatablePreProcessor(BaseInterpolatablePreProcessor):
         needs_decomposition = {
             gname
             for glyphSet in self.glyphSets
-            for gname, glyph in glyphSet.items()
+            for gname, glyph in _readOnlyGlyphSet(glyphSet).items()
             if glyph.components
             and (len(glyph) > 0 or _hasOverflowingComponentTransforms(glyph))
         }
@@ -519,15 +687,33 @@ class TTFInterpolatablePreProcessor(BaseInterpolatablePreProcessor):
         for funcs in itertools.zip_longest(*self.defaultFilters):
             self._run(*funcs)
 
-        if self.convertCubics:
-            if fonts_to_quadratic(
-                self.glyphSets,
-                max_err=self._conversionErrors,
-                reverse_direction=self._reverseDirection,
-                dump_stats=True,
-                remember_curve_type=self._rememberCurveType and self.inplace,
-                all_quadratic=self.allQuadratic,
-            ):
+        rememberCurveType = self._rememberCurveType and self.inplace
+        if self.convertCubics and (self.cache is not None or self.jobs > 1):
+            from ufo2ft.filters.cubicToQuadratic import fontsToQuadratic
+
+            with reportSpan("fonts_to_quadratic", "filter"):
+                modified = fontsToQuadratic(
+                    self._glyphSetsWithContours(),
+                    self._conversionErrors,
+                    self._reverseDirection,
+                    self.allQuadratic,
+                    cache=self.cache,
+                    rememberCurveType=rememberCurveType,
+                    workers=self.jobs,
+                )
+            if modified:
+                self._update_instantiator()
+        elif self.convertCubics:
+            with reportSpan("fonts_to_quadratic", "filter"):
+                modified = fonts_to_quadratic(
+                    self._glyphSetsWithContours(),
+                    max_err=self._conversionErrors,
+                    reverse_direction=self._reverseDirection,
+                    dump_stats=True,
+                    remember_curve_type=rememberCurveType,
+                    all_quadratic=self.allQuadratic,
+                )
+            if modified:
                 self._update_instantiator()
         elif self._reverseDirection:
             from ufo2ft.filters.reverseContourDirection import (
@@ -545,7 +731,28 @@ class TTFInterpolatablePreProcessor(BaseInterpolatablePreProcessor):
         for funcs in itertools.zip_longest(*self.postFilters):
             self._run(*funcs)
 
-        return self.glyphSets
+        return [_freezeGlyphSet(glyphSet) for glyphSet in self.glyphSets]
+
+    def _glyphSetsWithContours(self):
+        # Only pass on the glyphs that have contours in at least one master, so
+        # that composite glyphs from copy-on-write glyph sets aren't needlessly
+        # copied by the curve conversion.
+        glyphNames = {
+            glyphName
+            for glyphSet in self.glyphSets
+            for glyphName, glyph in _readOnlyGlyphSet(glyphSet).items()
+            if len(glyph) > 0
+        }
+        result = []
+        for glyphSet in self.glyphSets:
+            subset = _GlyphSet(
+                (glyphName, glyphSet[glyphName])
+                for glyphName in glyphNames
+                if glyphName in glyphSet
+            )
+            subset.lib = glyphSet.lib
+            result.append(subset)
+        return result
 
     def check_for_nonmatching_components(self, needs_decomposition):
         # Look through all the glyphsets and if we find any glyphs
@@ -558,7 +765,9 @@ class TTFInterpolatablePreProcessor(BaseInterpolatablePreProcessor):
             if glyph in needs_decomposition:
                 continue  # We know there's an issue here
             layers = [
-                glyphset[glyph] for glyphset in self.glyphSets if glyph in glyphset
+                _readOnlyGlyphSet(glyphset)[glyph]
+                for glyphset in self.glyphSets
+                if glyph in glyphset
             ]
 
             # Skip early if there aren't any components
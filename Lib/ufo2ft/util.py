@@ -1,20 +1,23 @@
 from __future__ import annotations
 
+import hashlib
 import importlib
 import logging
+import os
 import re
+import struct
 import sys
 from copy import deepcopy
 from functools import partial
 from inspect import currentframe, getfullargspec
 from typing import Any, Mapping, NamedTuple, Set
 
-from fontTools import subset, ttLib, unicodedata
+from fontTools import ttLib, unicodedata
 from fontTools.designspaceLib import DesignSpaceDocument
-from fontTools.feaLib.builder import addOpenTypeFeatures
 from fontTools.misc.fixedTools import otRound
-from fontTools.misc.transform import Identity
+from fontTools.misc.transform import Identity, Transform
 from fontTools.pens.filterPen import DecomposingFilterPointPen, ReverseFlipped
+from fontTools.pens.pointPen import AbstractPointPen
 from fontTools.pens.reverseContourPen import ReverseContourPen
 from fontTools.pens.transformPen import TransformPen
 
@@ -22,7 +25,15 @@ from fontTools.pens.transformPen import TransformPen
 # old location of this function, which now lives in fontTools
 from fontTools.ttLib.tables.O_S_2f_2 import calcCodePageRanges  # noqa: F401
 
-from ufo2ft.constants import OPENTYPE_CATEGORIES_KEY, UNICODE_SCRIPT_ALIASES
+from ufo2ft.constants import (
+    COLOR_LAYER_MAPPING_KEY,
+    GLYPHS_MATH_VARIANTS_KEY,
+    OBJECT_LIBS_KEY,
+    OPENTYPE_CATEGORIES_KEY,
+    TRUETYPE_INSTRUCTIONS_KEY,
+    TRUETYPE_OVERLAP_KEY,
+    UNICODE_SCRIPT_ALIASES,
+)
 from ufo2ft.errors import InvalidDesignSpaceData, InvalidFontData
 from ufo2ft.fontInfoData import getAttrWithFallback
 
@@ -65,13 +76,30 @@ def decomposeCompositeGlyph(
     reverseFlipped=ReverseFlipped.ON_CURVE_FIRST,
     include=None,
     decomposeNested=True,
+    outlines=None,
 ):
-    """Decompose composite glyph in-place resolving references from glyphSet."""
+    """Decompose composite glyph in-place resolving references from glyphSet.
+
+    If `outlines` is a `_FlattenedOutlines` of the same glyphSet, the flattened
+    outlines of the base glyphs are reused between the composites that share
+    them. It is only used when decomposing all the components.
+    """
     if len(glyph.components) == 0:
         return
+    if outlines is not None and include is None:
+        try:
+            components = [
+                (component, outlines.get(component.baseGlyph))
+                for component in glyph.components
+            ]
+        except KeyError:
+            pass  # let the pen handle the missing components below
+        else:
+            outlines.draw(glyph, components, ReverseFlipped(reverseFlipped))
+            return
     pen = DecomposingFilterPointPen(
         glyph.getPointPen(),
-        glyphSet,
+        _readOnlyGlyphSet(glyphSet),
         reverseFlipped=reverseFlipped,
         include=include,
         decomposeNested=decomposeNested,
@@ -96,6 +124,87 @@ def decomposeCompositeGlyph(
         )
 
 
+class _FlattenedOutlines:
+    """Memoize the fully decomposed outlines of the glyphs in a glyphSet, so
+    that the base glyphs shared by many composites (e.g. the letters of the
+    accented letters) are only drawn once.
+
+    Each outline is a list of (contours, transformations) pairs, one for the
+    glyph itself and for each of its nested components: the contours are
+    those of the glyph at the end of the chain of component transformations.
+    Call `invalidate` when a glyph is modified.
+    """
+
+    def __init__(self, glyphSet):
+        self.glyphSet = _readOnlyGlyphSet(glyphSet)
+        self._outlines = {}
+
+    def get(self, glyphName):
+        """Return the flattened outline of a glyph; raise KeyError if it or
+        any of its nested components is missing."""
+        outline = self._outlines.get(glyphName)
+        if outline is None:
+            glyph = self.glyphSet[glyphName]
+            outline = []
+            contours = _getContours(glyph)
+            if contours:
+                outline.append((contours, ()))
+            for component in glyph.components:
+                transformation = component.transformation
+                outline.extend(
+                    (contours, (transformation,) + transformations)
+                    for contours, transformations in self.get(component.baseGlyph)
+                )
+            self._outlines[glyphName] = outline
+        return outline
+
+    def invalidate(self, glyphName):
+        self._outlines.pop(glyphName, None)
+
+    def draw(self, glyph, components, reverseFlipped):
+        # Replace the components with their flattened outlines, giving the same
+        # result as drawing them with a DecomposingFilterPointPen: the nested
+        # transformations are composed in the same order, and contours are
+        # reversed when the composed transformation is flipped.
+        from fontTools.pens.filterPen import OnCurveFirstPointPen
+        from fontTools.pens.pointPen import ReverseContourPointPen
+
+        outPen = glyph.getPointPen()
+        for component, outline in components:
+            for contours, transformations in outline:
+                transformation = component.transformation
+                for nested in transformations:
+                    if transformation != Identity:
+                        nested = Transform(*transformation).transform(nested)
+                    transformation = nested
+                pen = outPen
+                if reverseFlipped != ReverseFlipped.NO:
+                    a, b, c, d = transformation[:4]
+                    if a * d - b * c < 0:
+                        pen = ReverseContourPointPen(pen)
+                        if reverseFlipped == ReverseFlipped.ON_CURVE_FIRST:
+                            pen = OnCurveFirstPointPen(pen)
+                transformPoint = None
+                if transformation != Identity:
+                    transformPoint = Transform(*transformation).transformPoint
+                for identifier, points in contours:
+                    pen.beginPath(identifier=identifier)
+                    for x, y, segmentType, smooth, name, pointIdentifier in points:
+                        pt = (
+                            (x, y) if transformPoint is None else transformPoint((x, y))
+                        )
+                        pen.addPoint(
+                            pt, segmentType, smooth, name, identifier=pointIdentifier
+                        )
+                    pen.endPath()
+            glyph.removeComponent(component)
+            logger.debug(
+                "decomposed component '%s' in glyph '%s'",
+                component.baseGlyph,
+                glyph.name,
+            )
+
+
 def _hasOverflowingComponentTransforms(glyph):
     """Check if all component transform values fit in F2Dot14 range.
 
@@ -125,12 +234,8 @@ class _GlyphSet(dict):
         else:
             layer = font.layers.defaultLayer
 
-        if copy:
-            self = _copyLayer(layer, obj_type=cls)
-            self.lib = deepcopy(layer.lib)
-        else:
-            self = cls((g.name, g) for g in layer)
-            self.lib = layer.lib
+        self = cls._fromLayerGlyphs(font, layer, copy=copy)
+        self.lib = deepcopy(layer.lib) if copy else layer.lib
         self.name = layer.name if layerName is not None else None
 
         # If any glyphs in the skipExportGlyphs list are used as components, decompose
@@ -142,6 +247,214 @@ class _GlyphSet(dict):
 
         return self
 
+    @classmethod
+    def _fromLayerGlyphs(cls, font, layer, copy=False):
+        if copy:
+            return _copyLayer(layer, obj_type=cls)
+        return cls((g.name, g) for g in layer)
+
+
+class _CopyOnWriteGlyphSet(_GlyphSet):
+    """A glyph set that shares the glyph objects of a layer until modified.
+
+    Indexing the glyph set (or calling `get`, `values` or `items`) returns a
+    private copy of the glyph, made the first time it is accessed, so callers
+    can freely modify it without affecting the source layer. Glyphs assigned
+    to the glyph set are owned by it and are never copied.
+
+    Code that only needs to read glyphs should go through the `readOnly`
+    mapping instead, which returns the stored glyph objects (the original or
+    the private copy, whichever is current) without copying them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._copied = set()
+        self._glyphFactory = None
+        self.readOnly = _ReadOnlyGlyphs(self)
+
+    @classmethod
+    def from_layer(cls, font, layerName=None, skipExportGlyphs=None):
+        """Return a copy-on-write mapping of glyph names to glyph objects from
+        `font`. The layer lib is copied eagerly.
+        """
+        return super().from_layer(
+            font, layerName, copy=True, skipExportGlyphs=skipExportGlyphs
+        )
+
+    @classmethod
+    def _fromLayerGlyphs(cls, font, layer, copy=False):
+        return cls((g.name, g) for g in layer)
+
+    def _peek(self, name):
+        # return the current glyph object without copying it
+        return dict.__getitem__(self, name)
+
+    def __getitem__(self, name):
+        glyph = self._peek(name)
+        if name not in self._copied:
+            if self._glyphFactory is None:
+                self._glyphFactory = _getNewGlyphFactory(glyph)
+            glyph = _copyGlyph(glyph, glyphFactory=self._glyphFactory)
+            dict.__setitem__(self, name, glyph)
+            self._copied.add(name)
+        return glyph
+
+    def __setitem__(self, name, glyph):
+        dict.__setitem__(self, name, glyph)
+        self._copied.add(name)
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self._copied.discard(name)
+
+    def get(self, name, default=None):
+        if name in self:
+            return self[name]
+        return default
+
+    def pop(self, name, *default):
+        if name in self:
+            glyph = self[name]
+            del self[name]
+            return glyph
+        return dict.pop(self, name, *default)
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def isCopied(self, name):
+        """Return True if glyph `name` is owned by this glyph set, i.e. it was
+        copied from the source layer or assigned to the glyph set directly."""
+        return name in self._copied
+
+    def freeze(self):
+        """Return a plain _GlyphSet holding the current glyph objects.
+
+        Glyphs that were never modified are shared with the source layer, so
+        the returned glyph set must only be read from.
+        """
+        glyphSet = _GlyphSet(self.readOnly.items())
+        glyphSet.lib = self.lib
+        glyphSet.name = self.name
+        return glyphSet
+
+
+class _CompactGlyphSet(_GlyphSet):
+    """A glyph set holding CompactGlyph copies of the layer's glyphs."""
+
+    @classmethod
+    def from_layer(cls, font, layerName=None, skipExportGlyphs=None):
+        return super().from_layer(
+            font, layerName, copy=True, skipExportGlyphs=skipExportGlyphs
+        )
+
+    @classmethod
+    def _fromLayerGlyphs(cls, font, layer, copy=False):
+        from ufo2ft.compactGlyph import CompactGlyph
+
+        return cls((g.name, CompactGlyph.fromGlyph(g)) for g in layer)
+
+
+class _LazyGlyphSet(_CopyOnWriteGlyphSet):
+    """A glyph set reading the glyphs of a UFO layer from disk when accessed.
+
+    Glyphs are read with fontTools.ufoLib from the font's path, as CompactGlyph
+    objects, ignoring the glyph objects of the font itself; so the font must
+    not have unsaved changes.
+
+    Like for _CopyOnWriteGlyphSet, indexing the glyph set means the glyph is
+    going to be modified; there's no need to copy it, but the glyph is then
+    kept in memory for good. The outlines of the other glyphs can be released,
+    to be read again from disk only when they are drawn.
+
+    Once frozen, the glyph set is only read from, and indexing no longer keeps
+    glyphs in memory.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._glifReader = None
+        self._frozen = False
+
+    @classmethod
+    def _fromLayerGlyphs(cls, font, layer, copy=False):
+        from fontTools.ufoLib import UFOReader
+
+        if getattr(font, "path", None) is None:
+            raise ValueError("Can't read glyphs lazily from a font without a path")
+        self = cls(dict.fromkeys(layer.keys(), _NOT_LOADED))
+        self._glifReader = UFOReader(font.path, validate=False).getGlyphSet(
+            layer.name, validateRead=False
+        )
+        return self
+
+    def _peek(self, name):
+        glyph = dict.__getitem__(self, name)
+        if glyph is _NOT_LOADED:
+            from ufo2ft.compactGlyph import _LazyCompactGlyph
+
+            glyph = _LazyCompactGlyph(name, self._glifReader)
+            dict.__setitem__(self, name, glyph)
+        return glyph
+
+    def __getitem__(self, name):
+        glyph = self._peek(name)
+        if not self._frozen:
+            self._copied.add(name)
+        return glyph
+
+    def release(self, glyphNames=None):
+        """Drop the outlines of the given glyphs (by default all of them),
+        unless they were modified."""
+        if glyphNames is None:
+            glyphNames = self.keys()
+        for name in glyphNames:
+            if name in self._copied:
+                continue
+            glyph = dict.get(self, name)
+            if glyph is not None and glyph is not _NOT_LOADED:
+                glyph.releaseOutlines()
+
+    def freeze(self):
+        """Mark the glyph set as read-only, and return it."""
+        self._frozen = True
+        return self
+
+
+# placeholder for the glyphs of a _LazyGlyphSet that weren't read yet
+_NOT_LOADED = object()
+
+
+class _ReadOnlyGlyphs(Mapping):
+    """Read-only view of a _CopyOnWriteGlyphSet that never copies glyphs."""
+
+    __slots__ = ("_glyphSet",)
+
+    def __init__(self, glyphSet):
+        self._glyphSet = glyphSet
+
+    def __getitem__(self, name):
+        return self._glyphSet._peek(name)
+
+    def __contains__(self, name):
+        return name in self._glyphSet
+
+    def __iter__(self):
+        return iter(self._glyphSet)
+
+    def __len__(self):
+        return len(self._glyphSet)
+
+
+def _readOnlyGlyphSet(glyphSet):
+    """Return a mapping for reading glyphs from `glyphSet` without triggering
+    copy-on-write; plain glyph sets are returned as is."""
+    return getattr(glyphSet, "readOnly", glyphSet)
+
 
 def _copyLayer(layer, obj_type=dict):
     try:
@@ -178,8 +491,9 @@ def _getNewGlyphFactory(glyph):
     return newGlyph
 
 
-def _copyGlyph(glyph, glyphFactory=None, reverseContour=False):
-    # copy everything except unused attributes: 'guidelines', 'note', 'image'
+def _copyGlyph(glyph, glyphFactory=None, reverseContour=False, contours=True):
+    # copy everything except unused attributes: 'guidelines', 'note', 'image';
+    # with contours=False, the contours (about to be replaced) are left out
     if glyphFactory is None:
         glyphFactory = _getNewGlyphFactory(glyph)
 
@@ -196,11 +510,58 @@ def _copyGlyph(glyph, glyphFactory=None, reverseContour=False):
 
         pointPen = ReverseContourPointPen(pointPen)
 
-    glyph.drawPoints(pointPen)
+    if contours:
+        glyph.drawPoints(pointPen)
+    else:
+        for component in glyph.components:
+            pointPen.addComponent(
+                component.baseGlyph,
+                component.transformation,
+                identifier=component.identifier,
+            )
 
     return copy
 
 
+class _ContoursPen(AbstractPointPen):
+    # record the contours drawn into it as JSON-serializable lists, ignoring
+    # the components
+
+    def __init__(self):
+        self.contours = []
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._points = []
+        self.contours.append([identifier, self._points])
+
+    def endPath(self):
+        pass
+
+    def addPoint(
+        self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs
+    ):
+        self._points.append([pt[0], pt[1], segmentType, smooth, name, identifier])
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        pass
+
+
+def _getContours(glyph):
+    pen = _ContoursPen()
+    glyph.drawPoints(pen)
+    return pen.contours
+
+
+def _setContours(glyph, contours):
+    glyph.clearContours()
+    pen = glyph.getPointPen()
+    for identifier, points in contours:
+        pen.beginPath(identifier=identifier)
+        for x, y, segmentType, smooth, name, pointIdentifier in points:
+            pen.addPoint((x, y), segmentType, smooth, name, identifier=pointIdentifier)
+        pen.endPath()
+
+
 def _setGlyphMargin(glyph, side, margin):
     # defcon.Glyph has @property setters for the margins, whereas ufoLib2.Glyph
     # has regular instance methods
@@ -297,6 +658,8 @@ def compileGSUB(featureFile, glyphOrder, fvar=None):
     """Compile and return a GSUB table from `featureFile` (feaLib
     FeatureFile), using the given `glyphOrder` (list of glyph names).
     """
+    from fontTools.feaLib.builder import addOpenTypeFeatures
+
     font = ttLib.TTFont()
     font.setGlyphOrder(glyphOrder)
     if fvar:
@@ -310,6 +673,7 @@ def compileGDEF(featureFile, glyphOrder):
     using the given `glyphOrder` (list of glyph names).
     """
     from fontTools.feaLib.ast import TableBlock
+    from fontTools.feaLib.builder import addOpenTypeFeatures
 
     font = ttLib.TTFont()
     font.setGlyphOrder(glyphOrder)
@@ -331,6 +695,9 @@ def closeGlyphsOverGSUB(gsub, glyphs):
     in-place adding all the glyph names that can be reached via GSUB
     substitutions from this initial set.
     """
+    # the subsetter imports fontTools.varLib, which is slow to import
+    from fontTools import subset
+
     subsetter = subset.Subsetter()
     subsetter.glyphs = glyphs
     gsub.closure_glyphs(subsetter)
@@ -611,6 +978,185 @@ def getMaxComponentDepth(
     return maxComponentDepth
 
 
+def makeComponentIndex(glyphSets):
+    """Return a dict mapping glyph names to the set of names of the glyphs which
+    use them directly as components, in any of the given glyph sets.
+
+    This lets one find the composites referencing some glyphs without looking
+    at every glyph again for each of them.
+    """
+    usedBy = {}
+    for glyphSet in glyphSets:
+        glyphs = _readOnlyGlyphSet(glyphSet)
+        for glyphName in glyphs.keys():
+            for component in glyphs[glyphName].components:
+                usedBy.setdefault(component.baseGlyph, set()).add(glyphName)
+    return usedBy
+
+
+# the glyph lib keys which affect how a glyph is compiled, included in the
+# glyph fingerprints by default
+GLYPH_FINGERPRINT_LIB_KEYS = frozenset(
+    [
+        COLOR_LAYER_MAPPING_KEY,
+        GLYPHS_MATH_VARIANTS_KEY,
+        OBJECT_LIBS_KEY,
+        TRUETYPE_INSTRUCTIONS_KEY,
+        TRUETYPE_OVERLAP_KEY,
+        "public.verticalOrigin",
+    ]
+)
+
+_SEGMENT_TYPES = {
+    None: b"o",
+    "move": b"m",
+    "line": b"l",
+    "curve": b"c",
+    "qcurve": b"q",
+}
+_packPoint = struct.Struct("<2d").pack
+_packTransform = struct.Struct("<6d").pack
+
+
+class _FingerprintPointPen(AbstractPointPen):
+    """Serialize the contours and components drawn into it, the same way
+    whether the coordinates are ints or floats."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.baseGlyphs = []
+
+    def beginPath(self, identifier=None, **kwargs):
+        self.data += b"("
+
+    def endPath(self):
+        self.data += b")"
+
+    def addPoint(
+        self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs
+    ):
+        data = self.data
+        data += _packPoint(*pt)
+        data += _SEGMENT_TYPES.get(segmentType) or segmentType.encode("utf-8")
+        if smooth:
+            data += b"s"
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        data = self.data
+        data += b"[%s\0" % baseGlyphName.encode("utf-8")
+        data += _packTransform(*transformation)
+        if identifier is not None:
+            data += identifier.encode("utf-8")
+        data += b"]"
+        self.baseGlyphs.append(baseGlyphName)
+
+
+def _stableRepr(value):
+    # the repr of a plist value, regardless of the order of the dict keys and
+    # of whether whole numbers are ints or floats
+    if isinstance(value, Mapping):
+        items = ",".join(
+            f"{key!r}:{_stableRepr(item)}" for key, item in sorted(value.items())
+        )
+        return "{" + items + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_stableRepr(item) for item in value) + "]"
+    if isinstance(value, float) and value.is_integer():
+        return repr(int(value))
+    return repr(value)
+
+
+class GlyphFingerprinter:
+    """Compute fingerprints of glyphs: digests of everything in them which
+    matters when compiling a font, i.e. their contours, components, anchors,
+    advance width and height, unicodes, and the values of the given glyph lib
+    keys.
+
+    The glyphs are hashed through a point pen, so the fingerprints only depend
+    on the glyphs' content, not on their class, nor on the glyph name; but the
+    fingerprint of a composite glyph includes those of its components' base
+    glyphs, like the hashes of a Merkle tree, so it changes when any of the
+    glyphs it's made of changes. Whole numbers give the same fingerprints
+    whether they're ints or floats.
+
+    The fingerprints are computed once for each glyph: the glyph set must not
+    be modified while the fingerprinter is in use.
+
+    >>> fingerprinter = GlyphFingerprinter(glyphSet)  # doctest: +SKIP
+    >>> fingerprinter.fingerprint("Aacute").hex()  # doctest: +SKIP
+    'a1f7c0ffee...'
+    """
+
+    digestSize = 16
+    # changed when the fingerprints of the same glyphs change
+    version = b"ufo2ft.glyph.1"
+
+    def __init__(self, glyphSet, libKeys=GLYPH_FINGERPRINT_LIB_KEYS):
+        self.glyphSet = glyphSet
+        # don't make copy-on-write glyph sets copy the glyphs
+        self._glyphs = getattr(glyphSet, "readOnly", glyphSet)
+        self.libKeys = frozenset(libKeys)
+        self._fingerprints = {}
+        self._stack = []
+
+    def fingerprint(self, glyphName):
+        """Return the fingerprint of the glyph, as bytes.
+
+        Missing glyphs (e.g. the missing base glyph of a component) have a
+        fingerprint too, which only depends on their name.
+
+        Raises InvalidFontData if a cyclical component reference is detected.
+        """
+        fingerprint = self._fingerprints.get(glyphName)
+        if fingerprint is not None:
+            return fingerprint
+        if glyphName not in self._glyphs:
+            h = hashlib.blake2b(digest_size=self.digestSize, person=self.version)
+            h.update(b"missing:%s" % glyphName.encode("utf-8"))
+            return h.digest()
+        if glyphName in self._stack:
+            raise InvalidFontData(
+                f"cyclical component reference:"
+                f" {' -> '.join(self._stack)} => {glyphName}"
+            )
+        self._stack.append(glyphName)
+        try:
+            h, baseGlyphs = self._hashGlyph(self._glyphs[glyphName])
+            for baseGlyph in baseGlyphs:
+                h.update(self.fingerprint(baseGlyph))
+        finally:
+            self._stack.pop()
+        fingerprint = self._fingerprints[glyphName] = h.digest()
+        return fingerprint
+
+    def _hashGlyph(self, glyph):
+        pen = _FingerprintPointPen()
+        glyph.drawPoints(pen)
+        data = pen.data
+        data += _packPoint(glyph.width, glyph.height)
+        unicodes = glyph.unicodes
+        if unicodes:
+            data += struct.pack(f"<{len(unicodes)}I", *unicodes)
+        for anchor in glyph.anchors:
+            data += b"<%s\0" % (anchor.name or "").encode("utf-8")
+            data += _packPoint(anchor.x, anchor.y)
+        lib = glyph.lib
+        if lib:
+            for key in sorted(self.libKeys.intersection(lib.keys())):
+                data += f"{key!r}:{_stableRepr(lib[key])};".encode("utf-8")
+        h = hashlib.blake2b(data, digest_size=self.digestSize, person=self.version)
+        return h, pen.baseGlyphs
+
+
+def fingerprintGlyphs(glyphSet, glyphNames=None, libKeys=GLYPH_FINGERPRINT_LIB_KEYS):
+    """Return the fingerprints of the glyphs, keyed by glyph name (see
+    GlyphFingerprinter); by default of all the glyphs in the glyph set."""
+    if glyphNames is None:
+        glyphNames = glyphSet.keys()
+    fingerprinter = GlyphFingerprinter(glyphSet, libKeys)
+    return {glyphName: fingerprinter.fingerprint(glyphName) for glyphName in glyphNames}
+
+
 def location_to_string(location):
     """Reports a designspace location (dictionary mapping axis:loc)
     in a user-friendly way"""
@@ -630,6 +1176,99 @@ def unicodeScriptExtensions(
     return {aliases.get(s, s) for s in unicodedata.script_extension(chr(codepoint))}
 
 
+def _currentMemoryUsage() -> int | None:
+    """Return the current resident set size of the current process in bytes.
+
+    On Linux this reads /proc; elsewhere it asks psutil if it is installed, or
+    else the operating system: task_info on macOS, GetProcessMemoryInfo on
+    Windows. Returns None if the current (rather than peak) resident set size
+    can't be read.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            rssPages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        pass
+    else:
+        return rssPages * os.sysconf("SC_PAGE_SIZE")
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+    try:
+        if sys.platform == "darwin":
+            return _darwinMemoryUsage()
+        if sys.platform == "win32":
+            return _windowsMemoryUsage()
+    except (OSError, AttributeError, ValueError):
+        pass
+    return None
+
+
+def _darwinMemoryUsage():
+    import ctypes
+    import ctypes.util
+
+    class MachTaskBasicInfo(ctypes.Structure):
+        _fields_ = [
+            ("virtual_size", ctypes.c_uint64),
+            ("resident_size", ctypes.c_uint64),
+            ("resident_size_max", ctypes.c_uint64),
+            ("user_time", ctypes.c_int32 * 2),
+            ("system_time", ctypes.c_int32 * 2),
+            ("policy", ctypes.c_int32),
+            ("suspend_count", ctypes.c_int32),
+        ]
+
+    MACH_TASK_BASIC_INFO = 20
+    libc = ctypes.CDLL(ctypes.util.find_library("c"))
+    info = MachTaskBasicInfo()
+    count = ctypes.c_uint32(ctypes.sizeof(info) // 4)
+    task = ctypes.c_uint32.in_dll(libc, "mach_task_self_")
+    result = libc.task_info(
+        task, MACH_TASK_BASIC_INFO, ctypes.byref(info), ctypes.byref(count)
+    )
+    return info.resident_size if result == 0 else None
+
+
+def _windowsMemoryUsage():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.WinDLL("kernel32")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    getProcessMemoryInfo = kernel32.K32GetProcessMemoryInfo
+    getProcessMemoryInfo.argtypes = [
+        wintypes.HANDLE,
+        ctypes.POINTER(ProcessMemoryCounters),
+        wintypes.DWORD,
+    ]
+    getProcessMemoryInfo.restype = wintypes.BOOL
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    if not getProcessMemoryInfo(
+        kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+    ):
+        return None
+    return counters.WorkingSetSize
+
+
 def describe_ufo(ufo: Any) -> str:
     """Returns a description of a UFO suitable for logging."""
     if (
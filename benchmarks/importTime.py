@@ -0,0 +1,130 @@
+"""Measure how long it takes to import ufo2ft and its compilers.
+
+Each module is imported in a fresh interpreter a number of times, and the
+median wall time is reported, minus that of starting an interpreter which
+imports nothing. The modules imported as a side effect which take the longest
+(according to ``python -X importtime``) are listed too, to find out what to
+import lazily.
+
+With ``--max-ms``, exit with an error if importing ufo2ft takes longer.
+
+Usage:
+
+    python -m benchmarks.importTime [--repeat N] [--output results.json]
+        [--max-ms MS]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import fontTools
+
+import ufo2ft
+
+from .run import _gitRevision
+
+MODULES = [
+    "ufo2ft",
+    "ufo2ft.__main__",
+    "ufo2ft._compilers.ttfCompiler",
+    "ufo2ft._compilers.otfCompiler",
+    "ufo2ft._compilers.variableTTFsCompiler",
+    "ufo2ft._compilers.variableCFF2sCompiler",
+]
+
+
+def _run(code, *options):
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return time.perf_counter() - start, process.stderr
+
+
+def timeImport(module, repeat=5):
+    """Return the median time in seconds to import the module in a new
+    interpreter, including the interpreter startup."""
+    return statistics.median(_run(f"import {module}")[0] for _ in range(repeat))
+
+
+def slowestImports(module, n=10):
+    """Return the n modules imported by the given one which took the longest,
+    as (cumulative microseconds, module name) tuples."""
+    _, output = _run(f"import {module}", "-X", "importtime")
+    times = []
+    for line in output.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times.append((int(cumulative), name.strip()))
+        except ValueError:
+            # the header
+            continue
+    times.sort(reverse=True)
+    return [t for t in times if t[1] != module][:n]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="JSON file (default: stdout)")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        help="fail if importing ufo2ft takes longer than this many milliseconds",
+    )
+    options = parser.parse_args(args)
+
+    baseline = timeImport("sys", options.repeat)
+    results = []
+    for module in MODULES:
+        seconds = timeImport(module, options.repeat) - baseline
+        results.append(
+            {
+                "module": module,
+                "time": seconds,
+                "slowestImports": [
+                    {"module": name, "time": micros / 1e6}
+                    for micros, name in slowestImports(module)
+                ],
+            }
+        )
+
+    report = {
+        "revision": _gitRevision(),
+        "ufo2ft": ufo2ft.__version__,
+        "fontTools": fontTools.version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "startup": baseline,
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if options.max_ms is not None:
+        milliseconds = results[0]["time"] * 1000
+        if milliseconds > options.max_ms:
+            parser.exit(
+                1,
+                f"importing ufo2ft took {milliseconds:.0f} ms, "
+                f"more than {options.max_ms:.0f} ms\n",
+            )
+
+
+if __name__ == "__main__":
+    main()
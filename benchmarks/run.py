@@ -0,0 +1,289 @@
+"""Time the stages of the ufo2ft compilation pipeline on synthetic fonts.
+
+The fonts are generated with benchmarks.synthetic, then compiled a number of
+times to each of the requested formats. The wall time of the following stages
+is measured for each run: preprocess, each filter, compileGlyphs, each
+setupTable_* method of the outline compiler, each feature writer, the feaLib
+build, postprocess and the varLib merge. Stages are timed inclusively: e.g.
+the filters' times are part of the preprocess time.
+
+The results are written as JSON, to compare them across commits.
+
+Usage:
+
+    python -m benchmarks.run [--format ttf otf variable-ttf] [--repeat N]
+        [--output results.json] [--glyphs N] [--masters N] ...
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import pkgutil
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from collections import Counter
+from contextlib import ExitStack
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import fontTools
+from fontTools.designspaceLib import DesignSpaceDocument
+
+import ufo2ft
+import ufo2ft.filters
+from ufo2ft._compilers.baseCompiler import BaseCompiler
+from ufo2ft._compilers.interpolatableOTFCompiler import InterpolatableOTFCompiler
+from ufo2ft._compilers.interpolatableTTFCompiler import InterpolatableTTFCompiler
+from ufo2ft.buildReport import BuildReport
+from ufo2ft.featureCompiler import BaseFeatureCompiler, MtiFeatureCompiler
+from ufo2ft.featureWriters import BaseFeatureWriter
+from ufo2ft.filters import BaseFilter, BaseIFilter
+from ufo2ft.outlineCompiler import (
+    BaseOutlineCompiler,
+    OutlineOTFCompiler,
+    OutlineTTFCompiler,
+)
+from ufo2ft.postProcessor import PostProcessor
+from ufo2ft.util import openFont
+
+from .synthetic import addParamsArguments, paramsFromArguments, saveFonts
+
+logger = logging.getLogger("benchmarks")
+
+FORMATS = {
+    "ttf": (ufo2ft.compileTTF, False),
+    "otf": (ufo2ft.compileOTF, False),
+    "variable-ttf": (ufo2ft.compileVariableTTF, True),
+    "variable-cff2": (ufo2ft.compileVariableCFF2, True),
+}
+
+
+def _allSubclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _allSubclasses(subclass)
+
+
+def _importAllFilters():
+    # the filters are imported on demand, make sure all of them are patched
+    for module in pkgutil.iter_modules(ufo2ft.filters.__path__):
+        if module.name.startswith("_"):
+            continue
+        with warnings.catch_warnings():
+            # ignore the deprecated aliases
+            warnings.simplefilter("ignore")
+            importlib.import_module(f"ufo2ft.filters.{module.name}")
+
+
+class StageTimer:
+    """Record the time spent in the stages of the pipeline, by temporarily
+    wrapping the methods implementing them.
+
+    The filters which the preprocessors fuse into a single pass over the glyphs
+    are not called, their times are read from the build report instead (see
+    `addFusedFilters`)."""
+
+    def __init__(self):
+        self.stages = {}
+        self._active = Counter()
+
+    def _wrap(self, func, stageName):
+        def wrapper(obj, *args, **kwargs):
+            name = stageName(obj)
+            # overridden methods calling super() are timed only once
+            if self._active[name]:
+                return func(obj, *args, **kwargs)
+            self._active[name] += 1
+            start = time.perf_counter()
+            try:
+                return func(obj, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self._active[name] -= 1
+                stage = self.stages.setdefault(name, {"time": 0.0, "calls": 0})
+                stage["time"] += elapsed
+                stage["calls"] += 1
+
+        return wrapper
+
+    def _patchMethods(self, stack, classes, attrs, stageName):
+        for cls in classes:
+            for attr, func in list(vars(cls).items()):
+                if attrs(attr) and callable(func):
+                    wrapper = self._wrap(func, stageName(attr))
+                    stack.enter_context(mock.patch.object(cls, attr, wrapper))
+
+    def patch(self, stack):
+        _importAllFilters()
+        self._patchMethods(
+            stack,
+            [BaseCompiler],
+            lambda attr: attr == "preprocess",
+            lambda attr: lambda obj: "preprocess",
+        )
+        self._patchMethods(
+            stack,
+            [
+                BaseFilter,
+                BaseIFilter,
+                *_allSubclasses(BaseFilter),
+                *_allSubclasses(BaseIFilter),
+            ],
+            lambda attr: attr == "__call__",
+            lambda attr: lambda obj: f"filter.{type(obj).__name__}",
+        )
+        self._patchMethods(
+            stack,
+            [BaseOutlineCompiler, OutlineOTFCompiler, OutlineTTFCompiler],
+            lambda attr: attr == "compileGlyphs" or attr.startswith("setupTable_"),
+            lambda attr: lambda obj: attr,
+        )
+        self._patchMethods(
+            stack,
+            [BaseFeatureWriter],
+            lambda attr: attr == "write",
+            lambda attr: lambda obj: f"featureWriter.{type(obj).__name__}",
+        )
+        self._patchMethods(
+            stack,
+            [BaseFeatureCompiler, *_allSubclasses(BaseFeatureCompiler)],
+            lambda attr: attr == "buildTables",
+            lambda attr: lambda obj: (
+                "mtiLib" if isinstance(obj, MtiFeatureCompiler) else "feaLib"
+            ),
+        )
+        self._patchMethods(
+            stack,
+            [PostProcessor],
+            lambda attr: attr == "process",
+            lambda attr: lambda obj: "postprocess",
+        )
+        self._patchMethods(
+            stack,
+            [InterpolatableOTFCompiler, InterpolatableTTFCompiler],
+            lambda attr: attr == "_merge",
+            lambda attr: lambda obj: "varLib.merge",
+        )
+
+    def addFusedFilters(self, report):
+        """Add the time of the filters which the preprocessors ran in a single
+        pass, without calling them, from the spans of the build report."""
+        for span in report.walk():
+            names = span.name.split("+")
+            if span.category != "filter" or len(names) < 2:
+                continue
+            for child in span.children:
+                if child.name in names:
+                    stage = self.stages.setdefault(
+                        f"filter.{child.name}", {"time": 0.0, "calls": 0}
+                    )
+                    stage["time"] += child.wallTime
+                    stage["calls"] += 1
+
+
+def _loadSource(path, isVariable):
+    if not path.endswith(".designspace"):
+        return openFont(path)
+    doc = DesignSpaceDocument.fromfile(path)
+    if not isVariable:
+        # compile the default master only
+        return openFont(doc.findDefault().path)
+    doc.loadSourceFonts(openFont)
+    return doc
+
+
+def runBenchmark(path, formatName, repeat=1):
+    """Compile the font at path (a UFO, or a designspace for variable formats)
+    the given number of times, and return a list of per-run results."""
+    compileFunc, isVariable = FORMATS[formatName]
+    results = []
+    for i in range(repeat):
+        # load the sources every time, so that no run benefits from the
+        # glyphs loaded by the previous ones
+        source = _loadSource(path, isVariable)
+        timer = StageTimer()
+        report = BuildReport()
+        with ExitStack() as stack:
+            timer.patch(stack)
+            start = time.perf_counter()
+            compileFunc(source, buildReport=report)
+            total = time.perf_counter() - start
+        timer.addFusedFilters(report)
+        logger.info("%s run %d: %.3fs", formatName, i + 1, total)
+        results.append(
+            {"format": formatName, "run": i, "total": total, "stages": timer.stages}
+        )
+    return results
+
+
+def _gitRevision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        choices=sorted(FORMATS),
+        default=None,
+        help="formats to compile (default: ttf and otf for one master, "
+        "variable-ttf and variable-cff2 for more)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="JSON file (default: stdout)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    addParamsArguments(parser)
+    options = parser.parse_args(args)
+    logging.basicConfig(level=logging.INFO if options.verbose else logging.WARNING)
+
+    params = paramsFromArguments(options)
+    formats = options.format
+    if formats is None:
+        if params.masters > 1:
+            formats = ["variable-ttf", "variable-cff2"]
+        else:
+            formats = ["ttf", "otf"]
+    for formatName in formats:
+        if FORMATS[formatName][1] and params.masters < 2:
+            parser.error(f"{formatName} requires --masters 2 or more")
+
+    results = []
+    with TemporaryDirectory(prefix="ufo2ft-benchmarks-") as tempDir:
+        path = saveFonts(params, tempDir)
+        for formatName in formats:
+            results.extend(runBenchmark(path, formatName, options.repeat))
+
+    report = {
+        "revision": _gitRevision(),
+        "ufo2ft": ufo2ft.__version__,
+        "fontTools": fontTools.version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": vars(params),
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
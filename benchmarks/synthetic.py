@@ -0,0 +1,294 @@
+"""Deterministic generator of synthetic UFOs and designspaces for benchmarking.
+
+The fonts are made of random but reproducible glyphs: the same parameters and
+seed always give the same fonts, so that timings can be compared across
+commits.
+
+Usage:
+
+    python -m benchmarks.synthetic OUTPUT_DIR [--glyphs N] [--masters N] ...
+"""
+
+import argparse
+import math
+import os
+import random
+import shutil
+from dataclasses import asdict, dataclass
+
+from fontTools.designspaceLib import AxisDescriptor, DesignSpaceDocument
+
+from ufo2ft.constants import OPENTYPE_CATEGORIES_KEY
+from ufo2ft.util import importUfoModule
+
+AXIS_MIN, AXIS_MAX = 100, 900
+
+
+@dataclass
+class SyntheticFontParams:
+    """Parameters of the synthetic fonts."""
+
+    # total number of glyphs, including composites and marks
+    glyphs: int = 1000
+    # number of contours per simple glyph
+    contours: int = 3
+    # number of curve segments per contour
+    curves: int = 4
+    # maximum nesting level of the composite glyphs (0 means no composites)
+    compositeDepth: int = 2
+    # share of the glyphs which are composites
+    compositeRatio: float = 0.3
+    # number of kerning pairs, between glyphs and groups
+    kerningPairs: int = 2000
+    # number of glyphs per kerning group
+    groupSize: int = 10
+    # number of base anchors per glyph
+    anchors: int = 2
+    # share of the glyphs which are marks
+    markRatio: float = 0.05
+    # number of masters; more than one makes a designspace
+    masters: int = 1
+    seed: int = 0
+
+
+_ANCHOR_NAMES = ("top", "bottom", "center", "topright", "ogonek", "horn")
+
+
+def _glyphNames(params):
+    # keep the names sortable so that the glyph order is the same as the
+    # generation order
+    width = len(str(params.glyphs))
+    return [".notdef", "space"] + [
+        f"g{i:0{width}d}" for i in range(max(0, params.glyphs - 2))
+    ]
+
+
+def _planGlyphs(params, rng):
+    """Decide the structure shared by all the masters: which glyphs are marks,
+    composites (and of what), and which anchors each glyph has."""
+    names = _glyphNames(params)
+    drawn = names[2:]
+    numMarks = int(len(drawn) * params.markRatio) if params.anchors else 0
+    marks = drawn[:numMarks]
+    anchorNames = _ANCHOR_NAMES[: max(1, min(params.anchors, len(_ANCHOR_NAMES)))]
+
+    levels = {}
+    # the glyphs that can be used as components without exceeding the depth
+    candidates = []
+    composites = {}
+    for name in drawn[numMarks:]:
+        if params.compositeDepth > 0 and rng.random() < params.compositeRatio:
+            if candidates:
+                bases = rng.sample(candidates, min(len(candidates), rng.randint(1, 3)))
+                composites[name] = bases
+                levels[name] = 1 + max(levels[b] for b in bases)
+                if marks:
+                    composites[name].append(rng.choice(marks))
+                if levels[name] < params.compositeDepth:
+                    candidates.append(name)
+                continue
+        levels[name] = 0
+        candidates.append(name)
+
+    anchors = {}
+    markSet = set(marks)
+    for name in drawn:
+        if name in markSet:
+            anchors[name] = ["_" + rng.choice(anchorNames)]
+        elif params.anchors:
+            anchors[name] = list(anchorNames[: params.anchors])
+    return names, marks, composites, anchors
+
+
+def _drawContours(glyph, params, rng, delta):
+    pen = glyph.getPen()
+    for _ in range(params.contours):
+        cx = rng.randint(100, 500) + delta
+        cy = rng.randint(100, 600)
+        radius = rng.randint(30, 150) + delta // 4
+        pen.moveTo((cx + radius, cy))
+        segments = max(1, params.curves)
+        for i in range(segments):
+            # go around an irregular polygon with cubic curves
+            angle0 = 2 * i / segments
+            angle1 = 2 * (i + 1) / segments
+            x0, y0 = _onCircle(cx, cy, radius, angle0)
+            x3, y3 = _onCircle(cx, cy, radius, angle1)
+            pen.curveTo(
+                (x0 + rng.randint(-20, 20), y0 + rng.randint(-20, 20)),
+                (x3 + rng.randint(-20, 20), y3 + rng.randint(-20, 20)),
+                (x3, y3) if i < segments - 1 else (cx + radius, cy),
+            )
+        pen.closePath()
+
+
+def _onCircle(cx, cy, radius, turns):
+    angle = math.pi * turns
+    return round(cx + radius * math.cos(angle)), round(cy + radius * math.sin(angle))
+
+
+def makeFont(params=None, master=0, ufo_module=None):
+    """Return a new synthetic font for the given master index."""
+    if params is None:
+        params = SyntheticFontParams()
+    if ufo_module is None:
+        ufo_module = importUfoModule()
+
+    # the structure is the same for all masters, only the coordinates vary
+    rng = random.Random(params.seed)
+    names, marks, composites, anchors = _planGlyphs(params, rng)
+    delta = master * 20
+
+    font = ufo_module.Font()
+    info = font.info
+    info.familyName = "Synthetic"
+    info.styleName = f"Master{master}"
+    info.unitsPerEm = 1000
+    info.ascender = 800
+    info.descender = -200
+    info.xHeight = 500
+    info.capHeight = 700
+
+    geometry = random.Random(f"{params.seed}-geometry")
+    for i, name in enumerate(names):
+        glyph = font.newGlyph(name)
+        glyph.width = 600 + delta
+        if name == ".notdef":
+            pen = glyph.getPen()
+            pen.moveTo((50, 0))
+            pen.lineTo((50, 700))
+            pen.lineTo((550, 700))
+            pen.lineTo((550, 0))
+            pen.closePath()
+            continue
+        if name == "space":
+            glyph.unicode = 0x20
+            continue
+        # assign codepoints in the supplementary private use area
+        glyph.unicode = 0xF0000 + i
+        if name in composites:
+            pointPen = glyph.getPointPen()
+            for j, base in enumerate(composites[name]):
+                pointPen.addComponent(base, (1, 0, 0, 1, j * 40 + delta, 0))
+        else:
+            _drawContours(glyph, params, geometry, delta)
+        for anchorName in anchors.get(name, ()):
+            glyph.appendAnchor(
+                {
+                    "name": anchorName,
+                    "x": geometry.randint(100, 500) + delta,
+                    "y": geometry.randint(-100, 800),
+                }
+            )
+
+    font.lib["public.glyphOrder"] = names
+    if marks:
+        categories = dict.fromkeys(names[2:], "base")
+        categories.update(dict.fromkeys(marks, "mark"))
+        font.lib[OPENTYPE_CATEGORIES_KEY] = categories
+
+    _makeKerning(font, names[2:], params, random.Random(f"{params.seed}-kerning"))
+    font.features.text = "languagesystem DFLT dflt;\n"
+    return font
+
+
+def _makeKerning(font, names, params, rng):
+    if not params.kerningPairs or not names:
+        return
+    size = max(1, params.groupSize)
+    groups = {}
+    for prefix in ("public.kern1.", "public.kern2."):
+        shuffled = list(names)
+        rng.shuffle(shuffled)
+        for i in range(0, len(shuffled), size):
+            groups[f"{prefix}group{i // size}"] = shuffled[i : i + size]
+    font.groups.update(groups)
+
+    firsts = [g for g in groups if g.startswith("public.kern1.")] + names
+    seconds = [g for g in groups if g.startswith("public.kern2.")] + names
+    kerning = {}
+    # stop early if there are fewer possible pairs than requested
+    for _ in range(params.kerningPairs * 2):
+        if len(kerning) >= params.kerningPairs:
+            break
+        pair = (rng.choice(firsts), rng.choice(seconds))
+        kerning[pair] = rng.randint(-100, 50)
+    font.kerning.update(kerning)
+
+
+def makeDesignSpace(params=None, ufo_module=None):
+    """Return a new DesignSpaceDocument with a 'wght' axis and one synthetic
+    font per master, spread evenly along the axis; the first is the default."""
+    if params is None:
+        params = SyntheticFontParams()
+    doc = DesignSpaceDocument()
+    axis = AxisDescriptor()
+    axis.name = "Weight"
+    axis.tag = "wght"
+    axis.minimum = axis.default = AXIS_MIN
+    axis.maximum = AXIS_MAX
+    doc.addAxis(axis)
+
+    masters = max(1, params.masters)
+    for i in range(masters):
+        location = AXIS_MIN + (AXIS_MAX - AXIS_MIN) * i // max(1, masters - 1)
+        doc.addSourceDescriptor(
+            name=f"master{i}",
+            familyName="Synthetic",
+            styleName=f"Master{i}",
+            location={"Weight": location},
+            font=makeFont(params, master=i, ufo_module=ufo_module),
+        )
+    return doc
+
+
+def saveFonts(params, directory, ufo_module=None):
+    """Write the synthetic fonts to the given directory, and return the path
+    of the designspace if more than one master is requested, else of the UFO."""
+    os.makedirs(directory, exist_ok=True)
+    if params.masters <= 1:
+        path = os.path.join(directory, "Synthetic.ufo")
+        font = makeFont(params, ufo_module=ufo_module)
+        _saveFont(font, path)
+        return path
+
+    doc = makeDesignSpace(params, ufo_module=ufo_module)
+    for source in doc.sources:
+        source.path = os.path.join(directory, f"Synthetic-{source.styleName}.ufo")
+        _saveFont(source.font, source.path)
+    path = os.path.join(directory, "Synthetic.designspace")
+    doc.write(path)
+    return path
+
+
+def _saveFont(font, path):
+    # defcon and ufoLib2 disagree on how to overwrite an existing UFO
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    font.save(path)
+
+
+def addParamsArguments(parser):
+    defaults = SyntheticFontParams()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(
+            f"--{name}", type=type(value), default=value, help=f"(default: {value})"
+        )
+
+
+def paramsFromArguments(args):
+    return SyntheticFontParams(
+        **{name: getattr(args, name) for name in asdict(SyntheticFontParams())}
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="directory where to write the fonts")
+    addParamsArguments(parser)
+    options = parser.parse_args(args)
+    print(saveFonts(paramsFromArguments(options), options.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import json
+import pickle
+import tracemalloc
+
+import pytest
+
+from ufo2ft import compileOTF, compileTTF, compileVariableTTF
+from ufo2ft.buildReport import BuildReport, currentReport, reportSpan
+
+from .outlineCompiler_test import getpath
+
+
+@pytest.fixture
+def testufo(FontClass):
+    return FontClass(getpath("TestFont.ufo"))
+
+
+def _names(spans):
+    return [span.name for span in spans]
+
+
+class BuildReportTest:
+    def test_nested_spans(self):
+        report = BuildReport()
+        assert currentReport() is None
+        with reportSpan("nothing"):
+            pass
+
+        with report.span("outer", "test") as outer:
+            assert currentReport() is report
+            with reportSpan("inner", "test", glyphs=3, foo="bar") as inner:
+                pass
+        assert currentReport() is None
+
+        assert report.spans == [outer]
+        assert outer.children == [inner]
+        assert inner.glyphs == 3
+        assert inner.args == {"foo": "bar"}
+        assert outer.wallTime >= inner.wallTime >= 0
+        assert inner.start >= outer.start
+        assert list(report.walk()) == [outer, inner]
+        assert set(report.totals()) == {"outer", "inner"}
+
+    def test_compileTTF(self, testufo):
+        report = BuildReport()
+        compileTTF(testufo, buildReport=report)
+
+        (root,) = report.spans
+        assert root.name == "compile"
+        assert _names(root.children) == [
+            "preprocess",
+            "compileOutlines",
+            "compileFeatures",
+            "postprocess",
+        ]
+        preprocess, outlines, features, _ = root.children
+        assert preprocess.glyphs == len(testufo)
+        # consecutive per-glyph filters run in a single pass
+        assert _names(preprocess.children) == [
+            "DecomposeComponentsFilter+CubicToQuadraticFilter",
+        ]
+        assert all(span.category == "filter" for span in preprocess.children)
+        fused = preprocess.children[0]
+        assert fused.glyphs > 0
+        # with a span for each of the fused filters
+        assert _names(fused.children) == [
+            "DecomposeComponentsFilter",
+            "CubicToQuadraticFilter",
+        ]
+        decompose, cu2qu = fused.children
+        assert cu2qu.glyphs > 0
+        assert 0 < decompose.wallTime + cu2qu.wallTime <= fused.wallTime
+        assert "setupTable_head" in _names(outlines.children)
+        assert "compileGlyphs" in _names(report.walk())
+        assert "setupTable_glyf" in _names(report.walk())
+        assert _names(features.children)[-1] == "feaLib"
+        assert "KernFeatureWriter" in _names(features.children)
+
+    def test_compileOTF(self, testufo):
+        report = BuildReport()
+        compileOTF(testufo, buildReport=report)
+        assert "setupTable_CFF" in _names(report.walk())
+
+    def test_compileVariableTTF(self, designspace):
+        report = BuildReport()
+        compileVariableTTF(designspace, buildReport=report)
+
+        (root,) = report.spans
+        assert root.name == "compile_variable"
+        names = _names(root.children)
+        assert names[0] == "preprocess"
+        assert names.count("compileOutlines") == len(designspace.sources)
+        assert "merge" in names
+        assert names[-1] == "postprocess"
+
+    def test_save(self, testufo, tmp_path):
+        report = BuildReport()
+        compileTTF(testufo, buildReport=report)
+
+        report.save(tmp_path / "report.json")
+        data = json.loads((tmp_path / "report.json").read_text())
+        (root,) = data["spans"]
+        assert root["name"] == "compile"
+        assert {"wallTime", "cpuTime", "memoryDelta"} <= root.keys()
+        assert root["children"][0]["name"] == "preprocess"
+
+        report.save(tmp_path / "trace.json", format="chrome")
+        trace = json.loads((tmp_path / "trace.json").read_text())
+        events = trace["traceEvents"]
+        assert len(events) == len(list(report.walk()))
+        assert all(event["ph"] == "X" for event in events)
+        assert events[0]["name"] == "compile"
+        assert events[0]["dur"] >= events[1]["dur"]
+
+        with pytest.raises(ValueError, match="Unknown build report format"):
+            report.save(tmp_path / "report.txt", format="txt")
+
+    def test_profileGlyphs(self, testufo):
+        report = BuildReport()
+        compileTTF(testufo, buildReport=report)
+        assert all(span.glyphTimes is None for span in report.walk())
+        assert report.slowestGlyphs() == []
+
+        report = BuildReport(profileGlyphs=True)
+        compileTTF(testufo, buildReport=report)
+
+        spans = {span.name: span for span in report.walk()}
+        assert spans["compileGlyphs"].glyphTimes.keys() == set(testufo.keys())
+        # the glyph times of fused filters are recorded for each filter
+        fused = "DecomposeComponentsFilter+CubicToQuadraticFilter"
+        cu2qu = "CubicToQuadraticFilter"
+        assert spans[fused].glyphTimes is None
+        assert spans[cu2qu].glyphTimes.keys() <= set(testufo.keys())
+        assert not spans["setupTable_head"].glyphTimes
+
+        slowest = report.slowestGlyphs(3)
+        assert len(slowest) == 3
+        assert [t for t, _, _ in slowest] == sorted(
+            (t for t, _, _ in slowest), reverse=True
+        )
+        assert {stage for _, stage, _ in report.slowestGlyphs(1000)} >= {
+            "compileGlyphs",
+            cu2qu,
+        }
+        assert len(report.asDict()["slowestGlyphs"]) == 10
+
+    def test_profileGlyphs_interpolatable(self, designspace):
+        report = BuildReport(profileGlyphs=True)
+        compileVariableTTF(designspace, buildReport=report)
+        stages = {stage for _, stage, _ in report.slowestGlyphs(1000)}
+        assert "compileGlyphs" in stages
+
+    def test_traceMemory(self, testufo):
+        report = BuildReport(traceMemory=True, allocationSites=3)
+        compileTTF(testufo, buildReport=report)
+        assert not tracemalloc.is_tracing()
+
+        for span in report.walk():
+            assert span.memoryPeak >= max(0, span.memoryRetained)
+            if span.category == "compiler":
+                assert len(span.allocationSites) <= 3
+            else:
+                assert span.allocationSites is None
+        (root,) = report.spans
+        assert root.memoryPeak >= max(child.memoryPeak for child in root.children)
+        assert root.allocationSites
+        assert {"site", "size", "count"} == root.allocationSites[0].keys()
+        assert "memoryPeak" in report.asDict()["spans"][0]
+
+    def test_traceMemory_already_tracing(self, testufo):
+        report = BuildReport(traceMemory=True)
+        tracemalloc.start()
+        try:
+            compileTTF(testufo, buildReport=report)
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+        assert report.spans[0].memoryPeak > 0
+
+    def test_pickle(self, testufo):
+        report = BuildReport(profileGlyphs=True)
+        compileTTF(testufo, buildReport=report)
+
+        copy = pickle.loads(pickle.dumps(report))
+        assert copy.asDict() == report.asDict()
+        with copy.span("more"):
+            pass
+        assert _names(copy.spans) == ["compile", "more"]
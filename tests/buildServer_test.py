@@ -0,0 +1,215 @@
+import io
+import json
+import os
+import plistlib
+import shutil
+
+import pytest
+from fontTools.ttLib import TTFont
+
+from ufo2ft import compileOTF, compileTTF
+from ufo2ft.buildServer import BuildServer, serveStream
+
+from .outlineCompiler_test import getpath
+
+
+@pytest.fixture
+def testufo(tmp_path):
+    path = tmp_path / "TestFont.ufo"
+    shutil.copytree(getpath("TestFont.ufo"), path)
+    return str(path)
+
+
+@pytest.fixture
+def server(ufo_module):
+    return BuildServer(ufo_module=ufo_module)
+
+
+def _touch(path):
+    # make sure the modification time changes, whatever the file system's
+    # timestamp resolution
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def _editKerning(ufoPath, pair, value):
+    path = os.path.join(ufoPath, "kerning.plist")
+    with open(path, "rb") as f:
+        kerning = plistlib.load(f)
+    kerning.setdefault(pair[0], {})[pair[1]] = value
+    with open(path, "wb") as f:
+        plistlib.dump(kerning, f)
+    _touch(path)
+
+
+def _editGlyph(ufoPath, fileName, old, new):
+    path = os.path.join(ufoPath, "glyphs", fileName)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert old in text
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.replace(old, new, 1))
+    _touch(path)
+
+
+def _assertSameFont(path, expected):
+    font = TTFont(path)
+    assert font.getGlyphOrder() == expected.getGlyphOrder()
+    for tag in set(font.keys()) | set(expected.keys()):
+        if tag in ("head", "GlyphOrder"):
+            continue
+        assert font[tag].compile(font) == expected[tag].compile(expected), tag
+
+
+class BuildServerTest:
+    def test_build(self, server, testufo, tmp_path, FontClass):
+        result = server.build(testufo, "ttf", outputDir=tmp_path / "out")
+        assert result["rebuilt"] == "full"
+        assert result["outputs"] == [str(tmp_path / "out" / "TestFont.ttf")]
+        outputPath = result["outputs"][0]
+        _assertSameFont(outputPath, compileTTF(FontClass(testufo)))
+
+        result = server.build(testufo, "ttf", outputDir=tmp_path / "out")
+        assert result["rebuilt"] is None
+        assert result["changes"] == []
+
+        # only the features are built again
+        _editKerning(testufo, ("a", "b"), -77)
+        result = server.build(testufo, "ttf", outputDir=tmp_path / "out")
+        assert result["rebuilt"] == "features"
+        assert result["changes"] == ["kerning.plist"]
+        _assertSameFont(outputPath, compileTTF(FontClass(testufo)))
+
+        # only the modified glyphs are compiled again
+        _editGlyph(testufo, "a.glif", 'width="388"', 'width="400"')
+        result = server.build(testufo, "ttf", outputDir=tmp_path / "out")
+        assert result["rebuilt"] == "glyphs"
+        assert result["changes"] == ["glyphs/a.glif"]
+        _assertSameFont(outputPath, compileTTF(FontClass(testufo)))
+
+    def test_edit_glyphs_preprocessed_again(
+        self, server, testufo, FontClass, monkeypatch
+    ):
+        from ufo2ft.filters.cubicToQuadratic import CubicToQuadraticFilter
+
+        server.build(testufo, "ttf")
+        filtered = set()
+        filterGlyph = CubicToQuadraticFilter.filter
+
+        def spy(self, glyph):
+            filtered.add(self.context.glyphName)
+            return filterGlyph(self, glyph)
+
+        monkeypatch.setattr(CubicToQuadraticFilter, "filter", spy)
+        # 'a' is a component of 'g', 'i', 'j', 'k' and 'l'
+        _editGlyph(testufo, "a.glif", 'width="388"', 'width="400"')
+        result = server.build(testufo, "ttf")
+        assert result["rebuilt"] == "glyphs"
+        assert filtered == {"a", "g", "i", "j", "k", "l"}
+        monkeypatch.undo()
+        _assertSameFont(result["outputs"][0], compileTTF(FontClass(testufo)))
+
+    def test_edit_glyphs_otf(self, server, testufo, FontClass):
+        server.build(testufo, "otf")
+        _editGlyph(testufo, "a.glif", 'width="388"', 'width="400"')
+        _editKerning(testufo, ("a", "b"), -77)
+        result = server.build(testufo, "otf")
+        assert result["rebuilt"] == "glyphs"
+        _assertSameFont(result["outputs"][0], compileOTF(FontClass(testufo)))
+
+    def test_fontinfo_reopens_font(self, server, testufo):
+        server.build(testufo, "otf")
+        _touch(os.path.join(testufo, "fontinfo.plist"))
+        result = server.build(testufo, "otf")
+        assert result["rebuilt"] == "full"
+        assert result["outputs"][0].endswith("TestFont.otf")
+
+    def test_add_and_remove_glyphs(self, server, testufo, FontClass):
+        server.build(testufo, "ttf")
+        font = FontClass(testufo)
+        font.newGlyph("z").width = 100
+        del font["c"]
+        font.save()
+        result = server.build(testufo, "ttf")
+        assert result["rebuilt"] == "full"
+        glyphOrder = TTFont(result["outputs"][0]).getGlyphOrder()
+        assert "z" in glyphOrder
+        assert "c" not in glyphOrder
+        _assertSameFont(result["outputs"][0], compileTTF(FontClass(testufo)))
+
+    def test_designspace(self, server, tmp_path):
+        dataDir = tmp_path / "data"
+        shutil.copytree(os.path.dirname(getpath("TestVarfea.designspace")), dataDir)
+        designspace = str(dataDir / "TestVarfea.designspace")
+        result = server.build(designspace, outputDir=tmp_path / "out")
+        assert result["format"] == "variable-ttf"
+        assert result["rebuilt"] == "full"
+        assert "fvar" in TTFont(result["outputs"][0])
+        assert server.build(designspace, outputDir=tmp_path / "out")["rebuilt"] is None
+
+        _editKerning(dataDir / "TestVarfea-Regular.ufo", ("a", "b"), -10)
+        result = server.build(designspace, outputDir=tmp_path / "out")
+        assert result["rebuilt"] == "full"
+        assert result["changes"] == ["TestVarfea-Regular.ufo/kerning.plist"]
+
+    def test_failed_build_is_retried(self, server, testufo, monkeypatch):
+        from ufo2ft._compilers.ttfCompiler import TTFCompiler
+
+        def fail(*args, **kwargs):
+            raise ValueError("oops")
+
+        with monkeypatch.context() as m:
+            m.setattr(TTFCompiler, "makeOutlineCompiler", fail)
+            with pytest.raises(ValueError, match="oops"):
+                server.build(testufo, "ttf")
+        assert server.build(testufo, "ttf")["rebuilt"] == "full"
+
+    def test_watch(self, server, testufo):
+        messages = []
+        server.build(testufo, "ttf", watch=messages.append)
+        server.poll()
+        assert messages == []
+
+        _editKerning(testufo, ("a", "b"), 12)
+        server.poll()
+        ((message),) = messages
+        assert message["method"] == "rebuilt"
+        assert message["params"]["rebuilt"] == "features"
+
+        server.unwatch(messages.append)
+        _editKerning(testufo, ("a", "b"), 13)
+        server.poll()
+        assert len(messages) == 1
+
+    def test_protocol(self, server, testufo):
+        requests = [
+            {"id": 1, "method": "build", "params": {"input": testufo}},
+            {"id": 2, "method": "build", "params": {"input": testufo, "format": "x"}},
+            {"id": 3, "method": "build", "params": {}},
+            {"id": 4, "method": "status"},
+            {"id": 5, "method": "frobnicate"},
+            {"id": 6, "method": "forget", "params": {"input": testufo}},
+            {"id": 7, "method": "shutdown"},
+            {"id": 8, "method": "status"},
+        ]
+        inStream = io.StringIO(
+            "\n".join(json.dumps(r) for r in requests) + "\nnot json\n"
+        )
+        outStream = io.StringIO()
+        serveStream(server, inStream, outStream)
+
+        responses = [json.loads(line) for line in outStream.getvalue().splitlines()]
+        # the server stops reading after the shutdown request
+        assert [r["id"] for r in responses] == [1, 2, 3, 4, 5, 6, 7]
+        assert responses[0]["result"]["rebuilt"] == "full"
+        assert responses[1]["error"]["message"] == "unknown format: 'x'"
+        assert responses[2]["error"] == {
+            "type": "KeyError",
+            "message": "missing parameter: input",
+        }
+        (project,) = responses[3]["result"]["projects"]
+        assert project["format"] == "ttf"
+        assert responses[4]["error"]["type"] == "ValueError"
+        assert responses[5]["result"] == {"forgotten": 1}
+        assert responses[6]["result"] is None
+        assert server.stopped
@@ -0,0 +1,96 @@
+from fontTools.pens.recordingPen import RecordingPointPen
+
+from ufo2ft.compactGlyph import CompactGlyph
+from ufo2ft.util import _copyGlyph
+
+
+def _recording(glyph):
+    pen = RecordingPointPen()
+    glyph.drawPoints(pen)
+    return pen.value
+
+
+def _make_glyph(ufo):
+    glyph = ufo.newGlyph("a")
+    glyph.width = 500
+    glyph.unicodes = [0x61, 0x62]
+    glyph.lib["foo"] = {"bar": 1}
+    pen = glyph.getPointPen()
+    pen.beginPath(identifier="contour1")
+    pen.addPoint((0, 0), "line", identifier="point1")
+    pen.addPoint((100, 0), "line", smooth=True)
+    pen.addPoint((100.5, 50), None)
+    pen.addPoint((50, 100.25), None)
+    pen.addPoint((0, 100), "curve", name="top")
+    pen.endPath()
+    pen.addComponent("b", (1, 0, 0, 1, 10, 20), identifier="component1")
+    glyph.appendAnchor({"name": "top", "x": 50, "y": 100, "identifier": "anchor1"})
+    return glyph
+
+
+class CompactGlyphTest:
+    def test_fromGlyph(self, FontClass):
+        ufo = FontClass()
+        glyph = _make_glyph(ufo)
+
+        compact = CompactGlyph.fromGlyph(glyph)
+
+        assert compact.name == "a"
+        assert compact.width == 500
+        assert compact.unicodes == [0x61, 0x62]
+        assert compact.unicode == 0x61
+        assert compact.lib == {"foo": {"bar": 1}}
+        assert compact.lib["foo"] is not glyph.lib["foo"]
+        assert len(compact) == 1
+        assert [dict(a) for a in compact.anchors] == [
+            {"name": "top", "x": 50, "y": 100, "identifier": "anchor1"}
+        ]
+        assert compact.components[0].identifier == "component1"
+        # ints and floats are given back as they were drawn
+        assert _recording(compact) == _recording(glyph)
+
+    def test_contours_are_detached(self, FontClass):
+        ufo = FontClass()
+        compact = CompactGlyph.fromGlyph(_make_glyph(ufo))
+
+        contours = list(compact)
+        compact.clearContours()
+        compact.clearComponents()
+        assert len(compact) == 0
+        assert not compact.components
+
+        contour = contours[0]
+        assert contour.identifier == "contour1"
+        assert len(contour) == 5
+        assert [(p.x, p.y, p.segmentType) for p in contour][:2] == [
+            (0, 0, "line"),
+            (100, 0, "line"),
+        ]
+        assert contour[-1].name == "top"
+
+        pen = compact.getPen()
+        pen.moveTo((0, 0))
+        pen.lineTo((10, 10))
+        pen.closePath()
+        compact.appendContour(contour)
+        assert len(compact) == 2
+        assert [len(c) for c in compact] == [2, 5]
+
+    def test_copyGlyph(self, FontClass):
+        ufo = FontClass()
+        compact = CompactGlyph.fromGlyph(_make_glyph(ufo))
+
+        copy = _copyGlyph(compact)
+
+        assert isinstance(copy, CompactGlyph)
+        assert copy is not compact
+        assert copy.anchors[0].name == "top"
+        assert _recording(copy) == _recording(compact)
+
+    def test_unicode(self):
+        glyph = CompactGlyph("a", unicodes=[0x61, 0x41])
+        glyph.unicode = 0x41
+        assert glyph.unicodes == [0x41, 0x61]
+        glyph.unicode = None
+        assert glyph.unicodes == []
+        assert glyph.unicode is None
@@ -0,0 +1,80 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+
+from ufo2ft import diskCache
+from ufo2ft.diskCache import DiskCache
+
+
+def _fillCache(cache, worker):
+    cache.putMany("test", [(b"%d-%d" % (worker, i), b"x" * i) for i in range(50)])
+    return len(cache.getMany("test", [b"%d-%d" % (worker, i) for i in range(50)]))
+
+
+class DiskCacheTest:
+    def test_get_and_put(self, tmp_path):
+        cache = DiskCache(tmp_path / "cache")
+        assert cache.get("a", b"key") is None
+        assert cache.getMany("a", []) == {}
+        cache.put("a", b"key", b"value")
+        cache.putMany("b", [(b"key", b"other"), (b"key2", b"")])
+
+        assert cache.get("a", b"key") == b"value"
+        assert cache.getMany("a", [b"key", b"key2"]) == {b"key": b"value"}
+        assert cache.getMany("b", [b"key", b"key2"]) == {b"key": b"other", b"key2": b""}
+        assert cache.size() == 10
+
+        # the entries are stored on disk
+        cache.close()
+        cache = DiskCache(tmp_path / "cache")
+        assert cache.get("a", b"key") == b"value"
+        cache.clear()
+        assert cache.get("a", b"key") is None
+        assert cache.size() == 0
+
+    def test_many_keys(self, tmp_path):
+        cache = DiskCache(tmp_path)
+        items = [(b"%d" % i, b"%d" % i) for i in range(2000)]
+        cache.putMany("test", items)
+        assert cache.getMany("test", [key for key, _ in items]) == dict(items)
+
+    def test_evict_least_recently_used(self, tmp_path, monkeypatch):
+        clock = count()
+        monkeypatch.setattr(diskCache.time, "time", lambda: next(clock))
+        monkeypatch.setattr(DiskCache, "touchInterval", 0)
+        cache = DiskCache(tmp_path, maxSize=30)
+        cache.putMany("test", [(b"a", b"a" * 10), (b"b", b"b" * 10)])
+        cache.put("test", b"c", b"c" * 10)
+        assert cache.get("test", b"a") is not None
+
+        # evicts until the cache is at 90% of its maximum size
+        cache.put("test", b"d", b"d" * 10)
+        assert cache.getMany("test", [b"a", b"b", b"c", b"d"]).keys() == {
+            b"a",
+            b"d",
+        }
+        assert cache.size() == 20
+
+    def test_unusable(self, tmp_path, caplog):
+        path = tmp_path / "file"
+        path.write_text("not a directory")
+        cache = DiskCache(path)
+        with caplog.at_level("WARNING", logger="ufo2ft.diskCache"):
+            cache.put("test", b"key", b"value")
+        assert "Disabling the cache" in caplog.text
+        assert cache.get("test", b"key") is None
+
+    def test_pickle(self, tmp_path):
+        cache = DiskCache(tmp_path, maxSize=123)
+        cache.put("test", b"key", b"value")
+        copy = pickle.loads(pickle.dumps(cache))
+        assert copy.maxSize == 123
+        assert copy.get("test", b"key") == b"value"
+
+    def test_concurrent_processes(self, tmp_path):
+        workers = 4
+        cache = DiskCache(tmp_path)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_fillCache, [cache] * workers, range(workers)))
+        assert results == [50] * workers
+        assert cache.size() == workers * sum(range(50))
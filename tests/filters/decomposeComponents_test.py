@@ -2,13 +2,20 @@ import logging
 
 import pytest
 from fontTools.pens.basePen import MissingComponentError
+from fontTools.pens.filterPen import ReverseFlipped
 
 from ufo2ft.filters.decomposeComponents import (
     DecomposeComponentsFilter,
     DecomposeComponentsIFilter,
 )
 from ufo2ft.instantiator import Instantiator
-from ufo2ft.util import _GlyphSet
+from ufo2ft.util import (
+    _CopyOnWriteGlyphSet,
+    _FlattenedOutlines,
+    _getContours,
+    _GlyphSet,
+    decomposeCompositeGlyph,
+)
 
 
 def test_missing_component_error(FontClass, caplog):
@@ -69,6 +76,47 @@ def test_nested_components(FontClass):
     assert not ufo["nine"].components
 
 
+@pytest.mark.parametrize(
+    "reverseFlipped",
+    [ReverseFlipped.NO, ReverseFlipped.KEEP_START, ReverseFlipped.ON_CURVE_FIRST],
+)
+def test_flattened_outlines(FontClass, reverseFlipped):
+    ufo = FontClass()
+    pen = ufo.newGlyph("a").getPointPen()
+    pen.beginPath()
+    pen.addPoint((0, 0), None)
+    pen.addPoint((100, 0), "qcurve")
+    pen.addPoint((100, 100), "line")
+    pen.addPoint((0, 100), "line")
+    pen.endPath()
+    pen = ufo.newGlyph("b").getPen()
+    pen.moveTo((0, 0))
+    pen.lineTo((10, 10))
+    pen.lineTo((0, 10))
+    pen.closePath()
+    pen.addComponent("a", (-1, 0, 0, 1, 5, 0))
+    pen = ufo.newGlyph("c").getPen()
+    pen.addComponent("b", (0.5, 0.25, -0.3, -1.5, 7.1, -2))
+    pen.addComponent("a", (1, 0, 0, 1, 0, 0))
+    pen.addComponent("b", (1, 0, 0, 1, 30, 0))
+
+    expected = _CopyOnWriteGlyphSet.from_layer(ufo)
+    glyphSet = _CopyOnWriteGlyphSet.from_layer(ufo)
+    outlines = _FlattenedOutlines(glyphSet)
+    for name in ("c", "b"):
+        decomposeCompositeGlyph(expected[name], expected, reverseFlipped=reverseFlipped)
+        decomposeCompositeGlyph(
+            glyphSet[name], glyphSet, reverseFlipped=reverseFlipped, outlines=outlines
+        )
+        assert not glyphSet[name].components
+        assert _getContours(glyphSet[name]) == _getContours(expected[name])
+
+    # the flattened outlines of the base glyphs are reused
+    assert outlines.get("b") is outlines.get("b")
+    outlines.invalidate("b")
+    assert len(outlines.get("b")) == 1
+
+
 @pytest.fixture
 def ufos_and_glyphSets(FontClass):
     """Return two parallel lists of UFOs and glyphSets for testing.
@@ -34,3 +34,19 @@ def test_strip_color_codepoints(FontClass, data_dir):
     # Test that the newly-copied alternate has had its codepoint removed.
     new_default_alt = glyphset["a.color1"]
     assert new_default_alt.unicode is None
+
+
+def test_color_layers_not_modified(FontClass, data_dir):
+    """Test that the filter copies the glyphs from the color layers before
+    modifying them, leaving the source layers untouched."""
+
+    ufo = FontClass(data_dir / "ColorTest.ufo")
+    color_glyph = ufo.layers["color1"]["a"]
+    color_glyph.unicode = 0x3020
+
+    filter = ExplodeColorLayerGlyphsFilter()
+    glyphset = _GlyphSet.from_layer(ufo)
+    _ = filter(ufo, glyphset)
+
+    assert glyphset["a.color1"] is not color_glyph
+    assert color_glyph.unicode == 0x3020
@@ -1,7 +1,11 @@
 import pytest
 from fontTools.misc.loggingTools import CapturingLogHandler
 
-from ufo2ft.filters.flattenComponents import FlattenComponentsFilter, logger
+from ufo2ft.filters.flattenComponents import (
+    FlattenComponentsFilter,
+    _flattenComponent,
+    logger,
+)
 
 
 @pytest.fixture(
@@ -220,6 +224,20 @@ class FlattenComponentsFilterTest:
             for c in font["scaledNestedComponentGlyph"].components
         ] == [("contourGlyph", (0.6, 0, 0, 0.6, 100, 100))]
 
+    def test_memoized_flattening(self, font):
+        memo = {}
+        for glyph in font:
+            for component in glyph.components:
+                assert _flattenComponent(
+                    font, component, found_in=glyph, memo=memo
+                ) == _flattenComponent(font, component, found_in=glyph)
+        # only the composite glyphs used as components are memoized, with their
+        # flattened components
+        assert "contourGlyph" not in memo
+        assert memo["scaledComponentGlyph"] == [
+            ("contourGlyph", (0.5, 0, 0, 0.5, 50, 50))
+        ]
+
     def test_logger(self, font):
         with CapturingLogHandler(logger, level="INFO") as captor:
             philter = FlattenComponentsFilter()
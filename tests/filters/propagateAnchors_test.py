@@ -15,6 +15,7 @@ from ufo2ft.constants import (
     GLYPHS_COMPONENT_INFO_KEY,
     OPENTYPE_CATEGORIES_KEY,
 )
+from ufo2ft.filters import propagateAnchors
 from ufo2ft.filters.propagateAnchors import (
     AnchorData,
     PropagateAnchorsFilter,
@@ -1213,6 +1214,40 @@ class PropagateAnchorsIFilterTest:
             glyphSets[2].keys()
         )
 
+    def test_jobs(self, FontClass, data_dir, monkeypatch):
+        # the test font is too small to be split between worker processes
+        monkeypatch.setattr(propagateAnchors, "_MIN_GLYPHS_PER_WORKER", 1)
+        ds_path = data_dir / "SkipExportGlyphsTest.designspace"
+        results = []
+        for jobs in (1, 2):
+            ds = DesignSpaceDocument.fromfile(ds_path)
+            ds.loadSourceFonts(FontClass)
+            ufos = [s.font for s in ds.sources]
+            glyphSets = [_GlyphSet.from_layer(s.font, s.layerName) for s in ds.sources]
+            instantiator = Instantiator.from_designspace(
+                ds, do_kerning=False, do_info=False
+            )
+
+            modified = PropagateAnchorsIFilter()(
+                ufos, glyphSets, instantiator, jobs=jobs
+            )
+
+            results.append(
+                (
+                    modified,
+                    [
+                        {
+                            name: [dict(a) for a in glyph.anchors]
+                            for name, glyph in glyphSet.items()
+                        }
+                        for glyphSet in glyphSets
+                    ],
+                )
+            )
+        # the masters propagated in parallel processes get the same anchors
+        assert results[0][0] == {"Astroke"}
+        assert results[1] == results[0]
+
     def test_propagate_from_shared_nested_component_is_order_independent(
         self, FontClass, data_dir
     ):
@@ -0,0 +1,211 @@
+import logging
+
+import pytest
+
+from ufo2ft.diskCache import DiskCache
+from ufo2ft.filters.removeOverlaps import RemoveOverlapsFilter, _unionIsUnchanged
+from ufo2ft.util import _copyGlyph, _CopyOnWriteGlyphSet, _getContours
+
+BOOLEAN_OPERATIONS = RemoveOverlapsFilter.Backend.BOOLEAN_OPERATIONS
+SKIA_PATHOPS = RemoveOverlapsFilter.Backend.SKIA_PATHOPS
+
+
+def contour(*points):
+    return [
+        None,
+        [[x, y, segmentType, False, None, None] for x, y, segmentType in points],
+    ]
+
+
+SQUARE = contour((0, 0, "line"), (100, 0, "line"), (100, 100, "line"), (0, 100, "line"))
+TRIANGLE = contour((200, 0, "line"), (300, 0, "line"), (250, 100, "line"))
+
+
+@pytest.mark.parametrize(
+    "contours, booleanOperations, pathops",
+    [
+        pytest.param([SQUARE], True, True, id="square"),
+        pytest.param([[None, SQUARE[1][::-1]]], False, False, id="clockwise"),
+        pytest.param([SQUARE, TRIANGLE], False, False, id="two-contours"),
+        pytest.param(
+            [
+                contour(
+                    (0, 0, "line"),
+                    (100, 100, "line"),
+                    (100, 0, "line"),
+                    (0, 100, "line"),
+                )
+            ],
+            False,
+            False,
+            id="self-intersecting",
+        ),
+        pytest.param(
+            [
+                contour(
+                    (0, 0, "line"),
+                    (100, 0, "line"),
+                    (100, 100, "line"),
+                    (50, 100, "line"),
+                    (50, 50, "line"),
+                    (50, 100, "line"),
+                    (0, 100, "line"),
+                )
+            ],
+            False,
+            False,
+            id="touching-itself",
+        ),
+        pytest.param(
+            [
+                contour(
+                    (0, 0, "line"),
+                    (50, 0, "line"),
+                    (100, 0, "line"),
+                    (100, 100, "line"),
+                    (0, 100, "line"),
+                )
+            ],
+            False,
+            True,
+            id="collinear-lines",
+        ),
+        pytest.param(
+            [
+                contour(
+                    (0, 0, "line"),
+                    (100, 0, "line"),
+                    (100, 100, "line"),
+                    (80, 120, None),
+                    (20, 120, None),
+                    (0, 100, "curve"),
+                )
+            ],
+            True,
+            False,
+            id="curve-extremum",
+        ),
+        pytest.param(
+            [
+                contour(
+                    (0, 0, "line"),
+                    (100, 0, "line"),
+                    (100, 100, "line"),
+                    (120, 80, None),
+                    (-20, 80, None),
+                    (0, 100, "curve"),
+                )
+            ],
+            False,
+            False,
+            id="curve-loop",
+        ),
+        pytest.param(
+            [
+                contour(
+                    (100, 0, None),
+                    (100, 100, "qcurve"),
+                    (0, 100, "line"),
+                    (0, 0, "line"),
+                )
+            ],
+            False,
+            False,
+            id="off-curve-start",
+        ),
+        pytest.param(
+            [
+                contour(
+                    (0.1, 0, "line"),
+                    (100, 0, "line"),
+                    (100, 100, "line"),
+                    (0, 100, "line"),
+                )
+            ],
+            True,
+            False,
+            id="not-float32",
+        ),
+    ],
+)
+def test_unionIsUnchanged(contours, booleanOperations, pathops):
+    assert _unionIsUnchanged(contours, BOOLEAN_OPERATIONS) is booleanOperations
+    assert _unionIsUnchanged(contours, SKIA_PATHOPS) is pathops
+
+
+@pytest.fixture
+def font(FontClass):
+    font = FontClass()
+    pen = font.newGlyph("square").getPen()
+    pen.moveTo((0, 0))
+    pen.lineTo((100, 0))
+    pen.lineTo((100, 100))
+    pen.lineTo((0, 100))
+    pen.closePath()
+    pen = font.newGlyph("overlapping").getPen()
+    for x in (0, 50):
+        pen.moveTo((x, 0))
+        pen.lineTo((x + 100, 0))
+        pen.lineTo((x + 100, 100))
+        pen.lineTo((x, 100))
+        pen.closePath()
+    font.newGlyph("space")
+    return font
+
+
+@pytest.mark.parametrize("backend", ["booleanOperations", "pathops"])
+def test_skip_glyphs_without_overlaps(font, backend):
+    glyphSet = _CopyOnWriteGlyphSet.from_layer(font)
+
+    modified = RemoveOverlapsFilter(backend=backend)(font, glyphSet)
+
+    assert modified == {"overlapping"}
+    assert not glyphSet.isCopied("square")
+    assert len(glyphSet["overlapping"]) == 1
+
+
+@pytest.mark.parametrize("backend", ["booleanOperations", "pathops"])
+def test_cache(font, backend, tmp_path, caplog):
+    expected = _CopyOnWriteGlyphSet.from_layer(font)
+    RemoveOverlapsFilter(backend=backend)(font, expected)
+
+    for _ in range(2):
+        glyphSet = _CopyOnWriteGlyphSet.from_layer(font)
+        with caplog.at_level(logging.INFO, logger="ufo2ft.filters"):
+            modified = RemoveOverlapsFilter(backend=backend, cache=DiskCache(tmp_path))(
+                font, glyphSet
+            )
+        assert modified == {"overlapping"}
+        for name in expected.keys():
+            assert _getContours(glyphSet[name]) == _getContours(expected[name])
+        # the cached contours don't modify the input
+        assert glyphSet.isCopied("overlapping")
+        assert len(font["overlapping"]) == 2
+    assert "Loaded 1 glyphs without overlaps from the cache" in caplog.text
+
+    # the cache is keyed by the backend
+    other = "pathops" if backend == "booleanOperations" else "booleanOperations"
+    caplog.clear()
+    glyphSet = _CopyOnWriteGlyphSet.from_layer(font)
+    with caplog.at_level(logging.INFO, logger="ufo2ft.filters"):
+        RemoveOverlapsFilter(backend=other, cache=DiskCache(tmp_path))(font, glyphSet)
+    assert "Loaded 0 glyphs without overlaps from the cache" in caplog.text
+
+
+@pytest.mark.parametrize("backend", ["booleanOperations", "pathops"])
+def test_cache_color_layers(font, backend, tmp_path):
+    # like the glyphs copied from the color layers, the glyph stored as
+    # "square.color1" is named "square", which has no overlaps
+    layerGlyph = font.newLayer("color1").newGlyph("square")
+    layerGlyph.copyDataFromGlyph(font["overlapping"])
+
+    for _ in range(2):
+        glyphSet = _CopyOnWriteGlyphSet.from_layer(font)
+        glyphSet["square.color1"] = _copyGlyph(layerGlyph)
+        modified = RemoveOverlapsFilter(backend=backend, cache=DiskCache(tmp_path))(
+            font, glyphSet
+        )
+        assert modified == {"overlapping", "square.color1"}
+        assert _getContours(glyphSet["square.color1"]) == _getContours(
+            glyphSet["overlapping"]
+        )
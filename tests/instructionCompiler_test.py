@@ -15,6 +15,7 @@ from fontTools.ttLib.tables._g_l_y_f import (
 from fontTools.ttLib.ttFont import TTFont
 
 from ufo2ft.instructionCompiler import InstructionCompiler
+from ufo2ft.outlineCompiler import OutlineTTFCompiler
 
 from .outlineCompiler_test import getpath
 
@@ -158,6 +159,35 @@ class InstructionCompilerTest:
         )
         assert not result
 
+    # checkGlyphHashes
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_checkGlyphHashes(self, quaduforeversed, jobs):
+        for name in ("a", "b", "c", "g", "k"):
+            glyph = quaduforeversed[name]
+            glyph.lib[TRUETYPE_INSTRUCTIONS_KEY] = {
+                "formatVersion": "1",
+                "id": get_hash_ufo(glyph, quaduforeversed),
+                "assembly": "",
+            }
+        # a mismatching and a missing hash
+        quaduforeversed["b"].lib[TRUETYPE_INSTRUCTIONS_KEY]["id"] = "w0|"
+        del quaduforeversed["c"].lib[TRUETYPE_INSTRUCTIONS_KEY]["id"]
+        font = OutlineTTFCompiler(quaduforeversed).compile()
+
+        ic = InstructionCompiler(quaduforeversed, font)
+        result = ic.checkGlyphHashes(font.getGlyphOrder(), jobs=jobs)
+
+        # the glyphs without instructions aren't checked
+        assert result == {"a": True, "b": False, "c": False, "g": True, "k": True}
+        for name, expected in result.items():
+            glyph = quaduforeversed[name]
+            stored_hash = glyph.lib[TRUETYPE_INSTRUCTIONS_KEY].get("id")
+            ttglyph = font["glyf"][name]
+            assert ic._check_glyph_hash(glyph, ttglyph, stored_hash) is expected
+            fresh = InstructionCompiler(quaduforeversed, font)
+            assert fresh._check_glyph_hash(glyph, ttglyph, stored_hash) is expected
+
     # _check_tt_data_format
 
     def test_check_tt_data_format_match_str(self):
@@ -6,6 +6,7 @@ import re
 import sys
 from pathlib import Path
 from textwrap import dedent
+from unittest import mock
 
 import pytest
 from fontTools.designspaceLib import DesignSpaceDocument
@@ -14,6 +15,7 @@ from fontTools.pens.boundsPen import BoundsPen
 from fontTools.pens.transformPen import TransformPen
 from fontTools.ttLib.tables._g_l_y_f import (
     OVERLAP_COMPOUND,
+    GlyphCoordinates,
     flagCubic,
     flagOverlapSimple,
 )
@@ -27,9 +29,11 @@ from ufo2ft import (
     compileVariableTTF,
     compileVariableTTFs,
 )
+from ufo2ft._compilers.ttfCompiler import TTFCompiler
 from ufo2ft.constants import KEEP_GLYPH_NAMES, TRUETYPE_OVERLAP_KEY
 from ufo2ft.errors import InvalidFontData
 from ufo2ft.filters import TransformationsFilter
+from ufo2ft.outlineCompiler import BaseOutlineCompiler
 
 
 def test_has_version():
@@ -152,6 +156,59 @@ class IntegrationTest:
         ttf = compileTTF(testufo, removeOverlaps=True, overlapsBackend="pathops")
         expectTTX(ttf, "TestFont-NoOverlaps-TTF-pathops.ttx")
 
+    @pytest.mark.parametrize(
+        "compileFunc, options, expected_ttx",
+        [
+            (compileTTF, {}, "TestFont.ttx"),
+            (compileOTF, {}, "TestFont-CFF.ttx"),
+            (compileTTF, {"removeOverlaps": True}, "TestFont-NoOverlaps-TTF.ttx"),
+            (
+                compileOTF,
+                {"removeOverlaps": True, "overlapsBackend": "pathops"},
+                "TestFont-NoOverlaps-CFF-pathops.ttx",
+            ),
+        ],
+    )
+    def test_compactGlyphs(self, testufo, compileFunc, options, expected_ttx):
+        font = compileFunc(testufo, compactGlyphs=True, **options)
+        expectTTX(font, expected_ttx)
+
+    @pytest.mark.parametrize(
+        "compileFunc, options, expected_ttx",
+        [
+            (compileTTF, {}, "TestFont.ttx"),
+            (compileOTF, {}, "TestFont-CFF.ttx"),
+            (compileTTF, {"removeOverlaps": True}, "TestFont-NoOverlaps-TTF.ttx"),
+        ],
+    )
+    def test_lazyGlyphs(self, testufo, compileFunc, options, expected_ttx, monkeypatch):
+        # release the compiled glyphs' outlines as often as possible
+        monkeypatch.setattr(BaseOutlineCompiler, "releaseChunkSize", 2)
+        font = compileFunc(testufo, lazyGlyphs=True, **options)
+        expectTTX(font, expected_ttx)
+
+    @pytest.mark.parametrize(
+        "compileFunc, expected_ttx",
+        [(compileTTF, "TestFont.ttx"), (compileOTF, "TestFont-CFF.ttx")],
+    )
+    def test_compile_from_path(self, compileFunc, expected_ttx):
+        font = compileFunc(getpath("TestFont.ufo"))
+        expectTTX(font, expected_ttx)
+
+    def test_compile_from_path_then_font(self, FontClass):
+        # reading the glyphs lazily from a path doesn't carry over to the next
+        # font object compiled, whose glyphs may have unsaved changes
+        compiler = TTFCompiler()
+        saved = compiler.compile(getpath("TestFont.ufo"))
+        assert not compiler.lazyGlyphs
+
+        ufo = FontClass(getpath("TestFont.ufo"))
+        ufo["a"].move((10, 0))
+        font = compiler.compile(ufo)
+        coordinates = font["glyf"]["uni0061"].coordinates
+        assert coordinates == compileTTF(ufo)["glyf"]["uni0061"].coordinates
+        assert coordinates != saved["glyf"]["uni0061"].coordinates
+
     def test_nestedComponents(self, FontClass):
         ufo = FontClass(getpath("NestedComponents-Regular.ufo"))
         ttf = compileTTF(ufo)
@@ -251,6 +308,19 @@ class IntegrationTest:
             ),
         )
 
+    @pytest.mark.parametrize(
+        "compileFunc, expected_ttx",
+        [
+            (compileVariableTTF, "TestVariableFont-TTF.ttx"),
+            (compileVariableCFF2, "TestVariableFont-CFF2.ttx"),
+        ],
+    )
+    def test_compileVariable_compactGlyphs(
+        self, designspace, compileFunc, expected_ttx
+    ):
+        varfont = compileFunc(designspace, compactGlyphs=True, useProductionNames=False)
+        expectTTX(varfont, expected_ttx)
+
     def test_compileVariableCFF2_subroutinized(self, designspace):
         varfont = compileVariableCFF2(designspace, optimizeCFF=2)
         expectTTX(varfont, "TestVariableFont-CFF2-cffsubr.ttx")
@@ -453,6 +523,89 @@ class IntegrationTest:
             "DSv5/MutatorSerifVariable_Width-CFF2.ttx",
         )
 
+    @pytest.mark.parametrize(
+        "compileFunc, suffix",
+        [
+            (compileVariableTTFs, "TTF"),
+            (compileVariableCFF2s, "CFF2"),
+        ],
+    )
+    def test_compileVariable_memoryLimit(self, designspace_v5, compileFunc, suffix):
+        from ufo2ft._compilers.baseCompiler import _SpilledMaster
+
+        spilled = []
+        save = _SpilledMaster.save
+
+        def spy(ttf, path):
+            spilled.append(path)
+            return save(ttf, path)
+
+        with mock.patch.object(_SpilledMaster, "save", spy):
+            fonts = compileFunc(designspace_v5, memoryLimit=0)
+
+        # all but the default masters are saved to disk
+        assert len(spilled) == len(designspace_v5.sources) - 2
+        for vfName, font in fonts.items():
+            expectTTX(font, f"DSv5/{vfName}-{suffix}.ttx")
+
+    def test_compileVariableCFF2_memoryLimit_default_private_values(self, FontClass):
+        # the masters' Private dicts have no blue values, and the binary CFF
+        # table would drop them as they are equal to the defaults
+        designspace = DesignSpaceDocument.fromfile(getpath("TestVarfea.designspace"))
+        designspace.loadSourceFonts(FontClass)
+        expected = compileVariableCFF2(designspace)
+        font = compileVariableCFF2(designspace, memoryLimit=0)
+        private = font["CFF2"].cff.topDictIndex[0].FDArray[0].Private
+        expectedPrivate = expected["CFF2"].cff.topDictIndex[0].FDArray[0].Private
+        assert private.rawDict == expectedPrivate.rawDict
+
+    def test_compileVariableTTF_memoryLimit_transformed_components(
+        self, FontClass, caplog
+    ):
+        # 'quotedblleft' has flipped components, whose transforms varLib
+        # compares between the masters
+        designspace = DesignSpaceDocument.fromfile(
+            getpath("MutatorSans/MutatorSans.designspace")
+        )
+        designspace.loadSourceFonts(FontClass)
+        expected = compileVariableTTF(designspace)
+        with caplog.at_level(logging.WARNING, logger="fontTools.varLib"):
+            font = compileVariableTTF(designspace, memoryLimit=0)
+        assert "incompatible masters" not in caplog.text
+
+        assert any(
+            hasattr(component, "transform")
+            for component in font["glyf"]["quotedblleft"].components
+        )
+        for tag in ("glyf", "gvar", "HVAR"):
+            assert font[tag].compile(font) == expected[tag].compile(expected), tag
+
+    def test_spilledMaster_lazy_unrounded(self, FontClass, tmp_path):
+        from ufo2ft._compilers.baseCompiler import _SpilledMaster
+
+        ufo = FontClass()
+        ufo.info.unitsPerEm = 1000
+        glyph = ufo.newGlyph("a")
+        glyph.width = 500
+        pen = glyph.getPen()
+        pen.moveTo((0.5, 0))
+        pen.lineTo((100.25, 0))
+        pen.lineTo((100, 200.75))
+        pen.closePath()
+        ttf = compileTTF(ufo)
+        # interpolatable masters keep their coordinates unrounded
+        coordinates = [(0.5, 0), (100, 200.75), (100.25, 0)]
+        ttf["glyf"]["a"].coordinates = GlyphCoordinates(coordinates)
+
+        spilled = _SpilledMaster.save(ttf, str(tmp_path / "master"))
+        font = spilled.load()
+        try:
+            # the glyphs are only decompiled when used
+            assert hasattr(font["glyf"].glyphs["a"], "data")
+            assert list(font["glyf"]["a"].coordinates) == coordinates
+        finally:
+            font.close()
+
     @pytest.mark.parametrize(
         "compileFunc",
         [
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pytest
+
+import ufo2ft
+import ufo2ft.filters
+
+
+def _importedModules(code):
+    output = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(' '.join(sys.modules))"],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return set(output.split())
+
+
+class LazyImportTest:
+    def test_import_ufo2ft(self):
+        modules = _importedModules("import ufo2ft")
+        for module in (
+            "fontTools.varLib",
+            "fontTools.feaLib.builder",
+            "fontTools.subset",
+            "ufo2ft._compilers.baseCompiler",
+            "ufo2ft.filters",
+            "ufo2ft.instantiator",
+        ):
+            assert module not in modules
+
+    def test_import_ttfCompiler(self):
+        modules = _importedModules("import ufo2ft._compilers.ttfCompiler")
+        assert "ufo2ft.instantiator" not in modules
+        assert "ufo2ft.filters.dottedCircle" not in modules
+
+    def test_compiler_classes(self):
+        from ufo2ft import TTFCompiler
+        from ufo2ft._compilers.ttfCompiler import TTFCompiler as _TTFCompiler
+
+        assert TTFCompiler is _TTFCompiler
+        assert ufo2ft.VariableCFF2sCompiler.__name__ == "VariableCFF2sCompiler"
+        with pytest.raises(AttributeError):
+            ufo2ft.NoSuchCompiler
+
+    def test_filter_classes(self):
+        from ufo2ft.filters.dottedCircle import DottedCircleFilter
+
+        assert ufo2ft.filters.DottedCircleFilter is DottedCircleFilter
+        assert set(ufo2ft.filters.__all__) <= set(dir(ufo2ft.filters))
+        with pytest.raises(AttributeError):
+            ufo2ft.filters.NoSuchFilter
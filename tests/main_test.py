@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import shutil
+
+import pytest
+from fontTools.ttLib import TTFont
+
+from ufo2ft.__main__ import main, parseSize
+from ufo2ft.diskCache import DiskCache
+
+from .outlineCompiler_test import getpath
+
+
+@pytest.fixture
+def testufo(tmp_path):
+    path = tmp_path / "TestFont.ufo"
+    shutil.copytree(getpath("TestFont.ufo"), path)
+    return str(path)
+
+
+class MainTest:
+    def test_parseSize(self):
+        assert parseSize("0") == 0
+        assert parseSize("512") == 512
+        assert parseSize("2K") == 2048
+        assert parseSize("3mb") == 3 * 1024**2
+        assert parseSize("1G") == 1024**3
+        with pytest.raises(argparse.ArgumentTypeError):
+            parseSize("lots")
+
+    def test_default_format(self, testufo, tmp_path):
+        assert main([testufo]) == 0
+        font = TTFont(tmp_path / "TestFont.ttf")
+        assert "glyf" in font
+
+    def test_formats_and_jobs(self, testufo, tmp_path):
+        outputDir = tmp_path / "out"
+        main([testufo, "-f", "ttf", "-f", "otf", "-o", str(outputDir), "-j", "2"])
+        assert sorted(os.listdir(outputDir)) == ["TestFont.otf", "TestFont.ttf"]
+        assert "CFF " in TTFont(outputDir / "TestFont.otf")
+
+    def test_format_requires_designspace(self, testufo):
+        with pytest.raises(SystemExit):
+            main([testufo, "-f", "variable-ttf"])
+
+    def test_designspace(self, tmp_path):
+        outputDir = tmp_path / "out"
+        main(
+            [
+                getpath("TestVarfea.designspace"),
+                "-f",
+                "variable-ttf",
+                "-f",
+                "interpolatable-otf",
+                "-o",
+                str(outputDir),
+                "--memory-limit",
+                "0",
+            ]
+        )
+        assert sorted(os.listdir(outputDir)) == [
+            "TestVarfea-Bold.otf",
+            "TestVarfea-Regular.otf",
+            "TestVarfea.ttf",
+        ]
+        assert "gvar" in TTFont(outputDir / "TestVarfea.ttf")
+
+    def test_cache_dir(self, testufo, tmp_path, caplog):
+        outputDir = tmp_path / "out"
+        args = [testufo, "-o", str(outputDir), "--cache-dir", str(tmp_path / "c")]
+        main(args)
+        first = (outputDir / "TestFont.ttf").read_bytes()
+        os.remove(outputDir / "TestFont.ttf")
+
+        with caplog.at_level("INFO", logger="ufo2ft"):
+            main(args)
+        assert "Using cached build" in caplog.text
+        assert (outputDir / "TestFont.ttf").read_bytes() == first
+
+        # changing an input file invalidates the cache
+        caplog.clear()
+        with open(os.path.join(testufo, "features.fea"), "a") as f:
+            f.write("\n# changed\n")
+        with caplog.at_level("INFO", logger="ufo2ft"):
+            main(args)
+        assert "Using cached build" not in caplog.text
+
+    def test_cache_dir_glyphs(self, testufo, tmp_path, caplog):
+        # the compiled glyphs are cached in the same directory as the fonts
+        args = [testufo, "-o", str(tmp_path / "out"), "--cache-dir", str(tmp_path)]
+        main(args)
+
+        with open(os.path.join(testufo, "features.fea"), "a") as f:
+            f.write("\n# changed\n")
+        with caplog.at_level("INFO", logger="ufo2ft"):
+            main(args)
+        assert "Using cached build" not in caplog.text
+        assert "Loaded 9 glyphs from the cache" in caplog.text
+
+    def test_cache_size(self, testufo, tmp_path):
+        cacheDir = tmp_path / "c"
+        main([testufo, "-o", str(tmp_path), "--cache-dir", str(cacheDir)])
+        size = DiskCache(cacheDir).size()
+        fontSize = os.path.getsize(tmp_path / "TestFont.ttf")
+        assert size > fontSize
+
+        # the older entries are evicted to make room for the new ones
+        main(
+            [testufo, "-f", "otf", "-o", str(tmp_path), "--cache-dir", str(cacheDir)]
+            + ["--cache-size", str(size)]
+        )
+        assert DiskCache(cacheDir).size() <= size
+
+    def test_memory_limit_ignored(self, testufo, tmp_path, caplog):
+        with caplog.at_level("WARNING", logger="ufo2ft"):
+            main([testufo, "-o", str(tmp_path), "--memory-limit", "1G"])
+        assert "ignoring it for the ttf builds" in caplog.text
+
+    @pytest.mark.parametrize("jobs", ["1", "2"])
+    def test_profile(self, testufo, tmp_path, jobs):
+        profile = tmp_path / "profile.json"
+        main([testufo, "-f", "ttf", "-f", "otf", "-j", jobs, "--profile", str(profile)])
+        data = json.loads(profile.read_text())
+        assert [(b["format"], b["spans"][0]["name"]) for b in data["builds"]] == [
+            ("ttf", "compile"),
+            ("otf", "compile"),
+        ]
+        assert data["builds"][0]["slowestGlyphs"]
+
+        main([testufo, "--profile", str(profile), "--profile-format", "chrome"])
+        events = json.loads(profile.read_text())["traceEvents"]
+        assert events[0]["name"] == "compile"
@@ -6,8 +6,10 @@ import pytest
 from fontTools.colorLib.unbuilder import unbuildColrV1
 from fontTools.cu2qu.ufo import font_to_quadratic
 from fontTools.misc.arrayTools import quantizeRect
+from fontTools.misc.psCharStrings import T2CharString
+from fontTools.pens.hashPointPen import HashPointPen
 from fontTools.ttLib import TTFont
-from fontTools.ttLib.tables._g_l_y_f import USE_MY_METRICS
+from fontTools.ttLib.tables._g_l_y_f import USE_MY_METRICS, Glyph
 
 from ufo2ft import (
     compileInterpolatableOTFsFromDS,
@@ -24,8 +26,11 @@ from ufo2ft.constants import (
     OPENTYPE_POST_UNDERLINE_POSITION_KEY,
     SPARSE_OTF_MASTER_TABLES,
     SPARSE_TTF_MASTER_TABLES,
+    TRUETYPE_INSTRUCTIONS_KEY,
+    TRUETYPE_OVERLAP_KEY,
     USE_PRODUCTION_NAMES,
 )
+from ufo2ft.diskCache import DiskCache
 from ufo2ft.errors import InvalidFontData
 from ufo2ft.filters import DecomposeTransformedComponentsFilter
 from ufo2ft.fontInfoData import intListToNum
@@ -103,6 +108,33 @@ class OutlineTTFCompilerTest:
         # float coordinates are rounded, so is the bbox
         assert compiler.glyphBoundingBoxes["d"] == (90, 77, 211, 197)
 
+    def test_makeGlyphsBoundingBoxes_nested_components(
+        self, nestedcomponentsufo, monkeypatch
+    ):
+        font_to_quadratic(nestedcomponentsufo)
+        compiler = OutlineTTFCompiler(nestedcomponentsufo)
+        expected = {}
+        for name, glyph in compiler.getCompiledGlyphs().items():
+            # the bounds of the glyphs expanded to contours
+            coordinates, _, _ = glyph.getCoordinates(compiler.getCompiledGlyphs())
+            if len(coordinates):
+                expected[name] = tuple(coordinates.calcIntBounds())
+            else:
+                expected[name] = None
+
+        calls = []
+        recalcBounds = Glyph.recalcBounds
+
+        def countingRecalcBounds(glyph, *args, **kwargs):
+            calls.append(glyph)
+            return recalcBounds(glyph, *args, **kwargs)
+
+        monkeypatch.setattr(Glyph, "recalcBounds", countingRecalcBounds)
+
+        assert compiler.makeGlyphsBoundingBoxes() == expected
+        # the bounds of the base glyphs are computed once for all the composites
+        assert len(calls) == len(expected)
+
     def test_getMaxComponentDepths(self, nestedcomponentsufo):
         compiler = OutlineTTFCompiler(nestedcomponentsufo)
         assert "a" not in compiler.getMaxComponentDepths()
@@ -583,6 +615,36 @@ class OutlineOTFCompilerTest:
         compiler = OutlineOTFCompiler(testufo, roundTolerance=0.1)
         assert compiler.glyphBoundingBoxes["d"] == (90, 77, 211, 198)
 
+    @pytest.mark.parametrize("optimizeCFF", [True, False])
+    def test_makeGlyphsBoundingBoxes_while_drawing(
+        self, testufo, optimizeCFF, monkeypatch
+    ):
+        glyph = testufo.newGlyph("dots")
+        pen = glyph.getPen()
+        # the single points only count if the successive moves aren't merged
+        for pt in ((500, -300), (10.4, 20.6), (700, 800)):
+            pen.moveTo(pt)
+            pen.endPath()
+        pen.moveTo((0, 0))
+        pen.curveTo((-50.2, 100), (150, 100), (100.3, 0))
+        pen.closePath()
+        pen.addComponent("d", (1, 0, 0, 1, 0.4, -0.4))
+
+        compiler = OutlineOTFCompiler(testufo, optimizeCFF=optimizeCFF)
+        charStrings = compiler.getCompiledGlyphs()
+        expected = {
+            name: cs.calcBounds(charStrings) for name, cs in charStrings.items()
+        }
+
+        def calcBounds(self, glyphSet):
+            raise AssertionError("the bounds are computed while drawing")
+
+        monkeypatch.setattr(T2CharString, "calcBounds", calcBounds)
+        assert compiler._charStringBounds == expected
+        assert compiler.glyphBoundingBoxes["dots"] == (
+            (-8, 0, 211, 197) if optimizeCFF else (-8, -300, 700, 800)
+        )
+
     def test_importTTX(self, testufo):
         compiler = OutlineOTFCompiler(testufo)
         otf = compiler.otf = TTFont(sfntVersion="OTTO")
@@ -745,6 +807,225 @@ class OutlineOTFCompilerTest:
         assert cff_underline == -506
 
 
+def _saveAndLoad(font):
+    stream = BytesIO()
+    font.save(stream)
+    stream.seek(0)
+    return TTFont(stream)
+
+
+def _assertSameTables(font, expected):
+    assert font.getGlyphOrder() == expected.getGlyphOrder()
+    assert set(font.keys()) == set(expected.keys())
+    for tag in font.keys():
+        if tag in ("head", "GlyphOrder"):
+            continue
+        assert font[tag].compile(font) == expected[tag].compile(expected), tag
+    # the timestamps may differ
+    assert font["head"].fontRevision == expected["head"].fontRevision
+    for attr in ("xMin", "yMin", "xMax", "yMax", "flags"):
+        assert getattr(font["head"], attr) == getattr(expected["head"], attr)
+
+
+def _assertSameFont(font, expected):
+    # the whole fonts are the same, timestamps aside
+    data = []
+    for ttFont in (font, expected):
+        ttFont = _saveAndLoad(ttFont)
+        ttFont.recalcTimestamp = False
+        ttFont["head"].created = ttFont["head"].modified = 0
+        stream = BytesIO()
+        ttFont.save(stream)
+        data.append(stream.getvalue())
+    assert data[0] == data[1]
+
+
+def _compileIncrementally(compilerClass, ufo, previousState, **kwargs):
+    # compile from the saved font, like the build server does
+    previousState = previousState._replace(font=_saveAndLoad(previousState.font))
+    compiler = compilerClass(ufo, previousState=previousState, **kwargs)
+    return compiler.compile(), compiler
+
+
+class IncrementalCompileTest:
+    @pytest.fixture(params=["ttf", "otf"])
+    def ufoAndCompiler(self, request, FontClass):
+        ufo = FontClass(getpath("TestFont.ufo"))
+        if request.param == "ttf":
+            font_to_quadratic(ufo)
+            return ufo, OutlineTTFCompiler
+        return ufo, OutlineOTFCompiler
+
+    def test_unchanged(self, ufoAndCompiler):
+        ufo, compilerClass = ufoAndCompiler
+        compiler = compilerClass(ufo)
+        expected = compiler.compile()
+        state = compiler.getIncrementalState()
+        assert state.fingerprints.keys() == state.boundingBoxes.keys()
+
+        font, compiler = _compileIncrementally(compilerClass, ufo, state)
+        assert compiler.getReusedGlyphs().keys() == set(compiler.glyphOrder)
+        _assertSameTables(_saveAndLoad(font), _saveAndLoad(expected))
+
+    def test_unchanged_whole_font(self, FontClass):
+        # the head flags don't say that the left side bearings are the xMin,
+        # which is recalculated from the glyphs
+        ufo = FontClass(getpath("ContourOrderTest.ufo"))
+        font_to_quadratic(ufo)
+        assert not ufo.info.openTypeHeadFlags
+        compiler = OutlineTTFCompiler(ufo)
+        expected = compiler.compile()
+
+        state = compiler.getIncrementalState()
+        font, compiler = _compileIncrementally(OutlineTTFCompiler, ufo, state)
+        assert compiler.getReusedGlyphs()
+        assert _saveAndLoad(font)["head"].flags & 0x2
+        _assertSameFont(font, expected)
+
+    def test_modified_glyphs(self, ufoAndCompiler):
+        ufo, compilerClass = ufoAndCompiler
+        compiler = compilerClass(ufo)
+        compiler.compile()
+        state = compiler.getIncrementalState()
+
+        # 'a' is a component of 'g', 'i', 'j', 'k' and 'l'
+        ufo["a"].width += 10
+        ufo["a"].move((10, -20))
+        ufo["c"].move((500, 500))
+        font, compiler = _compileIncrementally(compilerClass, ufo, state)
+        reused = compiler.getReusedGlyphs()
+        assert set(compiler.glyphOrder) - reused.keys() == set("acgijkl")
+
+        expected = compilerClass(ufo).compile()
+        _assertSameTables(_saveAndLoad(font), _saveAndLoad(expected))
+        assert font["head"].yMax == expected["head"].yMax > state.font["head"].yMax
+
+    def test_glyph_order_changed(self, ufoAndCompiler):
+        ufo, compilerClass = ufoAndCompiler
+        compiler = compilerClass(ufo)
+        compiler.compile()
+        state = compiler.getIncrementalState()
+
+        # the reused composite glyphs refer to their components by glyph ID
+        ufo.newGlyph("aa").width = 100
+        del ufo["b"]
+        ufo["h"].components[1].baseGlyph = "c"
+        ufo.glyphOrder = ["aa"] + [n for n in ufo.glyphOrder if n != "aa"]
+        font, compiler = _compileIncrementally(compilerClass, ufo, state)
+        assert "k" in compiler.getReusedGlyphs()
+
+        expected = compilerClass(ufo).compile()
+        _assertSameTables(_saveAndLoad(font), _saveAndLoad(expected))
+
+    def test_options_changed(self, quadufo):
+        compiler = OutlineTTFCompiler(quadufo)
+        compiler.compile()
+        state = compiler.getIncrementalState()
+
+        font, compiler = _compileIncrementally(
+            OutlineTTFCompiler, quadufo, state, roundCoordinates=False
+        )
+        assert not compiler.getReusedGlyphs()
+
+    def test_subroutinized_cff(self, testufo):
+        compiler = OutlineOTFCompiler(testufo)
+        compiler.compile()
+        state = compiler.getIncrementalState()
+        state = state._replace(font=compileOTF(testufo))
+
+        font, compiler = _compileIncrementally(OutlineOTFCompiler, testufo, state)
+        assert not compiler.getReusedGlyphs()
+        _assertSameTables(
+            _saveAndLoad(font), _saveAndLoad(OutlineOTFCompiler(testufo).compile())
+        )
+
+
+class GlyphCacheTest:
+    def test_cache(self, quadufo, tmp_path):
+        # glyph 'a' has instructions, which are cached with it
+        glyph = quadufo["a"]
+        hashPen = HashPointPen(glyph.width, quadufo)
+        glyph.drawPoints(hashPen)
+        glyph.lib[TRUETYPE_INSTRUCTIONS_KEY] = {
+            "formatVersion": "1",
+            "id": hashPen.hash,
+            "assembly": "PUSHB[]\n0\nMDAP[1]",
+        }
+        quadufo["b"].lib[TRUETYPE_OVERLAP_KEY] = True
+        expected = OutlineTTFCompiler(quadufo).compile()
+
+        compiler = OutlineTTFCompiler(quadufo, cache=DiskCache(tmp_path))
+        _assertSameTables(_saveAndLoad(compiler.compile()), _saveAndLoad(expected))
+        assert not compiler.getReusedGlyphs()
+        # only the glyphs with contours and no components are cached ('i' and
+        # 'j' have both, and are simple glyphs once the components decomposed)
+        simpleGlyphs = {".notdef", "a", "b", "c", "d", "e", "f"}
+
+        compiler = OutlineTTFCompiler(quadufo, cache=DiskCache(tmp_path))
+        font = compiler.compile()
+        assert compiler.getReusedGlyphs().keys() == simpleGlyphs
+        assert font["maxp"].maxSizeOfInstructions == 3
+        font = _saveAndLoad(font)
+        _assertSameTables(font, _saveAndLoad(expected))
+        assert font["glyf"]["a"].program.getBytecode() == b"\xb0\x00\x2f"
+
+        quadufo["c"].move((10, 0))
+        compiler = OutlineTTFCompiler(quadufo, cache=DiskCache(tmp_path))
+        font = compiler.compile()
+        assert compiler.getReusedGlyphs().keys() == simpleGlyphs - {"c"}
+        _assertSameTables(
+            _saveAndLoad(font), _saveAndLoad(OutlineTTFCompiler(quadufo).compile())
+        )
+
+    def test_composites_before_base_glyphs(self, use_my_metrics_ufo, tmp_path):
+        # the composite glyphs come first in the glyph order, and expand the
+        # cached base glyphs before their own bounds are computed
+        ufo = use_my_metrics_ufo
+        ufo.lib["public.glyphOrder"] = sorted(
+            ufo.keys(), key=lambda name: (not ufo[name].components, name)
+        )
+        expected = OutlineTTFCompiler(ufo).compile()
+        OutlineTTFCompiler(ufo, cache=DiskCache(tmp_path)).compile()
+
+        compiler = OutlineTTFCompiler(ufo, cache=DiskCache(tmp_path))
+        font = compiler.compile()
+        assert compiler.getReusedGlyphs()
+        _assertSameTables(_saveAndLoad(font), _saveAndLoad(expected))
+
+    def test_warm_cache_whole_font(self, FontClass, tmp_path):
+        ufo = FontClass(getpath("ContourOrderTest.ufo"))
+        font_to_quadratic(ufo)
+        expected = OutlineTTFCompiler(ufo, cache=DiskCache(tmp_path)).compile()
+
+        compiler = OutlineTTFCompiler(ufo, cache=DiskCache(tmp_path))
+        font = compiler.compile()
+        assert compiler.getReusedGlyphs()
+        assert _saveAndLoad(font)["head"].flags & 0x2
+        _assertSameFont(font, expected)
+
+    def test_options(self, quadufo, tmp_path):
+        OutlineTTFCompiler(quadufo, cache=DiskCache(tmp_path)).compile()
+
+        compiler = OutlineTTFCompiler(
+            quadufo, cache=DiskCache(tmp_path), dropImpliedOnCurves=True
+        )
+        compiler.compile()
+        assert not compiler.getReusedGlyphs()
+
+        # glyphs with float coordinates aren't cached
+        size = DiskCache(tmp_path).size()
+        compiler = OutlineTTFCompiler(
+            quadufo, cache=DiskCache(tmp_path), roundCoordinates=False
+        )
+        compiler.compile()
+        assert not compiler.getReusedGlyphs()
+        assert DiskCache(tmp_path).size() == size
+
+    def test_compileTTF(self, testufo, tmp_path):
+        compileTTF(testufo, cache=tmp_path)
+        assert DiskCache(tmp_path).size() > 0
+
+
 class GlyphOrderTest:
     def test_compile_original_glyph_order(self, quadufo):
         DEFAULT_ORDER = [
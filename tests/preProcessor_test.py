@@ -12,14 +12,23 @@ from ufo2ft.constants import (
     COLOR_LAYERS_KEY,
     COLOR_PALETTES_KEY,
 )
-from ufo2ft.filters import FILTERS_KEY, loadFilterFromString
+from ufo2ft.diskCache import DiskCache
+from ufo2ft.filters import FILTERS_KEY, cubicToQuadratic, loadFilterFromString
+from ufo2ft.filters.base import runFilters
+from ufo2ft.filters.cubicToQuadratic import CubicToQuadraticFilter
+from ufo2ft.filters.decomposeComponents import DecomposeComponentsFilter
 from ufo2ft.filters.explodeColorLayerGlyphs import ExplodeColorLayerGlyphsFilter
+from ufo2ft.filters.flattenComponents import FlattenComponentsFilter
+from ufo2ft.filters.removeOverlaps import RemoveOverlapsFilter
+from ufo2ft.filters.reverseContourDirection import ReverseContourDirectionFilter
+from ufo2ft.filters.sortContours import SortContoursFilter
 from ufo2ft.preProcessor import (
     TTFInterpolatablePreProcessor,
     TTFPreProcessor,
+    _groupFilters,
     _init_explode_color_layer_glyphs_filter,
 )
-from ufo2ft.util import _hasOverflowingComponentTransforms
+from ufo2ft.util import _CopyOnWriteGlyphSet, _hasOverflowingComponentTransforms
 
 
 def getpath(filename):
@@ -27,6 +36,13 @@ def getpath(filename):
     return os.path.join(dirname, "data", filename)
 
 
+def glyph_points(glyphSet, glyph_name):
+    return [
+        [(p.x, p.y, p.segmentType, p.smooth) for p in contour]
+        for contour in glyphSet[glyph_name]
+    ]
+
+
 def glyph_has_qcurve(ufo, glyph_name):
     return any(
         s.segmentType == "qcurve" for contour in ufo[glyph_name] for s in contour
@@ -43,6 +59,20 @@ class TTFPreProcessorTest:
         assert glyph_has_qcurve(glyphSet, "c")
         assert CURVE_TYPE_LIB_KEY not in ufo.layers.defaultLayer.lib
 
+    def test_no_inplace_copy_on_write(self, FontClass):
+        ufo = FontClass(getpath("TestFont.ufo"))
+
+        glyphSet = TTFPreProcessor(ufo, inplace=False).process()
+
+        # glyphs that no filter modified are shared with the input UFO...
+        assert glyphSet["space"] is ufo["space"]
+        assert glyphSet["g"] is ufo["g"]
+        # ... whereas modified glyphs are copied
+        assert glyphSet["c"] is not ufo["c"]
+        assert glyphSet["i"] is not ufo["i"]
+        assert len(ufo["i"].components) == 1
+        assert not glyphSet["i"].components
+
     def test_inplace_remember_curve_type(self, FontClass, caplog):
         caplog.set_level(logging.ERROR)
 
@@ -182,6 +212,137 @@ class TTFPreProcessorTest:
         assert len(glyphSet["composite"].components) == 0
         assert len(glyphSet["composite"]) == 1
 
+    def test_cache(self, FontClass, tmp_path, caplog):
+        ufo = FontClass(getpath("TestFont.ufo"))
+        expected = TTFPreProcessor(ufo, inplace=False).process()
+
+        converted = TTFPreProcessor(ufo, cache=DiskCache(tmp_path)).process()
+        with caplog.at_level(logging.INFO, logger="ufo2ft.filters"):
+            cached = TTFPreProcessor(ufo, cache=DiskCache(tmp_path)).process()
+        assert "Loaded 9 converted glyphs from the cache" in caplog.text
+
+        for glyphSet in (converted, cached):
+            assert glyphSet.keys() == expected.keys()
+            for name in expected.keys():
+                assert glyph_points(glyphSet, name) == glyph_points(expected, name)
+            # the cached conversion doesn't modify the input
+            assert glyphSet["c"] is not ufo["c"]
+            assert not glyph_has_qcurve(ufo, "c")
+
+        # the cache is keyed by the conversion options
+        glyphSet = TTFPreProcessor(
+            ufo, conversionError=0.01, cache=DiskCache(tmp_path)
+        ).process()
+        assert glyph_points(glyphSet, "c") != glyph_points(expected, "c")
+
+    def test_cache_color_layers(self, FontClass, tmp_path):
+        # the glyphs copied from the color layers have the same name as the
+        # base glyph, e.g. "a.color1" is named "a"; the preprocessor adds the
+        # colorLayers to the font lib, so each run loads the font again
+        path = getpath("ColorTest.ufo")
+        expected = TTFPreProcessor(FontClass(path)).process()
+        assert "a.color1" in expected
+
+        otherUfo = FontClass(getpath("COLRv1Test.ufo"))
+        TTFPreProcessor(otherUfo, cache=DiskCache(tmp_path)).process()
+        for _ in range(2):
+            glyphSet = TTFPreProcessor(
+                FontClass(path), cache=DiskCache(tmp_path)
+            ).process()
+            assert glyphSet.keys() == expected.keys()
+            for name in expected.keys():
+                assert glyph_points(glyphSet, name) == glyph_points(expected, name)
+
+    def test_glyphNames(self, FontClass):
+        ufo = FontClass(getpath("TestFont.ufo"))
+        expected = TTFPreProcessor(ufo).process()
+        # the components of 'h' are preprocessed with it
+        glyphSet = TTFPreProcessor(ufo, glyphNames=["h", "c"]).process()
+        assert set(glyphSet.keys()) == {"b", "c", "d", "h"}
+        for name in glyphSet.keys():
+            assert glyph_points(glyphSet, name) == glyph_points(expected, name)
+
+    def test_fused_filters(self, FontClass):
+        ufo = FontClass(getpath("TestFont.ufo"))
+        filters = [
+            DecomposeComponentsFilter(),
+            RemoveOverlapsFilter(backend="pathops"),
+            CubicToQuadraticFilter(),
+            ReverseContourDirectionFilter(exclude=["c"]),
+            SortContoursFilter(),
+        ]
+        assert _groupFilters(filters) == [filters]
+
+        expected = _CopyOnWriteGlyphSet.from_layer(ufo)
+        expectedModified = [f(ufo, expected) for f in filters]
+
+        glyphSet = _CopyOnWriteGlyphSet.from_layer(ufo)
+        modified = runFilters(filters, ufo, glyphSet)
+
+        assert modified == expectedModified
+        assert "c" not in modified[3]
+        assert glyphSet.keys() == expected.keys()
+        for name in expected.keys():
+            assert glyph_points(glyphSet, name) == glyph_points(expected, name)
+            assert glyphSet.isCopied(name) == expected.isCopied(name)
+
+    def test_fused_filters_glyphNames(self, FontClass):
+        seen = []
+
+        class OnlyFilter(ufo2ft.filters.BaseFilter):
+            def set_context(self, font, glyphSet):
+                context = super().set_context(font, glyphSet)
+                context.glyphNames = {"a", "c"}
+                return context
+
+            def filter(self, glyph):
+                seen.append(glyph.name)
+                return False
+
+        ufo = FontClass(getpath("TestFont.ufo"))
+        filters = [OnlyFilter(), ReverseContourDirectionFilter()]
+        assert _groupFilters(filters) == [filters]
+
+        expected = _CopyOnWriteGlyphSet.from_layer(ufo)
+        expectedModified = [f(ufo, expected) for f in filters]
+        assert sorted(seen) == ["a", "c"]
+        seen.clear()
+
+        # the glyphs are only restricted for the filter which asked for it
+        glyphSet = _CopyOnWriteGlyphSet.from_layer(ufo)
+        modified = runFilters(filters, ufo, glyphSet)
+        assert sorted(seen) == ["a", "c"]
+        assert modified == expectedModified
+        assert len(modified[1]) > 2
+
+    def test_group_filters(self, tmp_path):
+        decompose = DecomposeComponentsFilter()
+        overlaps = RemoveOverlapsFilter()
+        cu2qu = CubicToQuadraticFilter()
+        cachedCu2qu = CubicToQuadraticFilter(cache=DiskCache(tmp_path))
+        reverse = ReverseContourDirectionFilter()
+        flatten = FlattenComponentsFilter()
+
+        def func(font, glyphSet):
+            pass
+
+        # any filter can start a group, but not the filters with their own
+        # __call__, nor the ones which look up the other glyphs
+        assert _groupFilters([decompose, overlaps, flatten, cu2qu, reverse]) == [
+            [decompose, overlaps],
+            [flatten],
+            [cu2qu, reverse],
+        ]
+        assert _groupFilters([overlaps, decompose, cachedCu2qu, reverse]) == [
+            [overlaps],
+            [decompose],
+            [cachedCu2qu, reverse],
+        ]
+        assert _groupFilters([func, reverse, overlaps]) == [
+            [func],
+            [reverse, overlaps],
+        ]
+
 
 class TTFInterpolatablePreProcessorTest:
     def test_no_inplace(self, FontClass):
@@ -199,6 +360,8 @@ class TTFInterpolatablePreProcessorTest:
             assert glyph_has_qcurve(glyphSets[i], "c")
             assert CURVE_TYPE_LIB_KEY not in ufos[i].lib
             assert CURVE_TYPE_LIB_KEY not in ufos[i].layers.defaultLayer.lib
+            assert glyphSets[i]["space"] is ufos[i]["space"]
+            assert glyphSets[i]["c"] is not ufos[i]["c"]
 
     def test_inplace_remember_curve_type(self, FontClass):
         ufo1 = FontClass(getpath("TestFont.ufo"))
@@ -233,6 +396,77 @@ class TTFInterpolatablePreProcessorTest:
             assert glyph_has_qcurve(ufo1, "c")
             assert glyph_has_qcurve(ufo2, "c")
 
+    def test_cache(self, FontClass, tmp_path, caplog):
+        ufos = [FontClass(getpath("TestFont.ufo")) for _ in range(2)]
+        ufos[1]["c"].move((10, 0))
+        expected = TTFInterpolatablePreProcessor(ufos, inplace=False).process()
+
+        for _ in range(2):
+            caplog.clear()
+            with caplog.at_level(logging.INFO, logger="ufo2ft.filters"):
+                glyphSets = TTFInterpolatablePreProcessor(
+                    ufos, cache=DiskCache(tmp_path)
+                ).process()
+            for glyphSet, expectedSet in zip(glyphSets, expected):
+                for name in expectedSet.keys():
+                    assert glyph_points(glyphSet, name) == glyph_points(
+                        expectedSet, name
+                    )
+            assert not glyph_has_qcurve(ufos[0], "c")
+        assert "Loaded 9 converted glyphs from the cache" in caplog.text
+
+    def test_cache_incompatible(self, FontClass, tmp_path):
+        from fontTools.cu2qu.ufo import IncompatibleFontsError
+
+        ufos = [FontClass(getpath("TestFont.ufo")) for _ in range(2)]
+        pen = ufos[1]["c"].getPen()
+        pen.moveTo((0, 0))
+        pen.lineTo((10, 0))
+        pen.curveTo((10, 10), (5, 10), (0, 10))
+        pen.closePath()
+        with pytest.raises(IncompatibleFontsError) as excinfo:
+            TTFInterpolatablePreProcessor(ufos, cache=DiskCache(tmp_path)).process()
+        assert excinfo.value.glyph_errors.keys() == {"c"}
+
+    @pytest.mark.parametrize("rememberCurveType", [False, True])
+    def test_jobs(self, FontClass, monkeypatch, rememberCurveType):
+        monkeypatch.setattr(cubicToQuadratic, "_MIN_GLYPHS_PER_WORKER", 1)
+        ufos = [FontClass(getpath("TestFont.ufo")) for _ in range(2)]
+        ufos[1]["c"].move((10, 0))
+        expected = TTFInterpolatablePreProcessor(ufos, inplace=False).process()
+
+        glyphSets = TTFInterpolatablePreProcessor(
+            ufos, inplace=True, rememberCurveType=rememberCurveType, jobs=2
+        ).process()
+
+        for glyphSet, expectedSet in zip(glyphSets, expected):
+            for name in expectedSet.keys():
+                assert glyph_points(glyphSet, name) == glyph_points(expectedSet, name)
+        for ufo in ufos:
+            curveType = ufo.layers.defaultLayer.lib.get(CURVE_TYPE_LIB_KEY)
+            assert curveType == ("quadratic" if rememberCurveType else None)
+
+        if rememberCurveType:
+            # the glyphs are not converted again
+            glyphSets = TTFInterpolatablePreProcessor(
+                ufos, inplace=True, jobs=2
+            ).process()
+            assert glyph_points(glyphSets[0], "c") == glyph_points(expected[0], "c")
+
+    def test_jobs_incompatible(self, FontClass, monkeypatch):
+        from fontTools.cu2qu.ufo import IncompatibleFontsError
+
+        monkeypatch.setattr(cubicToQuadratic, "_MIN_GLYPHS_PER_WORKER", 1)
+        ufos = [FontClass(getpath("TestFont.ufo")) for _ in range(2)]
+        pen = ufos[1]["c"].getPen()
+        pen.moveTo((0, 0))
+        pen.lineTo((10, 0))
+        pen.curveTo((10, 10), (5, 10), (0, 10))
+        pen.closePath()
+        with pytest.raises(IncompatibleFontsError) as excinfo:
+            TTFInterpolatablePreProcessor(ufos, jobs=2).process()
+        assert excinfo.value.glyph_errors.keys() == {"c"}
+
     def test_custom_filters(self, FontClass):
         ufo1 = FontClass(getpath("TestFont.ufo"))
         ufo1.lib[FILTERS_KEY] = [
@@ -408,6 +642,26 @@ class SkipExportGlyphsTest:
         assert len(glyphSet["numero"]) == 1
         assert set(glyphSet.keys()) == {"N", "numero", "o"}  # "_o.numero" is gone
 
+    def test_skip_export_glyphs_filter_only_users(self, FontClass, monkeypatch):
+        from ufo2ft.filters.skipExportGlyphs import SkipExportGlyphsFilter
+        from ufo2ft.util import _GlyphSet
+
+        ufo = FontClass(getpath("IncompatibleMasters/NewFont-Regular.ufo"))
+        filtered = []
+        filter_ = SkipExportGlyphsFilter.filter
+
+        def spy(self, glyph):
+            filtered.append(glyph.name)
+            return filter_(self, glyph)
+
+        monkeypatch.setattr(SkipExportGlyphsFilter, "filter", spy)
+        glyphSet = _GlyphSet.from_layer(ufo, skipExportGlyphs=["b", "d"])
+
+        # only "c" uses the non-export glyphs, the other composites aren't visited
+        assert filtered == ["c"]
+        assert [c.baseGlyph for c in glyphSet["c"].components] == ["a"]
+        assert set(glyphSet.keys()) == {"a", "c", "e", "f"}
+
     def test_skip_export_glyphs_designspace(self, FontClass):
         # Designspace has a public.skipExportGlyphs lib key excluding "b" and "d".
         designspace = designspaceLib.DesignSpaceDocument.fromfile(
@@ -8,6 +8,8 @@ from ufo2ft import util
 from ufo2ft.errors import InvalidFontData
 from ufo2ft.util import zip_strict
 
+from .outlineCompiler_test import getpath
+
 
 def test_overloaded_mapping_raises_error(FontClass):
     """Test that util.makeUnicodeToGlyphNameMapping() raises an error when
@@ -86,6 +88,24 @@ def test_getMaxComponentDepth_cyclical_reference():
     assert util.getMaxComponentDepth(glyph_h, test_ufo) == 0
 
 
+def test_makeComponentIndex(FontClass):
+    font1 = FontClass()
+    font1.newGlyph("a")
+    font1.newGlyph("b").getPen().addComponent("a", (1, 0, 0, 1, 0, 0))
+    pen = font1.newGlyph("c").getPen()
+    pen.addComponent("a", (1, 0, 0, 1, 0, 0))
+    pen.addComponent("b", (1, 0, 0, 1, 0, 0))
+    font2 = FontClass()
+    font2.newGlyph("a")
+    font2.newGlyph("d").getPen().addComponent("a", (1, 0, 0, 1, 0, 0))
+
+    assert util.makeComponentIndex([font1]) == {"a": {"b", "c"}, "b": {"c"}}
+    assert util.makeComponentIndex([font1, font2]) == {
+        "a": {"b", "c", "d"},
+        "b": {"c"},
+    }
+
+
 def test_zip_strict():
     assert list(zip_strict([0, 1], [2, 3])) == [(0, 2), (1, 3)]
 
@@ -108,3 +128,185 @@ def test_zip_strict():
         ValueError, match=r"zip\(\) argument 3 is longer than arguments 1-2"
     ):
         list(zip_strict([0, 1], [2, 3], [1, 2, 3]))
+
+
+def test_CopyOnWriteGlyphSet(FontClass):
+    test_ufo = FontClass()
+    glyph_a = test_ufo.newGlyph("a")
+    glyph_a.width = 100
+    glyph_b = test_ufo.newGlyph("b")
+    test_ufo.layers.defaultLayer.lib["foo"] = [1]
+
+    glyphSet = util._CopyOnWriteGlyphSet.from_layer(test_ufo)
+
+    assert glyphSet.lib == {"foo": [1]}
+    assert glyphSet.lib["foo"] is not test_ufo.layers.defaultLayer.lib["foo"]
+
+    # reading through the read-only view doesn't copy
+    assert glyphSet.readOnly["a"] is glyph_a
+    assert not glyphSet.isCopied("a")
+
+    # indexing makes a private copy the first time
+    copy_a = glyphSet["a"]
+    assert copy_a is not glyph_a
+    assert copy_a.width == 100
+    assert glyphSet.isCopied("a")
+    assert glyphSet["a"] is copy_a
+    assert glyphSet.readOnly["a"] is copy_a
+    copy_a.width = 200
+    assert glyph_a.width == 100
+
+    # assigned glyphs are owned by the glyph set and never copied
+    glyph_c = util._getNewGlyphFactory(glyph_a)("c")
+    glyphSet["c"] = glyph_c
+    assert glyphSet["c"] is glyph_c
+
+    del glyphSet["a"]
+    assert "a" not in glyphSet
+    assert not glyphSet.isCopied("a")
+
+    # freezing returns a plain glyph set sharing the unmodified glyphs
+    frozen = glyphSet.freeze()
+    assert type(frozen) is util._GlyphSet
+    assert frozen.lib is glyphSet.lib
+    assert frozen.keys() == {"b", "c"}
+    assert frozen["b"] is glyph_b
+    assert frozen["c"] is glyph_c
+
+
+def test_LazyGlyphSet(FontClass, tmp_path):
+    test_ufo = FontClass()
+    glyph_a = test_ufo.newGlyph("a")
+    glyph_a.width = 100
+    pen = glyph_a.getPen()
+    pen.moveTo((0, 0))
+    pen.lineTo((100, 0))
+    pen.lineTo((100, 100))
+    pen.closePath()
+    glyph_b = test_ufo.newGlyph("b")
+    glyph_b.getPointPen().addComponent("a", (1, 0, 0, 1, 0, 0))
+    test_ufo.save(tmp_path / "Test.ufo")
+
+    with pytest.raises(ValueError, match="without a path"):
+        util._LazyGlyphSet.from_layer(FontClass())
+
+    glyphSet = util._LazyGlyphSet.from_layer(test_ufo)
+
+    assert glyphSet.keys() == {"a", "b"}
+    # glyphs are read from disk, not copied from the font
+    lazy_a = glyphSet.readOnly["a"]
+    assert lazy_a is not glyph_a
+    assert lazy_a.width == 100
+    assert len(lazy_a) == 1
+    assert glyphSet.readOnly["b"].components[0].baseGlyph == "a"
+
+    # released outlines are read again when needed
+    glyphSet.release()
+    assert lazy_a._pointData is None
+    assert len(lazy_a) == 1
+    assert len(lazy_a[0]) == 3
+
+    # glyphs that may have been modified are never released
+    mutable_a = glyphSet["a"]
+    assert mutable_a is lazy_a
+    mutable_a.clearContours()
+    glyphSet.release()
+    assert len(glyphSet.readOnly["a"]) == 0
+
+    frozen = glyphSet.freeze()
+    assert frozen is glyphSet
+    frozen["b"]
+    assert not glyphSet.isCopied("b")
+
+
+def _drawSquare(glyph, size=100):
+    pen = glyph.getPen()
+    pen.moveTo((0, 0))
+    pen.lineTo((size, 0))
+    pen.lineTo((size, size))
+    pen.closePath()
+
+
+def test_fingerprintGlyphs(FontClass):
+    font = FontClass()
+    a = font.newGlyph("a")
+    a.width = 500
+    a.unicodes = [0x61]
+    _drawSquare(a)
+    b = font.newGlyph("b")
+    b.width = 500
+    _drawSquare(b)
+    aacute = font.newGlyph("aacute")
+    aacute.getPointPen().addComponent("a", (1, 0, 0, 1, 0, 0))
+    missing = font.newGlyph("missing")
+    missing.getPointPen().addComponent("nope", (1, 0, 0, 1, 0, 0))
+
+    fingerprints = util.fingerprintGlyphs(font)
+    assert fingerprints.keys() == {"a", "b", "aacute", "missing"}
+    assert all(
+        len(fp) == util.GlyphFingerprinter.digestSize for fp in fingerprints.values()
+    )
+    # the glyph name doesn't matter, the content does
+    assert fingerprints["a"] != fingerprints["b"]
+    b.unicodes = [0x61]
+    fingerprints = util.fingerprintGlyphs(font)
+    assert fingerprints["b"] == fingerprints["a"]
+
+    # whole floats are the same as ints
+    a.clearContours()
+    pen = a.getPen()
+    pen.moveTo((0.0, 0.0))
+    pen.lineTo((100.0, 0))
+    pen.lineTo((100, 100.0))
+    pen.closePath()
+    a.width = 500.0
+    assert util.fingerprintGlyphs(font) == fingerprints
+
+    # changing a base glyph changes the composites
+    a.move((1, 0))
+    modified = util.fingerprintGlyphs(font)
+    assert modified["a"] != fingerprints["a"]
+    assert modified["aacute"] != fingerprints["aacute"]
+    assert modified["missing"] == fingerprints["missing"]
+    a.move((-1, 0))
+
+    # only the given lib keys are hashed
+    a.lib["com.example.foo"] = 1
+    assert util.fingerprintGlyphs(font) == fingerprints
+    a.lib["public.verticalOrigin"] = 800
+    assert util.fingerprintGlyphs(font)["a"] != fingerprints["a"]
+    assert util.fingerprintGlyphs(font, libKeys=())["a"] == fingerprints["a"]
+
+
+def test_fingerprintGlyphs_same_for_all_glyph_classes(FontClass):
+    ufo = FontClass(getpath("TestFont.ufo"))
+    expected = util.fingerprintGlyphs(ufo)
+    copyOnWrite = util._CopyOnWriteGlyphSet.from_layer(ufo)
+    assert util.fingerprintGlyphs(copyOnWrite) == expected
+    assert not any(copyOnWrite.isCopied(name) for name in ufo.keys())
+
+    compact = util._CompactGlyphSet.from_layer(ufo)
+    assert util.fingerprintGlyphs(compact) == expected
+
+
+def test_fingerprintGlyphs_cyclical_reference():
+    # defcon can't create cyclical component references, see above
+    test_ufo = pytest.importorskip("ufoLib2").Font()
+    test_ufo.newGlyph("A").getPen().addComponent("B", (1, 0, 0, 1, 0, 0))
+    test_ufo.newGlyph("B").getPen().addComponent("A", (1, 0, 0, 1, 0, 0))
+    with pytest.raises(
+        InvalidFontData, match="cyclical component reference: A -> B => A"
+    ):
+        util.fingerprintGlyphs(test_ufo, ["A"])
+
+
+def test_currentMemoryUsage():
+    before = util._currentMemoryUsage()
+    if before is None:
+        pytest.skip("can't read the resident memory on this platform")
+    # the current, not the peak resident memory: it goes down once freed
+    data = bytearray(256 * 1024 * 1024)
+    allocated = util._currentMemoryUsage()
+    assert allocated > before + 128 * 1024 * 1024
+    del data
+    assert util._currentMemoryUsage() < allocated - 128 * 1024 * 1024